@@ -21,13 +21,24 @@ Example:
     run_application(app)
 """
 
+from backend.jobs import initialize_render_queue
 from backend.models import Annotation, Project, Video, create_db_models, initialize_db
 from backend.routes import (
     auth_blueprint,
+    media_blueprint,
     react_blueprint,
+    refresh_session_record,
     register_blueprint,
     project_blueprint,
+    upload_blueprint,
+)
+from backend.sessions import initialize_session_store
+from backend.utils import (
+    get_environment_variable,
+    get_settings,
+    parse_bool,
+    sign_up,
+    verify_sign_up,
 )
-from backend.utils import get_environment_variable, parse_bool, sign_up, verify_sign_up
 
 from .application import create_app, run_application
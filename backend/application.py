@@ -11,7 +11,7 @@ Functions:
 
 from flask import Flask
 
-from backend.utils import get_environment_variable, parse_bool
+from backend.utils import get_settings
 
 
 def create_app(*args, **kwargs) -> Flask:
@@ -19,7 +19,9 @@ def create_app(*args, **kwargs) -> Flask:
 
     This function serves as a factory for creating Flask application instances, allowing for
     customization through variable arguments and keyword arguments. It sets up the application with
-    the necessary configurations to handle web requests.
+    the necessary configurations to handle web requests. The application settings are loaded and
+    validated here, so a misconfigured environment fails at startup, and are attached to the
+    application as `app.config["SETTINGS"]`.
 
     Args:
         *args: Variable length argument list for Flask initialization.
@@ -28,12 +30,19 @@ def create_app(*args, **kwargs) -> Flask:
     Returns:
         Flask: An instance of the Flask application.
 
+    Raises:
+        KeyError: If a required environment variable is missing.
+        ValueError: If an environment variable has an invalid value.
+
     Examples:
         >>> app = create_app()
         >>> app.name
         '__main__'
     """
-    return Flask(__name__, *args, **kwargs)
+    settings = get_settings()
+    app = Flask(__name__, *args, **kwargs)
+    app.config["SETTINGS"] = settings
+    return app
 
 
 def run_application(app: Flask, debug: bool = False, host: str = "0.0.0.0") -> None:
@@ -55,5 +64,5 @@ def run_application(app: Flask, debug: bool = False, host: str = "0.0.0.0") -> N
     Examples:
         >>> run_application(app)
     """
-    is_debug_mode = parse_bool(get_environment_variable("DEBUG")) or debug
+    is_debug_mode = app.config["SETTINGS"].debug or debug
     app.run(debug=is_debug_mode, host=host)
@@ -0,0 +1,101 @@
+"""Jobs Package Initialization Module
+
+This module provides the background render job subsystem. Rendering a video takes minutes, so
+`/api/projects/<project_id>/apply` only queues a `RenderJob` and returns its ID; a dispatcher
+thread hands queued jobs to a pool of worker processes, which report their progress to the
+database where the status endpoint reads it. Tracking passes that derive annotations between
+user keyframes, and the generation of proxies and sprite sheets for uploads, run through the
+same queue. The queue is the `RenderJob` table itself, so no
+Redis or other broker is needed.
+
+Key Features:
+- A database-backed job queue with atomic claiming.
+- A process pool sized to the number of cores by default.
+- Progress, ETA and error reporting through the `RenderJob` model.
+
+Configuration (read through `Settings`):
+- RENDER_WORKERS: Number of worker processes. Defaults to the number of cores.
+- RENDER_POLL_INTERVAL: Seconds between two scans of the queue. Defaults to 1.
+- RENDER_STALE_TIMEOUT: Running jobs without a heartbeat for this long are requeued. Defaults
+  to 600.
+
+Example:
+    from backend.jobs import initialize_render_queue, submit_render_job, wake_render_queue
+
+    initialize_render_queue(app)
+    job = submit_render_job(project.id, sub, f"renders/{project.id}.mp4")
+    wake_render_queue()
+"""
+
+from typing import Optional
+
+from flask import Flask, current_app
+
+from backend.models import RenderJob
+from backend.models.render_job import JOB_MEDIA
+from backend.utils import get_settings
+
+from .dispatcher import RenderDispatcher
+from .queue import (
+    assign_output_key,
+    claim_job,
+    complete_job,
+    fail_job,
+    next_queued_job_ids,
+    record_cached_job,
+    report_progress,
+    requeue_stale_jobs,
+    send_heartbeat,
+    submit_render_job,
+)
+from .worker import ProgressReporter, run_render_job
+
+
+def initialize_render_queue(app: Flask) -> RenderDispatcher:
+    """Start the dispatcher feeding queued render jobs to the worker processes.
+
+    Args:
+        app (Flask): The Flask application to configure.
+
+    Returns:
+        RenderDispatcher: The started dispatcher.
+    """
+    settings = get_settings()
+    dispatcher = RenderDispatcher(
+        app,
+        workers=settings.render_workers,
+        poll_interval=settings.render_poll_interval,
+        stale_timeout=settings.render_stale_timeout,
+    )
+    dispatcher.start()
+    app.extensions["render_dispatcher"] = dispatcher
+    print(f"Render queue started with {settings.render_workers} workers")
+    return dispatcher
+
+
+def get_render_dispatcher() -> Optional[RenderDispatcher]:
+    """Return the dispatcher of the current application, or None if it was not started."""
+    return current_app.extensions.get("render_dispatcher")
+
+
+def wake_render_queue() -> None:
+    """Ask the dispatcher to pick up newly submitted jobs without waiting for its next poll."""
+    dispatcher = get_render_dispatcher()
+    if dispatcher is not None:
+        dispatcher.wake()
+
+
+def queue_media_preparation(project_id: str, sub: str, digest: str) -> RenderJob:
+    """Queue the generation of the proxy video and sprite sheet of a stored video.
+
+    Args:
+        project_id (str): The project the video belongs to.
+        sub (str): The sub of the user who uploaded the video.
+        digest (str): The blob key of the video.
+
+    Returns:
+        RenderJob: The queued job.
+    """
+    job = submit_render_job(project_id, sub, None, options={"source_key": digest}, kind=JOB_MEDIA)
+    wake_render_queue()
+    return job
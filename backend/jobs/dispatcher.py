@@ -0,0 +1,160 @@
+"""Render Dispatcher Module
+
+This module provides the background thread that feeds queued render jobs to a pool of worker
+processes. Renders are CPU-bound, so they run in separate processes, one per core by default,
+and never inside a request thread.
+
+Key Features:
+- Claims queued jobs and submits them to a `ProcessPoolExecutor`.
+- Never runs more jobs than there are worker processes, leaving the rest queued.
+- Wakes up immediately when a job is submitted instead of waiting for the next poll.
+- Requeues jobs whose worker stopped sending heartbeats and fails jobs whose process crashed.
+
+Usage:
+The dispatcher is started by `initialize_render_queue` and runs as a daemon thread for the
+lifetime of the process.
+
+Example:
+    from backend.jobs.dispatcher import RenderDispatcher
+
+    dispatcher = RenderDispatcher(app, workers=4)
+    dispatcher.start()
+    dispatcher.wake()
+"""
+
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Optional
+
+from flask import Flask
+
+from .queue import claim_job, fail_job, next_queued_job_ids, requeue_stale_jobs
+from .worker import initialize_worker, run_render_job
+
+DEFAULT_POLL_INTERVAL = 1.0
+DEFAULT_STALE_TIMEOUT = 10 * 60
+
+
+class RenderDispatcher(threading.Thread):
+    """A daemon thread dispatching queued render jobs to worker processes.
+
+    Attributes:
+        app (Flask): The application whose context is pushed while reading the queue.
+        workers (int): The number of worker processes, and of jobs rendered at once.
+        poll_interval (float): Seconds between two scans of the queue.
+        stale_timeout (float): Running jobs without a heartbeat for this long are requeued.
+    """
+
+    def __init__(
+        self,
+        app: Flask,
+        workers: int,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        stale_timeout: float = DEFAULT_STALE_TIMEOUT,
+    ):
+        super().__init__(name="render-dispatcher", daemon=True)
+        self.app = app
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.stale_timeout = stale_timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._running: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._wake_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._last_stale_scan = 0.0
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                with self.app.app_context():
+                    self.requeue_stale()
+                    self.dispatch()
+            except Exception as e:
+                print(f"Render dispatch error: {e}")
+            self._wake_event.wait(self.poll_interval)
+            self._wake_event.clear()
+
+    def stop(self) -> None:
+        """Ask the thread to exit and shut the worker processes down."""
+        self._stop_event.set()
+        self._wake_event.set()
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def wake(self) -> None:
+        """Scan the queue now, typically because a job was just submitted."""
+        self._wake_event.set()
+
+    def executor(self) -> ProcessPoolExecutor:
+        """Return the worker pool, creating it on first use or after a worker crashed."""
+        with self._lock:
+            if self._executor is None:
+                # Spawned rather than forked: this process runs request, session and dispatch
+                # threads, and a child forked while one of them holds a lock can deadlock.
+                # Workers build their own application in `initialize_worker`.
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=initialize_worker,
+                )
+            return self._executor
+
+    def requeue_stale(self) -> int:
+        """Requeue stale jobs, at most once every half timeout."""
+        now = time.monotonic()
+        if now - self._last_stale_scan < self.stale_timeout / 2:
+            return 0
+        self._last_stale_scan = now
+        requeued = requeue_stale_jobs(self.stale_timeout)
+        if requeued:
+            print(f"Requeued {requeued} stale render jobs")
+        return requeued
+
+    def dispatch(self) -> int:
+        """Claim queued jobs up to the number of idle workers and submit them.
+
+        Returns:
+            int: The number of jobs submitted.
+        """
+        with self._lock:
+            idle = self.workers - len(self._running)
+        submitted = 0
+        for job_id in next_queued_job_ids(limit=idle):
+            claim = claim_job(job_id)
+            if claim is None:
+                continue
+            try:
+                future = self.executor().submit(run_render_job, job_id, claim)
+            except RuntimeError as e:
+                # A broken or shut down pool; the next scan starts a fresh one
+                self._drop_executor()
+                fail_job(job_id, f"Render worker failed: {e}", claim)
+                continue
+            with self._lock:
+                self._running[job_id] = future
+            future.add_done_callback(
+                lambda done, job_id=job_id, claim=claim: self._finished(job_id, claim, done)
+            )
+            submitted += 1
+        return submitted
+
+    def _finished(self, job_id: str, claim: str, future: Future) -> None:
+        with self._lock:
+            self._running.pop(job_id, None)
+        error = None if future.cancelled() else future.exception()
+        if error is not None:
+            # The worker process died, so the job could not record its own failure
+            print(f"Render worker failed on job {job_id}: {error}")
+            self._drop_executor()
+            with self.app.app_context():
+                fail_job(job_id, f"Render worker failed: {error}", claim)
+        self.wake()
+
+    def _drop_executor(self) -> None:
+        with self._lock:
+            self._executor = None
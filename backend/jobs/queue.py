@@ -0,0 +1,264 @@
+"""Render Job Queue Module
+
+This module implements the job queue on top of the `RenderJob` table. Submitting a job inserts a
+queued row; workers claim rows with a conditional update that only succeeds for one claimant, so
+several API processes can share the queue without an external broker. Every state change is a
+short transaction, which keeps SQLite write locks brief.
+
+Key Features:
+- Submits render jobs and lists the oldest queued jobs, reusing an identical queued render.
+- Claims a job atomically, moving it from "queued" to "running" under a new claim ID.
+- Runs at most one render per output at a time, since renders of the same output share their
+  incremental state.
+- Records heartbeats, progress, results and errors, only for the claim that is running the job,
+  so a worker whose job was requeued cannot overwrite the outcome of the next run.
+- Records renders answered from the render output cache as complete jobs.
+- Requeues running jobs whose worker stopped sending heartbeats.
+
+Example:
+    from backend.jobs.queue import claim_job, next_queued_job_ids, submit_render_job
+
+    job = submit_render_job(project.id, sub, output_key)
+    for job_id in next_queued_job_ids(limit=4):
+        claim = claim_job(job_id)
+        if claim is not None:
+            ...
+"""
+
+import time
+import uuid
+from typing import List, Optional
+
+from sqlalchemy import Exists, exists
+from sqlalchemy.orm import Query, aliased
+
+from backend.models import RenderJob
+from backend.models.database import db, transactional
+from backend.models.render_job import (
+    JOB_COMPLETE,
+    JOB_FAILED,
+    JOB_QUEUED,
+    JOB_RENDER,
+    JOB_RUNNING,
+)
+
+
+@transactional
+def submit_render_job(
+    project_id: str,
+    sub: str,
+    output_key: Optional[str],
+    options: Optional[dict] = None,
+    kind: str = JOB_RENDER,
+) -> RenderJob:
+    """Queue a render or a tracking pass of a project.
+
+    A render identical to one that is still queued returns the queued job instead, since the
+    annotations are only read when a job starts.
+
+    Args:
+        project_id (str): The project to process.
+        sub (str): The sub of the user submitting the job.
+        output_key (str): The storage key the rendered video is written to, None for tracking.
+        options (dict, optional): Options passed to `render_project` or `track_placements`.
+        kind (str, optional): Either "render" or "track". Defaults to "render".
+
+    Returns:
+        RenderJob: The queued job.
+    """
+    options = dict(options or {})
+    state_key = output_key if kind == JOB_RENDER else None
+    if state_key is not None:
+        queued = RenderJob.query.filter_by(
+            project_id=project_id, kind=kind, status=JOB_QUEUED, state_key=state_key
+        ).all()
+        for job in queued:
+            if job.options == options:
+                return job
+    job = RenderJob(
+        project_id=project_id,
+        sub=sub,
+        kind=kind,
+        output_key=output_key,
+        state_key=state_key,
+        options=options,
+    )
+    db.session.add(job)
+    return job
+
+
+@transactional
+def record_cached_job(project_id: str, sub: str, output_key: str, stats: dict) -> RenderJob:
+    """Record a render answered from the render output cache as an already complete job.
+
+    Args:
+        project_id (str): The project that was rendered.
+        sub (str): The sub of the user submitting the render.
+        output_key (str): The storage key of the cached video.
+        stats (dict): The statistics of the job.
+
+    Returns:
+        RenderJob: The complete job.
+    """
+    now = time.time()
+    job = RenderJob(
+        project_id=project_id,
+        sub=sub,
+        kind=JOB_RENDER,
+        status=JOB_COMPLETE,
+        output_key=output_key,
+        options={},
+        stats=stats,
+        started_at=now,
+        finished_at=now,
+    )
+    db.session.add(job)
+    return job
+
+
+def _output_busy() -> Exists:
+    # True for jobs whose output is being rendered by another job
+    running = aliased(RenderJob)
+    return exists().where(
+        running.state_key == RenderJob.state_key,
+        running.status == JOB_RUNNING,
+        running.id != RenderJob.id,
+    )
+
+
+def next_queued_job_ids(limit: int) -> List[str]:
+    """Return the IDs of up to `limit` queued jobs that can start now, oldest first."""
+    if limit <= 0:
+        return []
+    rows = (
+        db.session.query(RenderJob.id)
+        .filter(RenderJob.status == JOB_QUEUED, ~_output_busy())
+        .order_by(RenderJob.created_at)
+        .limit(limit)
+        .all()
+    )
+    return [row.id for row in rows]
+
+
+@transactional
+def claim_job(job_id: str) -> Optional[str]:
+    """Move a queued job to "running" under a new claim.
+
+    A render is not claimed while another job renders the same output, so their segment
+    cleanups and manifests never interleave.
+
+    Returns:
+        str: The claim ID the worker passes to every later update of the job, or None if
+        another worker claimed it first or its output is being rendered.
+    """
+    now = time.time()
+    claim = str(uuid.uuid4())
+    claimed = (
+        db.session.query(RenderJob)
+        .filter(RenderJob.id == job_id, RenderJob.status == JOB_QUEUED, ~_output_busy())
+        .update(
+            {"status": JOB_RUNNING, "started_at": now, "heartbeat_at": now, "claim_id": claim},
+            synchronize_session=False,
+        )
+    )
+    return claim if claimed == 1 else None
+
+
+def _claimed_job(job_id: str, claim: str) -> Query:
+    return db.session.query(RenderJob).filter_by(id=job_id, status=JOB_RUNNING, claim_id=claim)
+
+
+@transactional
+def send_heartbeat(job_id: str, claim: str) -> bool:
+    """Record that the worker holding the claim is still running the job.
+
+    Returns:
+        bool: False if the job is no longer running under this claim.
+    """
+    updated = _claimed_job(job_id, claim).update(
+        {"heartbeat_at": time.time()}, synchronize_session=False
+    )
+    return updated == 1
+
+
+@transactional
+def report_progress(job_id: str, claim: str, frames_done: int, frames_total: int) -> None:
+    """Record the progress of a running job, which also serves as its heartbeat."""
+    _claimed_job(job_id, claim).update(
+        {
+            "frames_done": frames_done,
+            "frames_total": frames_total,
+            "heartbeat_at": time.time(),
+        },
+        synchronize_session=False,
+    )
+
+
+@transactional
+def assign_output_key(job_id: str, claim: str, output_key: str) -> None:
+    """Record the storage key a running render is written to, once the worker picked it."""
+    _claimed_job(job_id, claim).update({"output_key": output_key}, synchronize_session=False)
+
+
+@transactional
+def complete_job(job_id: str, claim: str, stats: dict) -> bool:
+    """Mark a job running under the claim as complete and store its statistics.
+
+    Returns:
+        bool: False if the job is no longer running under this claim, and was left unchanged.
+    """
+    changes = {"status": JOB_COMPLETE, "stats": stats, "finished_at": time.time()}
+    if "frames" in stats:
+        changes["frames_done"] = stats["frames"]
+    return _claimed_job(job_id, claim).update(changes, synchronize_session=False) == 1
+
+
+@transactional
+def fail_job(job_id: str, error: str, claim: Optional[str] = None) -> bool:
+    """Mark a job as failed with an error message.
+
+    Args:
+        job_id (str): The job to fail.
+        error (str): The error message.
+        claim (str, optional): Only fail the job while it runs under this claim. Defaults to
+        None, which fails it whether it is queued or running.
+
+    Returns:
+        bool: Whether the job was failed.
+    """
+    changes = {"status": JOB_FAILED, "error": error, "finished_at": time.time()}
+    if claim is not None:
+        return _claimed_job(job_id, claim).update(changes, synchronize_session=False) == 1
+    failed = (
+        db.session.query(RenderJob)
+        .filter(RenderJob.id == job_id, RenderJob.status.in_((JOB_QUEUED, JOB_RUNNING)))
+        .update(changes, synchronize_session=False)
+    )
+    return failed == 1
+
+
+@transactional
+def requeue_stale_jobs(timeout: float) -> int:
+    """Requeue running jobs whose last heartbeat is older than `timeout` seconds.
+
+    This recovers jobs whose worker process died, for example when the server restarted in the
+    middle of a render. Workers send heartbeats for as long as they run a job, so a job is only
+    requeued once its worker is gone.
+
+    Returns:
+        int: The number of jobs requeued.
+    """
+    return (
+        db.session.query(RenderJob)
+        .filter(RenderJob.status == JOB_RUNNING, RenderJob.heartbeat_at < time.time() - timeout)
+        .update(
+            {
+                "status": JOB_QUEUED,
+                "frames_done": 0,
+                "started_at": None,
+                "heartbeat_at": None,
+                "claim_id": None,
+            },
+            synchronize_session=False,
+        )
+    )
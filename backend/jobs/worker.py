@@ -0,0 +1,284 @@
+"""Render Worker Module
+
+This module holds the code that runs inside the render worker processes. Each worker process
+creates its own application and database engine once, then renders the jobs it is handed by the
+dispatcher and reports their progress directly to the `RenderJob` table.
+
+Key Features:
+- Initializes a Flask application and database connection per worker process.
+- Renders a claimed job and records its statistics or its error.
+- Renders every creative variant of a batch job in a single decode pass.
+- Answers renders from the render output cache, and caches the renders it produces.
+- Tracks user keyframes through the video and replaces the project's derived annotations.
+- Probes uploads once, storing their metadata and keyframe index, and generates their proxy
+  video and thumbnail sprite sheet.
+- Throttles progress reports so a fast render does not flood the database with writes.
+- Sends heartbeats from a background thread for as long as a job runs, including steps that
+  report no progress such as probing, downloading, concatenating and uploading.
+- Records the outcome of a job only while it still runs under the worker's claim.
+
+Example:
+    from backend.jobs.worker import initialize_worker, run_render_job
+
+    initialize_worker()
+    run_render_job(job_id, claim)
+"""
+
+import threading
+import time
+import traceback
+from typing import Optional
+
+from flask import Flask
+
+from backend.application import create_app
+from backend.models import Annotation, Project, RenderJob, initialize_db
+from backend.models.database import db
+from backend.models.render_job import JOB_BATCH, JOB_MEDIA, JOB_RENDER, JOB_TRACK
+from backend.render import (
+    RenderError,
+    cache_settings,
+    cached_output_key,
+    lookup_render,
+    placements_from_annotations,
+    prepare_media,
+    probe_media,
+    record_render,
+    render_batch,
+    render_cache_key,
+    render_project,
+    save_derived_annotations,
+    save_video_metadata,
+    track_placements,
+    variant_output_key,
+)
+from backend.render.tracking import DEFAULT_STRIDE
+from backend.storage import blob_key, get_storage_backend
+from backend.utils import get_settings
+
+from .queue import assign_output_key, complete_job, fail_job, report_progress, send_heartbeat
+
+PROGRESS_INTERVAL = 1.0
+# Heartbeats sent within the stale timeout, so a late one never gets a live job requeued
+HEARTBEATS_PER_TIMEOUT = 4
+
+_worker_app: Optional[Flask] = None
+
+
+def initialize_worker() -> None:
+    """Create the application and database engine of the current worker process."""
+    global _worker_app
+    _worker_app = create_app()
+    initialize_db(_worker_app)
+
+
+class ProgressReporter:
+    """A render progress callback writing at most one heartbeat per interval.
+
+    Attributes:
+        job_id (str): The job whose progress is reported.
+        claim (str): The claim the job is running under.
+        interval (float): The minimum number of seconds between two writes.
+    """
+
+    def __init__(self, job_id: str, claim: str, interval: float = PROGRESS_INTERVAL):
+        self.job_id = job_id
+        self.claim = claim
+        self.interval = interval
+        self._last_report = 0.0
+
+    def __call__(self, frames_done: int, frames_total: int) -> None:
+        now = time.monotonic()
+        if now - self._last_report < self.interval:
+            return
+        self._last_report = now
+        report_progress(self.job_id, self.claim, frames_done, frames_total)
+
+
+class JobHeartbeat(threading.Thread):
+    """A daemon thread sending the heartbeats of a job for as long as its worker runs it.
+
+    Progress reports alone do not keep a job alive, since several steps report none.
+
+    Attributes:
+        app (Flask): The application whose context is pushed while writing heartbeats.
+        job_id (str): The job that is running.
+        claim (str): The claim the job is running under.
+        interval (float): Seconds between two heartbeats.
+    """
+
+    def __init__(self, app: Flask, job_id: str, claim: str, interval: float):
+        super().__init__(name=f"heartbeat-{job_id}", daemon=True)
+        self.app = app
+        self.job_id = job_id
+        self.claim = claim
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                with self.app.app_context():
+                    if not send_heartbeat(self.job_id, self.claim):
+                        # The job finished or was taken from this worker
+                        return
+            except Exception as e:
+                print(f"Heartbeat error on job {self.job_id}: {e}")
+
+    def stop(self) -> None:
+        """Stop sending heartbeats and wait for the thread to exit."""
+        self._stop_event.set()
+        self.join()
+
+
+def run_render_job(job_id: str, claim: str) -> None:
+    """Run a claimed job and record its outcome.
+
+    Errors are recorded on the job instead of being raised, so the dispatcher only sees an
+    exception when the worker process itself fails. Heartbeats are sent for the whole run, and
+    nothing is recorded once the job no longer runs under the claim.
+
+    Args:
+        job_id (str): The ID of a job in the "running" state.
+        claim (str): The claim ID returned by `claim_job`.
+    """
+    if _worker_app is None:
+        initialize_worker()
+
+    interval = get_settings().render_stale_timeout / HEARTBEATS_PER_TIMEOUT
+    heartbeat = JobHeartbeat(_worker_app, job_id, claim, interval)
+    heartbeat.start()
+    try:
+        with _worker_app.app_context():
+            _run_claimed_job(job_id, claim)
+    finally:
+        heartbeat.stop()
+
+
+def _run_claimed_job(job_id: str, claim: str) -> None:
+    job = RenderJob.query.filter_by(id=job_id, claim_id=claim).first()
+    if job is None:
+        return
+    project = Project.query.filter_by(id=job.project_id).first()
+    if project is None or not project.file_path:
+        fail_job(job_id, "Project not found", claim)
+        return
+
+    runner = JOB_RUNNERS.get(job.kind)
+    if runner is None:
+        fail_job(job_id, f"Unknown job kind: {job.kind}", claim)
+        return
+    try:
+        stats = runner(job, project)
+    except (RenderError, ValueError) as e:
+        fail_job(job_id, str(e), claim)
+        return
+    except Exception as e:
+        traceback.print_exc()
+        fail_job(job_id, f"Unexpected {job.kind} error: {e}", claim)
+        return
+    if not complete_job(job_id, claim, stats):
+        print(f"Job {job_id} was taken from this worker; dropping its result")
+
+
+def _project_annotations(project: Project, user_drawn_only: bool = False) -> list:
+    query = Annotation.query.filter_by(project_id=project.id)
+    if user_drawn_only:
+        query = query.filter_by(is_derived=False)
+    return query.order_by(Annotation.timestamp).all()
+
+
+def _run_render(job: RenderJob, project: Project) -> dict:
+    job_id, claim, source_key = job.id, job.claim_id, project.file_path
+    state_key = job.state_key or job.output_key
+    options = dict(job.options or {})
+    annotations = _project_annotations(project)
+    # End the read transaction before rendering, so a long render does not hold a SQLite
+    # lock; the loaded annotations stay usable once detached
+    db.session.close()
+
+    # Renders are cached by content; the job's own key then only locates incremental state
+    max_cache_bytes = get_settings().render_cache_max_bytes
+    output_key, cache_key = state_key, None
+    if max_cache_bytes > 0:
+        placements = placements_from_annotations(annotations)
+        cache_key = render_cache_key(source_key, placements, cache_settings(options))
+        entry = lookup_render(cache_key)
+        if entry is not None:
+            assign_output_key(job_id, claim, entry.output_key)
+            return {"cached": True, "cache_key": cache_key}
+        output_key = cached_output_key(cache_key, job_id)
+        assign_output_key(job_id, claim, output_key)
+
+    stats = render_project(
+        source_key,
+        annotations,
+        output_key,
+        progress=ProgressReporter(job_id, claim),
+        state_key=state_key,
+        **options,
+    )
+    if cache_key is not None:
+        entry = record_render(cache_key, output_key, max_cache_bytes)
+        if entry.output_key != output_key:
+            # Another job cached the same render first, and this job's copy was dropped
+            assign_output_key(job_id, claim, entry.output_key)
+    return {**stats.to_dict(), "cached": False, "cache_key": cache_key}
+
+
+def _run_batch(job: RenderJob, project: Project) -> dict:
+    job_id, claim, project_id, source_key = job.id, job.claim_id, project.id, project.file_path
+    options = dict(job.options or {})
+    annotations = _project_annotations(project)
+    db.session.close()
+
+    variants = options["variants"]
+    return render_batch(
+        source_key,
+        annotations,
+        variants,
+        {variant["name"]: variant_output_key(project_id, variant["name"]) for variant in variants},
+        progress=ProgressReporter(job_id, claim),
+        interpolation=options.get("interpolation", "linear"),
+    )
+
+
+def _run_tracking(job: RenderJob, project: Project) -> dict:
+    job_id, claim, project_id, source_key = job.id, job.claim_id, project.id, project.file_path
+    stride = int((job.options or {}).get("stride", DEFAULT_STRIDE))
+    placements = placements_from_annotations(_project_annotations(project, user_drawn_only=True))
+    db.session.close()
+
+    with get_storage_backend().local_copy(blob_key(source_key)) as source_path:
+        derived = track_placements(
+            source_path, placements, stride=stride, progress=ProgressReporter(job_id, claim)
+        )
+    save_derived_annotations(project_id, derived)
+    return {"keyframes": len(placements), "derived_annotations": len(derived)}
+
+
+def _run_media(job: RenderJob, project: Project) -> dict:
+    job_id, claim = job.id, job.claim_id
+    source_key = (job.options or {}).get("source_key") or project.file_path
+    db.session.close()
+
+    keyframe_index = probe_media(source_key)
+    save_video_metadata(source_key, keyframe_index)
+    index = prepare_media(source_key, progress=ProgressReporter(job_id, claim, interval=0))
+    return {
+        "source": index["source"],
+        "proxy": index["proxy"],
+        "tiles": len(index["tiles"]),
+        "fps": keyframe_index.fps,
+        "frame_count": keyframe_index.frame_count,
+        "keyframes": len(keyframe_index.frames),
+        "codec": keyframe_index.codec,
+    }
+
+
+JOB_RUNNERS = {
+    JOB_RENDER: _run_render,
+    JOB_BATCH: _run_batch,
+    JOB_TRACK: _run_tracking,
+    JOB_MEDIA: _run_media,
+}
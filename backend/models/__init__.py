@@ -6,7 +6,8 @@ for use throughout the application. This structure promotes modularity and organ
 within the codebase.
 
 Key Features:
-- Imports the `Annotation`, `Project`, and `Video` models for easy access.
+- Imports the `Annotation`, `AuthSession`, `Blob`, `Project`, `RenderCacheEntry`, `RenderJob`,
+  `UploadSession`, and `Video` models for easy access.
 - Provides utility functions for database operations, including model creation and data saving.
 
 Usage:
@@ -25,12 +26,18 @@ Example:
 """
 
 from .annotation import Annotation
+from .auth_session import AuthSession
+from .blob import Blob
 from .database import (
     create_db_models,
     delete_object,
     initialize_db,
     save_object,
     save_objects,
+    upgrade_db_schema,
 )
 from .project import Project
+from .render_cache import RenderCacheEntry
+from .render_job import RenderJob
+from .upload_session import UploadSession
 from .video import Video
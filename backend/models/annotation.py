@@ -9,10 +9,11 @@ Key Features:
 - Establishes relationships with other models, specifically linking annotations to projects.
 
 Model Attributes:
-- project_id (int): A foreign key linking the annotation to a specific project.
+- project_id (str): A foreign key linking the annotation to a specific project.
 - timestamp (float): The timestamp indicating when the annotation was created.
 - points (JSON): A JSON object storing the points associated with the annotation.
 - image_url (str): A URL pointing to the image related to the annotation.
+- is_derived (bool): Whether the annotation was produced by tracking instead of drawn by a user.
 
 Usage:
 This model is intended for use with SQLAlchemy to facilitate interactions with the database. It can 
@@ -41,10 +42,12 @@ class Annotation(db.Model):
     points, and a URL to an associated image.
 
     Attributes:
-        project_id (int): A foreign key linking the annotation to a specific project.
+        project_id (str): A foreign key linking the annotation to a specific project.
         timestamp (float): The timestamp indicating when the annotation was created.
         points (dict): A JSON object storing the points associated with the annotation.
         image_url (str): A URL pointing to the image related to the annotation.
+        is_derived (bool): Whether the annotation was produced by tracking instead of drawn by
+        a user. Derived annotations are replaced whenever the project is tracked again.
 
     Usage:
         This model is intended for use with SQLAlchemy to facilitate interactions with the
@@ -61,8 +64,9 @@ class Annotation(db.Model):
 
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     project_id = db.Column(
-        db.Integer, db.ForeignKey("project.id"), nullable=False, index=True
+        db.String(36), db.ForeignKey("project.id"), nullable=False, index=True
     )
     timestamp = db.Column(db.Float)
     points = db.Column(db.JSON)
     image_url = db.Column(db.String(2048))
+    is_derived = db.Column(db.Boolean, nullable=False, default=False, index=True)
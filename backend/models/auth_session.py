@@ -0,0 +1,69 @@
+"""Authentication Session Model Module
+
+This module defines the `AuthSession` model, which stores server-side login sessions in the
+database. Each row keeps the Cognito tokens and their verified claims behind an opaque session
+ID, so clients only need to send a short session cookie instead of several JWTs.
+
+Key Features:
+- Defines the structure of the `AuthSession` entity in the database.
+- Stores the Cognito tokens together with the claims verified at login or refresh time.
+
+Model Attributes:
+- id (str): The opaque session ID sent to the client.
+- sub (str): The sub of the user owning the session.
+- id_token (str): The Cognito ID token.
+- access_token (str): The Cognito access token.
+- refresh_token (str): The Cognito refresh token.
+- id_claims (JSON): The verified claims of the ID token.
+- access_claims (JSON): The verified claims of the access token.
+- expires_at (float): UNIX time at which the current tokens expire.
+- created_at (float): UNIX time at which the session was created.
+- refresh_failures (int): The number of consecutive failed background refreshes.
+- refresh_after (float): UNIX time before which the session is not refreshed in the background,
+  while another process refreshes it or after a failed refresh.
+
+Usage:
+This model is used by the SQLAlchemy session store and is not meant to be queried directly by
+route handlers.
+
+Example:
+    from backend.models.auth_session import AuthSession
+
+    session = AuthSession(id="opaque-id", sub="user-sub", expires_at=1625256000)
+"""
+
+from .database import db
+
+
+class AuthSession(db.Model):
+    """Represents a server-side authentication session in the database.
+
+    Attributes:
+        id (str): The opaque session ID sent to the client.
+        sub (str): The sub of the user owning the session.
+        id_token (str): The Cognito ID token.
+        access_token (str): The Cognito access token.
+        refresh_token (str): The Cognito refresh token.
+        id_claims (dict): The verified claims of the ID token.
+        access_claims (dict): The verified claims of the access token.
+        expires_at (float): UNIX time at which the current tokens expire.
+        created_at (float): UNIX time at which the session was created.
+        refresh_failures (int): The number of consecutive failed background refreshes.
+        refresh_after (float): UNIX time before which the session is not refreshed in the
+        background.
+
+    Example:
+        >>> session = AuthSession(id="opaque-id", sub="user-sub", expires_at=1625256000)
+    """
+
+    id = db.Column(db.String(64), primary_key=True)
+    sub = db.Column(db.String(255), nullable=False, index=True)
+    id_token = db.Column(db.Text, nullable=False)
+    access_token = db.Column(db.Text, nullable=False)
+    refresh_token = db.Column(db.Text, nullable=False)
+    id_claims = db.Column(db.JSON, nullable=False)
+    access_claims = db.Column(db.JSON)
+    expires_at = db.Column(db.Float, nullable=False, index=True)
+    created_at = db.Column(db.Float, nullable=False)
+    refresh_failures = db.Column(db.Integer, nullable=False, default=0)
+    refresh_after = db.Column(db.Float, nullable=False, default=0.0, index=True)
@@ -0,0 +1,54 @@
+"""Blob Model Module
+
+This module defines the `Blob` model, which tracks content-addressed files in upload storage.
+Each blob is identified by the SHA-256 digest of its content and counts how many project and
+video records reference it, so identical uploads are stored once and removed only when the
+last reference goes away.
+
+Key Features:
+- Defines the structure of the `Blob` entity in the database.
+- Keeps a reference count for every stored file.
+
+Model Attributes:
+- sha256 (str): The hex SHA-256 digest of the content, used as the storage key.
+- size (int): The size of the content in bytes.
+- ref_count (int): The number of `Project.file_path` and `Video.filename` references.
+- created_at (float): UNIX time at which the blob was first stored.
+- deleting_at (float): UNIX time at which the deletion of the unreferenced blob started, or
+  None while it is in use.
+
+Usage:
+This model is managed by `backend.storage.blobs` and should not be modified directly.
+
+Example:
+    from backend.models.blob import Blob
+
+    blob = Blob.query.get("9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08")
+"""
+
+import time
+
+from .database import db
+
+
+class Blob(db.Model):
+    """Represents a content-addressed file in upload storage.
+
+    Attributes:
+        sha256 (str): The hex SHA-256 digest of the content, used as the storage key.
+        size (int): The size of the content in bytes.
+        ref_count (int): The number of `Project.file_path` and `Video.filename` references.
+        created_at (float): UNIX time at which the blob was first stored.
+        deleting_at (float): UNIX time at which the deletion of the unreferenced blob started,
+        or None while it is in use. The row stays as a tombstone until the stored files are
+        gone, so no new reference is added to content that is about to disappear.
+
+    Example:
+        >>> blob = Blob(sha256="9f86d0...", size=1048576, ref_count=1)
+    """
+
+    sha256 = db.Column(db.String(64), primary_key=True)
+    size = db.Column(db.BigInteger, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.Float, nullable=False, default=time.time)
+    deleting_at = db.Column(db.Float)
@@ -6,12 +6,14 @@ for creating models, saving objects, and configuring the database connection.
 
 Key Features:
 - Initializes the database with the specified configuration.
-- Creates all database models defined in the application.
+- Creates all database models defined in the application, and adds the columns and indexes
+  that models gained since their tables were created.
 - Provides functions to save single or multiple model objects to the database.
 
 Functions:
 - initialize_db(app: Flask) -> None: Configures the database connection for the Flask application.
 - create_db_models() -> None: Creates all database tables based on the defined models.
+- upgrade_db_schema() -> None: Adds the missing columns and indexes of existing tables.
 - save_object(model_object: db.Model) -> None: Saves a single model object to the database.
 - save_objects(object_list: List[db.Model]) -> None: Saves a list of model objects to the database 
 in bulk.
@@ -41,8 +43,10 @@ from typing import List
 
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import Column, Table, inspect, literal, text
+from sqlalchemy.engine import Dialect
 
-from backend.utils import get_environment_variable
+from backend.utils import get_settings
 
 db = SQLAlchemy()
 
@@ -51,7 +55,7 @@ def initialize_db(app: Flask) -> None:
     """Initialize the database for the given Flask application.
 
     This function configures the database connection for the Flask application using
-    the SQLAlchemy database URI retrieved from the environment variables. It sets up
+    the SQLAlchemy database URI from the application settings. It sets up
     the necessary configurations to enable database interactions within the application.
 
     Args:
@@ -67,9 +71,7 @@ def initialize_db(app: Flask) -> None:
     """
 
     print("Initialising the database")
-    app.config["SQLALCHEMY_DATABASE_URI"] = get_environment_variable(
-        "SQLALCHEMY_DATABASE_URI"
-    )
+    app.config["SQLALCHEMY_DATABASE_URI"] = get_settings().database_uri
     db.init_app(app)
 
 
@@ -88,6 +90,55 @@ def create_db_models() -> None:
     """
 
     db.create_all()
+    upgrade_db_schema()
+
+
+def upgrade_db_schema() -> None:
+    """Add the columns and indexes that the models gained to tables created before them.
+
+    `db.create_all` only creates missing tables, so a database created by an earlier version
+    keeps its old columns. Each missing column is added with `ALTER TABLE ... ADD COLUMN`, filled
+    with its scalar default on existing rows, and each missing index is created. Running it on an
+    up-to-date database does nothing. Changed column types and removed constraints are not
+    migrated.
+
+    Returns:
+        None: This function does not return a value.
+
+    Example:
+        >>> upgrade_db_schema()
+    """
+
+    inspector = inspect(db.engine)
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    print(f"Adding column {table.name}.{column.name}")
+                    connection.execute(text(_add_column_ddl(table, column, connection.dialect)))
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+
+
+def _add_column_ddl(table: Table, column: Column, dialect: Dialect) -> str:
+    preparer = dialect.identifier_preparer
+    ddl = (
+        f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN "
+        f"{preparer.format_column(column)} {column.type.compile(dialect=dialect)}"
+    )
+    default = column.default
+    if default is not None and default.is_scalar and default.arg is not None:
+        value = literal(default.arg, column.type).compile(
+            dialect=dialect, compile_kwargs={"literal_binds": True}
+        )
+        # Existing rows take the default, so a required column can still be added
+        ddl += f" DEFAULT {value}"
+        if not column.nullable:
+            ddl += " NOT NULL"
+    return ddl
 
 
 def transactional(f):
@@ -12,6 +12,7 @@ Model Attributes:
 - sub (str): The sub of user associated with the project.
 - title (str): The title of the project, defaulting to "Untitled Project".
 - description (str): A textual description of the project.
+- file_path (str): The storage key of the project's source file, the SHA-256 digest of its content.
 
 Usage:
 This model is intended for use with SQLAlchemy to facilitate interactions with the database. It can 
@@ -43,6 +44,8 @@ class Project(db.Model):
         sub (str): The sub of the user associated with the project.
         title (str): The title of the project, defaulting to "Untitled Project".
         description (str): A textual description of the project.
+        file_path (str): The storage key of the project's source file, the SHA-256 digest of its
+        content.
 
     Usage:
         This model is intended for use with SQLAlchemy to facilitate interactions with the
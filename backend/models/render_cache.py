@@ -0,0 +1,55 @@
+"""Render Cache Model Module
+
+This module defines the `RenderCacheEntry` model, which indexes the finished renders kept by the
+content-addressed render output cache. Each entry is identified by a hash of everything the
+render depends on, so a render request matching an entry is answered with the stored output
+instead of being rendered again. Entries record their size and last use, so the cache can evict
+the least recently used outputs when it grows over its budget.
+
+Key Features:
+- Defines the structure of the `RenderCacheEntry` entity in the database.
+- Records the size, hit count and last use of every cached render.
+
+Model Attributes:
+- key (str): The hex SHA-256 digest of the render inputs.
+- output_key (str): The storage key of the rendered video.
+- size (int): The size of the rendered video in bytes.
+- hits (int): The number of requests answered from this entry.
+- created_at (float): UNIX time at which the render was cached.
+- last_used_at (float): UNIX time at which the entry was last stored or hit.
+
+Usage:
+This model is managed by `backend.render.output_cache` and should not be modified directly.
+
+Example:
+    from backend.models.render_cache import RenderCacheEntry
+
+    entry = RenderCacheEntry.query.get(key)
+"""
+
+import time
+
+from .database import db
+
+
+class RenderCacheEntry(db.Model):
+    """Represents a finished render kept by the render output cache.
+
+    Attributes:
+        key (str): The hex SHA-256 digest of the render inputs.
+        output_key (str): The storage key of the rendered video.
+        size (int): The size of the rendered video in bytes.
+        hits (int): The number of requests answered from this entry.
+        created_at (float): UNIX time at which the render was cached.
+        last_used_at (float): UNIX time at which the entry was last stored or hit.
+
+    Example:
+        >>> entry = RenderCacheEntry(key="9f86d0...", output_key="renders/cache/9f/9f86d0....mp4")
+    """
+
+    key = db.Column(db.String(64), primary_key=True)
+    output_key = db.Column(db.String(255), nullable=False)
+    size = db.Column(db.BigInteger, nullable=False, default=0)
+    hits = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.Float, nullable=False, default=time.time)
+    last_used_at = db.Column(db.Float, nullable=False, default=time.time, index=True)
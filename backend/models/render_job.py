@@ -0,0 +1,148 @@
+"""Render Job Model Module
+
+This module defines the `RenderJob` model, which tracks a background render of a project's
+annotations or of several creative variants of them, a tracking pass deriving annotations from
+them, or the generation of the proxy and sprite sheet of an upload. The table doubles as the job
+queue: queued rows are claimed by the render workers with a conditional update, so the queue
+needs nothing beyond the application database and works on a single box with SQLite.
+
+Key Features:
+- Defines the structure of the `RenderJob` entity in the database.
+- Records the status, progress, error and statistics of a render.
+- Estimates the remaining time of a running render from its progress.
+
+Model Attributes:
+- id (str): The unique identifier of the job.
+- project_id (str): A foreign key linking the job to a specific project.
+- sub (str): The sub of the user who submitted the job.
+- kind (str): One of "render", "batch", "track" or "media".
+- status (str): One of "queued", "running", "complete" or "failed".
+- options (dict): Job options, such as the interpolation method of a render.
+- output_key (str): The storage key the rendered video is written to, None for other kinds.
+- state_key (str): The storage key locating the incremental render state of the output.
+- frames_done (int): The number of frames rendered so far.
+- frames_total (int): The number of frames to render, zero if unknown.
+- error (str): The error message of a failed job.
+- stats (dict): The render statistics of a complete job.
+- created_at (float): UNIX time at which the job was submitted.
+- started_at (float): UNIX time at which a worker claimed the job.
+- finished_at (float): UNIX time at which the job completed or failed.
+- heartbeat_at (float): UNIX time of the last heartbeat of a running job.
+- claim_id (str): The claim of the worker running the job, renewed whenever it is claimed.
+
+Usage:
+This model is managed by `backend.jobs` and should not be modified directly.
+
+Example:
+    from backend.models.render_job import RenderJob
+
+    job = RenderJob.query.get(job_id)
+    print(job.status, job.progress, job.eta)
+"""
+
+import time
+import uuid
+from typing import Optional
+
+from .database import db
+
+JOB_RENDER = "render"
+JOB_BATCH = "batch"
+JOB_TRACK = "track"
+JOB_MEDIA = "media"
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETE = "complete"
+JOB_FAILED = "failed"
+
+
+class RenderJob(db.Model):
+    """Represents a background render job in the database.
+
+    Attributes:
+        id (str): The unique identifier of the job.
+        project_id (str): A foreign key linking the job to a specific project.
+        sub (str): The sub of the user who submitted the job.
+        kind (str): One of "render", "batch", "track" or "media".
+        status (str): One of "queued", "running", "complete" or "failed".
+        options (dict): Job options, such as the interpolation method of a render.
+        output_key (str): The storage key the rendered video is written to, None for other
+        kinds.
+        state_key (str): The storage key locating the manifest and segments shared by every
+        render of the same output, None for other kinds. At most one job per state key runs at
+        a time.
+        frames_done (int): The number of frames rendered so far.
+        frames_total (int): The number of frames to render, zero if unknown.
+        error (str): The error message of a failed job.
+        stats (dict): The render statistics of a complete job.
+        created_at (float): UNIX time at which the job was submitted.
+        started_at (float): UNIX time at which a worker claimed the job.
+        finished_at (float): UNIX time at which the job completed or failed.
+        heartbeat_at (float): UNIX time of the last heartbeat of a running job.
+        claim_id (str): The claim of the worker running the job. A requeued job is claimed
+        again with a new ID, so the worker it was taken from can no longer update it.
+
+    Example:
+        >>> job = RenderJob(project_id="1234", sub="user-sub", output_key="renders/1234.mp4")
+    """
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    project_id = db.Column(
+        db.String(36), db.ForeignKey("project.id"), nullable=False, index=True
+    )
+    sub = db.Column(db.String(255), nullable=False, index=True)
+    kind = db.Column(db.String(16), nullable=False, default=JOB_RENDER)
+    status = db.Column(db.String(16), nullable=False, default=JOB_QUEUED, index=True)
+    options = db.Column(db.JSON, nullable=False, default=dict)
+    output_key = db.Column(db.String(255))
+    state_key = db.Column(db.String(255), index=True)
+    frames_done = db.Column(db.Integer, nullable=False, default=0)
+    frames_total = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+    stats = db.Column(db.JSON)
+    created_at = db.Column(db.Float, nullable=False, default=time.time, index=True)
+    started_at = db.Column(db.Float)
+    finished_at = db.Column(db.Float)
+    heartbeat_at = db.Column(db.Float)
+    claim_id = db.Column(db.String(36))
+
+    @property
+    def progress(self) -> float:
+        """Return the fraction of frames rendered, between 0 and 1."""
+        if self.status == JOB_COMPLETE:
+            return 1.0
+        if not self.frames_total:
+            return 0.0
+        return min(self.frames_done / self.frames_total, 1.0)
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Return the estimated seconds until the job completes, or None if unknown."""
+        if self.status != JOB_RUNNING or not self.started_at or not self.frames_done:
+            return None
+        if not self.frames_total:
+            return None
+        elapsed = (self.heartbeat_at or time.time()) - self.started_at
+        remaining = max(self.frames_total - self.frames_done, 0)
+        return elapsed / self.frames_done * remaining
+
+    def to_dict(self) -> dict:
+        """Return the job as a JSON-serializable dictionary."""
+        eta = self.eta
+        return {
+            "id": self.id,
+            "project_id": self.project_id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": round(self.progress, 4),
+            "frames_done": self.frames_done,
+            "frames_total": self.frames_total,
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+            "output": self.output_key if self.status == JOB_COMPLETE else None,
+            "error": self.error,
+            "stats": self.stats,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
@@ -0,0 +1,73 @@
+"""Upload Session Model Module
+
+This module defines the `UploadSession` model, which tracks a resumable, chunked video upload.
+A session records how many bytes of the file have been received so far, so an interrupted
+upload can continue from the last acknowledged offset instead of starting over.
+
+Key Features:
+- Defines the structure of the `UploadSession` entity in the database.
+- Tracks the expected size, the current offset and the final SHA-256 digest of an upload.
+
+Model Attributes:
+- id (str): The unique identifier of the upload session.
+- project_id (str): A foreign key linking the upload to a specific project.
+- sub (str): The sub of the user who started the upload.
+- original_filename (str): The filename provided by the client.
+- stored_filename (str): The name under which the file is written in the upload directory.
+- total_size (int): The expected size of the file in bytes.
+- offset (int): The number of bytes received so far.
+- sha256 (str): The hex SHA-256 digest of the file, set once the upload is finalized.
+- status (str): Either "pending" or "complete".
+- video_id (str): The `Video` created when the upload was finalized.
+
+Usage:
+This model is used by the chunked upload routes and storage helpers.
+
+Example:
+    from backend.models.upload_session import UploadSession
+
+    session = UploadSession(project_id="1234", sub="user-sub", total_size=1048576)
+"""
+
+import time
+import uuid
+
+from .database import db
+
+UPLOAD_PENDING = "pending"
+UPLOAD_COMPLETE = "complete"
+
+
+class UploadSession(db.Model):
+    """Represents a resumable, chunked upload in the database.
+
+    Attributes:
+        id (str): The unique identifier of the upload session.
+        project_id (str): A foreign key linking the upload to a specific project.
+        sub (str): The sub of the user who started the upload.
+        original_filename (str): The filename provided by the client.
+        stored_filename (str): The name under which the file is written in the upload directory.
+        total_size (int): The expected size of the file in bytes.
+        offset (int): The number of bytes received so far.
+        sha256 (str): The hex SHA-256 digest of the file, set once the upload is finalized.
+        status (str): Either "pending" or "complete".
+        video_id (str): The `Video` created when the upload was finalized.
+
+    Example:
+        >>> session = UploadSession(project_id="1234", sub="user-sub", total_size=1048576)
+    """
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    project_id = db.Column(
+        db.String(36), db.ForeignKey("project.id"), nullable=False, index=True
+    )
+    sub = db.Column(db.String(255), nullable=False, index=True)
+    original_filename = db.Column(db.String(255))
+    stored_filename = db.Column(db.String(255), nullable=False)
+    total_size = db.Column(db.BigInteger, nullable=False)
+    offset = db.Column(db.BigInteger, nullable=False, default=0)
+    sha256 = db.Column(db.String(64))
+    status = db.Column(db.String(16), nullable=False, default=UPLOAD_PENDING)
+    video_id = db.Column(db.String(36))
+    created_at = db.Column(db.Float, nullable=False, default=time.time)
+    updated_at = db.Column(db.Float, nullable=False, default=time.time, onupdate=time.time)
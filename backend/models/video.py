@@ -9,8 +9,10 @@ Key Features:
 - Establishes relationships with other models, specifically linking videos to projects.
 
 Model Attributes:
-- project_id (int): A foreign key linking the video to a specific project.
-- filename (str): The name of the video file, which must be unique across all videos.
+- project_id (str): A foreign key linking the video to a specific project.
+- filename (str): The storage key of the video file, the SHA-256 digest of its content.
+- width, height, fps, frame_count, duration, codec: Stream metadata probed once after upload,
+  or None until the media job has run.
 
 Table Constraints:
 - UniqueConstraint: Ensures that the combination of `project_id` and `filename` is unique, 
@@ -39,8 +41,15 @@ class Video(db.Model):
     is associated with a project through the project_id attribute.
 
     Attributes:
-        project_id (int): A foreign key linking the video to a specific project.
-        filename (str): The name of the video file, which must be unique across all videos.
+        project_id (str): A foreign key linking the video to a specific project.
+        filename (str): The storage key of the video file, the SHA-256 digest of its content.
+        Several videos may share the same content and therefore the same key.
+        width (int): The frame width in pixels, or None until probed.
+        height (int): The frame height in pixels, or None until probed.
+        fps (float): The average frame rate, or None until probed.
+        frame_count (int): The number of frames, or None until probed.
+        duration (float): The duration in seconds, or None until probed.
+        codec (str): The codec name reported by FFmpeg, or None until probed.
 
     Table Constraints:
         UniqueConstraint: Ensures that the combination of `project_id` and `filename` is unique,
@@ -57,9 +66,15 @@ class Video(db.Model):
 
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     project_id = db.Column(
-        db.Integer, db.ForeignKey("project.id"), nullable=False, index=True
+        db.String(36), db.ForeignKey("project.id"), nullable=False, index=True
     )
-    filename = db.Column(db.String(255), unique=True, nullable=False)
+    filename = db.Column(db.String(255), nullable=False, index=True)
+    width = db.Column(db.Integer)
+    height = db.Column(db.Integer)
+    fps = db.Column(db.Float)
+    frame_count = db.Column(db.Integer)
+    duration = db.Column(db.Float)
+    codec = db.Column(db.String(16))
     __table_args__ = (
         db.UniqueConstraint(
             "project_id", "filename", name="unique_filename_per_project"
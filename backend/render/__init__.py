@@ -0,0 +1,73 @@
+"""Render Package Initialization Module
+
+This module serves as the initialization point for the render package, which replaces
+in-scene placements in project videos with ad creatives.
+
+Key Features:
+- Parses annotation points into quads and homographies.
+- Loads ad creatives as premultiplied BGRA arrays.
+- Caches decoded creatives and their mip pyramids in memory and on disk.
+- Composites creatives into frames with vectorized warping and blending, all placements of a
+  frame in one z-ordered pass.
+- Provides fused warp-and-blend kernels compiled by Numba when installed, or run with NumPy.
+- Interpolates keyframes into per-frame quads and batched homography tables.
+- Streams videos through a render engine that pipelines decode, composite and encode threads
+  over a preallocated frame ring and reports throughput and stage utilization.
+- Renders several creative variants of a project in one decode pass.
+- Offers a draft preset rendering at reduced resolution and frame rate, with nearest sampling
+  and the fastest encoder settings, besides the full-quality final preset.
+- Probes uploads once into stored metadata and a binary keyframe seek index.
+- Composites single-frame previews from cached GOPs decoded through the keyframe index.
+- Generates all-intra proxies and thumbnail sprite sheets for the annotation UI.
+- Tracks sparse user keyframes through the video with Lucas-Kanade optical flow.
+- Splits renders into keyframe-aligned segments rendered on all cores and joined losslessly.
+- Re-renders only the segments whose placements changed since the previous output.
+- Answers identical renders from a content-addressed, size-bounded output cache.
+- Smart renders copy the GOPs without visible placements from the source bitstream.
+
+Example:
+    from backend.render import render_project
+
+    stats = render_project(project.file_path, annotations, f"renders/{project.id}.mp4")
+"""
+
+from .batch import BatchRenderEngine, render_batch, validate_variants, variant_output_key
+from .compositor import composite_creative, composite_layers
+from .creative_cache import CreativeCache, CreativePyramid, get_creative_cache
+from .engine import RenderEngine, RenderError, RenderStats
+from .incremental import render_incremental, segment_bounds
+from .interpolation import (
+    INTERPOLATION_METHODS,
+    PlacementTimeline,
+    TrackTimeline,
+    build_timeline,
+    load_placements,
+)
+from .kernels import KERNEL_BACKENDS, KernelParityError, get_kernel, kernel_parity, numba_available
+from .media import load_media_index, prepare_media, proxy_scale
+from .output_cache import (
+    cache_settings,
+    cached_output_key,
+    lookup_render,
+    record_render,
+    render_cache_key,
+)
+from .pipeline import FramePipeline
+from .placements import (
+    Placement,
+    group_tracks,
+    placements_from_annotations,
+    placements_in_range,
+    z_order_of,
+)
+from .presets import PRESETS, RenderPreset, get_preset
+from .probe import KeyframeIndex, load_keyframe_index, probe_media, save_video_metadata
+from .preview import FrameCache, MediaNotReady, get_frame_cache, render_preview
+from .project import render_project
+from .segments import plan_segments, probe_keyframes, render_segmented
+from .smart import render_smart, smart_supported
+from .tracking import (
+    delete_derived_annotations,
+    save_derived_annotations,
+    track_placements,
+)
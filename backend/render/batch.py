@@ -0,0 +1,313 @@
+"""Batch Render Module
+
+This module renders several creative variants of the same project in one pass over the video,
+for A/B tests or regional versions of a campaign. Each source frame is decoded once, the
+placement timeline is computed once, and every variant is composited from the shared decoded
+frame into its own buffer and written by its own encoder. Variants are composited and encoded on
+a thread pool, since OpenCV releases the GIL while warping and encoding.
+
+Key Features:
+- Maps the creatives of a project per variant, by track or by original creative URL.
+- Computes the per-frame homographies once, for a unit-size creative, and rescales them to each
+  variant's creative with a single matrix product.
+- Reuses one frame buffer per variant for the whole render.
+- Reports combined and per-variant statistics.
+
+Variant semantics:
+A variant is a mapping with a `name` and any of `tracks` (track to creative URL), `creatives`
+(original creative URL to creative URL) and `default` (the creative of every other placement).
+Placements matched by none keep their original creative.
+
+Example:
+    from backend.render.batch import render_batch
+
+    stats = render_batch(
+        project.file_path,
+        annotations,
+        [{"name": "us", "default": "https://cdn/us.png"}, {"name": "fr", "tracks": {"0": fr}}],
+        {"us": "renders/p/us.mp4", "fr": "renders/p/fr.mp4"},
+    )
+"""
+
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+import cv2
+import numpy as np
+
+from backend.storage import blob_key, get_storage_backend
+
+from .compositor import composite_layers
+from .creative_cache import CreativeCache, get_creative_cache
+from .engine import DEFAULT_FOURCC, FALLBACK_FPS, RenderError, RenderStats
+from .interpolation import build_timeline
+from .placements import Placement, placements_from_annotations
+
+MAX_VARIANTS = 32
+VARIANT_NAME_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+def validate_variants(variants) -> List[dict]:
+    """Check the variants of a batch render request.
+
+    Args:
+        variants: The decoded `variants` field of the request.
+
+    Returns:
+        List[dict]: The variants, reduced to their known fields.
+
+    Raises:
+        ValueError: If the variants are malformed, too many, or share a name.
+    """
+    if not isinstance(variants, list) or not variants:
+        raise ValueError("variants must be a non-empty list")
+    if len(variants) > MAX_VARIANTS:
+        raise ValueError(f"At most {MAX_VARIANTS} variants can be rendered at once")
+    checked, names = [], set()
+    for variant in variants:
+        if not isinstance(variant, dict):
+            raise ValueError("Each variant must be an object")
+        name = variant.get("name")
+        if not isinstance(name, str) or not VARIANT_NAME_PATTERN.fullmatch(name):
+            raise ValueError("Variant names must be 1-64 letters, digits, '-' or '_'")
+        if name in names:
+            raise ValueError(f"Duplicate variant name: {name}")
+        names.add(name)
+        for field in ("tracks", "creatives"):
+            mapping = variant.get(field, {})
+            if not isinstance(mapping, dict) or not all(
+                isinstance(key, str) and isinstance(value, str) for key, value in mapping.items()
+            ):
+                raise ValueError(f"{field} of variant {name} must map strings to URLs")
+        default = variant.get("default")
+        if default is not None and not isinstance(default, str):
+            raise ValueError(f"default of variant {name} must be a URL")
+        checked.append(
+            {
+                "name": name,
+                "tracks": variant.get("tracks", {}),
+                "creatives": variant.get("creatives", {}),
+                "default": default,
+            }
+        )
+    return checked
+
+
+def variant_output_key(project_id: str, name: str) -> str:
+    """Return the storage key of a variant's rendered video."""
+    return f"renders/{project_id}/{name}.mp4"
+
+
+def variant_creative(variant: dict, placement_track: str, image_url: str) -> str:
+    """Return the creative URL a variant shows in a placement."""
+    tracks = variant.get("tracks") or {}
+    creatives = variant.get("creatives") or {}
+    if placement_track in tracks:
+        return tracks[placement_track]
+    if image_url in creatives:
+        return creatives[image_url]
+    return variant.get("default") or image_url
+
+
+class BatchRenderEngine:
+    """Composites several creative variants of a video in a single decode pass.
+
+    Attributes:
+        source_path (str): The input video file.
+        output_paths (Dict[str, str]): The output video file of each variant, keyed by name.
+        placements (List[Placement]): The keyframes of the project.
+        variants (List[dict]): The variants, see the module documentation.
+        creative_cache (CreativeCache): The cache creatives are loaded from.
+        fourcc (str): The four-character code of the output codec.
+        interpolation (str): How quads are interpolated between keyframes.
+    """
+
+    def __init__(
+        self,
+        source_path: str,
+        output_paths: Dict[str, str],
+        placements: Iterable[Placement],
+        variants: List[dict],
+        creative_cache: Optional[CreativeCache] = None,
+        fourcc: str = DEFAULT_FOURCC,
+        interpolation: str = "linear",
+    ):
+        self.source_path = source_path
+        self.output_paths = output_paths
+        self.placements = list(placements)
+        self.variants = variants
+        self.creative_cache = creative_cache or get_creative_cache()
+        self.fourcc = fourcc
+        self.interpolation = interpolation
+
+    def render(self, progress: Optional[Callable[[int, int], None]] = None) -> dict:
+        """Render every variant.
+
+        Args:
+            progress (Callable, optional): Called with the number of source frames processed
+            and the frame count of the video.
+
+        Returns:
+            dict: The combined `RenderStats` under "total", where frames count source frames,
+            and the composite seconds of each variant under "variants".
+
+        Raises:
+            RenderError: If the input cannot be read or an output cannot be written.
+        """
+        capture = cv2.VideoCapture(self.source_path)
+        if not capture.isOpened():
+            raise RenderError(f"Unable to open video {self.source_path}")
+        fps = capture.get(cv2.CAP_PROP_FPS) or FALLBACK_FPS
+        width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        total_frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+
+        # Homographies of a unit-size creative, shared by every variant
+        last_keyframe = max((p.timestamp for p in self.placements), default=0.0)
+        timeline = build_timeline(
+            self.placements,
+            max(total_frames, int(last_keyframe * fps) + 1),
+            fps,
+            lambda url: (1, 1),
+            self.interpolation,
+        )
+        tracks = list(timeline.tracks.values())
+        # The creative of every keyframe of every track, per variant
+        creatives = [
+            [
+                [
+                    self.creative_cache.get(variant_creative(variant, track.track, url))
+                    for url in track.image_urls
+                ]
+                for track in tracks
+            ]
+            for variant in self.variants
+        ]
+
+        writers = []
+        for variant in self.variants:
+            writer = cv2.VideoWriter(
+                self.output_paths[variant["name"]],
+                cv2.VideoWriter_fourcc(*self.fourcc),
+                fps,
+                (width, height),
+            )
+            if not writer.isOpened():
+                for opened in writers:
+                    opened.release()
+                capture.release()
+                raise RenderError(f"Unable to open output for variant {variant['name']}")
+            writers.append(writer)
+
+        buffers = [np.empty((height, width, 3), dtype=np.uint8) for _ in self.variants]
+        composite_seconds = [0.0] * len(self.variants)
+
+        def composite_variant(index: int, frame: np.ndarray, row: int, order: List[int]) -> None:
+            started = time.perf_counter()
+            canvas = buffers[index]
+            np.copyto(canvas, frame)
+            layers = []
+            for track_index in order:
+                track = tracks[track_index]
+                pyramid = creatives[index][track_index][track.keyframe_index[row]]
+                scale = np.diag([1.0 / pyramid.width, 1.0 / pyramid.height, 1.0])
+                creative, homography = pyramid.level_for(track.homographies[row] @ scale)
+                layers.append((track.track, creative, homography, track.quads[row]))
+            composite_layers(canvas, layers)
+            composite_seconds[index] += time.perf_counter() - started
+            writers[index].write(canvas)
+
+        stats = RenderStats(width=width, height=height)
+        started = time.perf_counter()
+        frame = None
+        try:
+            with ThreadPoolExecutor(max_workers=len(self.variants)) as pool:
+                while True:
+                    ok, frame = capture.read(frame)
+                    if not ok:
+                        break
+                    row = timeline.row(stats.frames)
+                    # The visible tracks of the frame, bottom layer first
+                    order = [
+                        track_index
+                        for _, _, track_index in sorted(
+                            (track.z_orders[track.keyframe_index[row]], track.track, track_index)
+                            for track_index, track in enumerate(tracks)
+                            if track.visible[row]
+                        )
+                    ]
+                    futures = [
+                        pool.submit(composite_variant, index, frame, row, order)
+                        for index in range(len(self.variants))
+                    ]
+                    # The decoder reuses the frame, so every variant must be done with it
+                    for future in futures:
+                        future.result()
+                    stats.frames += 1
+                    if progress is not None:
+                        progress(stats.frames, total_frames)
+        finally:
+            capture.release()
+            for writer in writers:
+                writer.release()
+
+        stats.seconds = time.perf_counter() - started
+        stats.composite_seconds = sum(composite_seconds)
+        return {
+            "total": stats.to_dict(),
+            "variants": {
+                variant["name"]: {"composite_seconds": round(seconds, 3)}
+                for variant, seconds in zip(self.variants, composite_seconds)
+            },
+        }
+
+
+def render_batch(
+    source_key: str,
+    annotations: Iterable,
+    variants: List[dict],
+    output_keys: Dict[str, str],
+    progress: Optional[Callable[[int, int], None]] = None,
+    interpolation: str = "linear",
+) -> dict:
+    """Render creative variants of a project's video and store the results.
+
+    Args:
+        source_key (str): The blob key of the source video, such as `Project.file_path`.
+        annotations (Iterable[Annotation]): The annotations of the project.
+        variants (List[dict]): The variants to render, see the module documentation.
+        output_keys (Dict[str, str]): The storage key of each variant's output, keyed by name.
+        progress (Callable, optional): Progress callback, see `BatchRenderEngine.render`.
+        interpolation (str, optional): How quads are interpolated between keyframes.
+
+    Returns:
+        dict: The statistics of the batch, with the storage key of every output under "outputs".
+    """
+    placements = placements_from_annotations(annotations)
+    storage = get_storage_backend()
+    output_directory = tempfile.mkdtemp(prefix="batch-")
+    output_paths = {
+        variant["name"]: os.path.join(output_directory, f"{index:03d}.mp4")
+        for index, variant in enumerate(variants)
+    }
+    try:
+        with storage.local_copy(blob_key(source_key)) as source_path:
+            stats = BatchRenderEngine(
+                source_path, output_paths, placements, variants, interpolation=interpolation
+            ).render(progress)
+        for name, path in output_paths.items():
+            storage.put_file(path, output_keys[name], move=True)
+    finally:
+        for path in output_paths.values():
+            if os.path.exists(path):
+                os.remove(path)
+        os.rmdir(output_directory)
+    print(
+        f"Rendered {len(variants)} variants of {stats['total']['frames']} frames in "
+        f"{stats['total']['seconds']:.2f}s"
+    )
+    return {**stats, "outputs": output_keys}
@@ -0,0 +1,154 @@
+"""Compositor Benchmark Module
+
+This module measures the throughput of the compositor on synthetic frames, comparing the
+bounding-box compositor used by renders with a reference that warps and blends the whole frame,
+as the compositor did before, and the fused kernels of `backend.render.kernels`. It needs no
+video, creative or database and is meant to be run by hand when changing the compositor.
+
+Key Features:
+- Times ROI and full-frame compositing at 1080p and 4K.
+- Places a creative covering a chosen fraction of the frame, in perspective.
+- Reports frames per second and the speed-up of the ROI compositor.
+- Times the fused NumPy and Numba kernels, and checks that they agree.
+
+Example:
+    python -m backend.render.benchmark --iterations 100 --coverage 0.05
+    python -m backend.render.benchmark --parity
+"""
+
+import argparse
+import functools
+import time
+from typing import Dict, Tuple
+
+import cv2
+import numpy as np
+
+from .compositor import blend_premultiplied, composite_creative
+from .geometry import creative_homography
+from .kernels import kernel_parity, numba_available
+
+RESOLUTIONS = {"1080p": (1920, 1080), "4k": (3840, 2160)}
+CREATIVE_SIZE = (1024, 512)
+
+
+def composite_full_frame(
+    frame: np.ndarray,
+    creative: np.ndarray,
+    homography: np.ndarray,
+    interpolation: int = cv2.INTER_LINEAR,
+) -> None:
+    """Composite a creative by warping and blending the whole frame, as a reference."""
+    height, width = frame.shape[:2]
+    warped = cv2.warpPerspective(
+        creative,
+        homography,
+        (width, height),
+        flags=interpolation,
+        borderMode=cv2.BORDER_CONSTANT,
+        borderValue=(0, 0, 0, 0),
+    )
+    blend_premultiplied(frame, warped)
+
+
+def synthetic_placement(
+    width: int, height: int, coverage: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return a premultiplied creative and a homography covering part of a frame.
+
+    Args:
+        width (int): The frame width in pixels.
+        height (int): The frame height in pixels.
+        coverage (float): The approximate fraction of the frame covered by the placement.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The (h, w, 4) uint8 creative and its 3x3 homography.
+    """
+    rng = np.random.default_rng(0)
+    creative_width, creative_height = CREATIVE_SIZE
+    creative = rng.integers(0, 256, (creative_height, creative_width, 4), dtype=np.uint8)
+    creative[..., :3] = (creative[..., :3].astype(np.uint16) * creative[..., 3:4] // 255).astype(
+        np.uint8
+    )
+    side = np.sqrt(coverage * width * height)
+    quad_width, quad_height = side * 1.4, side / 1.4
+    left, top = width * 0.3, height * 0.3
+    # A slight perspective, as on a billboard seen from the side
+    quad = np.array(
+        [
+            [left, top],
+            [left + quad_width, top + quad_height * 0.1],
+            [left + quad_width, top + quad_height * 0.9],
+            [left, top + quad_height],
+        ],
+        dtype=np.float32,
+    )
+    return creative, creative_homography(creative_width, creative_height, quad)
+
+
+def benchmark_compositor(
+    iterations: int = 50, coverage: float = 0.05
+) -> Dict[str, Dict[str, float]]:
+    """Time ROI and full-frame compositing at every resolution of `RESOLUTIONS`.
+
+    Args:
+        iterations (int, optional): The number of frames composited per measurement.
+        coverage (float, optional): The fraction of the frame covered by the placement.
+
+    Returns:
+        Dict[str, Dict[str, float]]: The frames per second of each method and the speed-up of
+        the ROI compositor over the full frame, keyed by resolution name. The Numba kernel is
+        timed only when Numba is installed.
+    """
+    results = {}
+    for name, (width, height) in RESOLUTIONS.items():
+        frame = np.full((height, width, 3), 128, dtype=np.uint8)
+        creative, homography = synthetic_placement(width, height, coverage)
+        rates = {}
+        methods = {
+            "roi": composite_creative,
+            "full_frame": composite_full_frame,
+            "numpy": functools.partial(composite_creative, kernel="numpy"),
+        }
+        if numba_available():
+            methods["numba"] = functools.partial(composite_creative, kernel="numba")
+        for method, composite in methods.items():
+            # One untimed pass warms up OpenCV's thread pool, the allocator and Numba's JIT
+            composite(frame, creative, homography)
+            started = time.perf_counter()
+            for _ in range(iterations):
+                composite(frame, creative, homography)
+            rates[method] = iterations / (time.perf_counter() - started)
+        rates["speedup"] = rates["roi"] / rates["full_frame"]
+        results[name] = rates
+    return results
+
+
+def main() -> None:
+    """Run the benchmark from the command line and print its results."""
+    parser = argparse.ArgumentParser(description="Compare ROI and full-frame compositing.")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--coverage", type=float, default=0.05)
+    parser.add_argument("--parity", action="store_true", help="Check the fused kernels agree.")
+    arguments = parser.parse_args()
+
+    if arguments.parity:
+        worst = kernel_parity()
+        compiled = "compiled" if numba_available() else "interpreted"
+        print(f"Fused kernels agree within {worst} levels (loop kernel {compiled})")
+        return
+
+    results = benchmark_compositor(arguments.iterations, arguments.coverage)
+    print(f"{'resolution':<12}{'roi fps':>12}{'full fps':>12}{'speed-up':>12}{'kernels':>24}")
+    for name, rates in results.items():
+        kernels = ", ".join(
+            f"{kernel} {rates[kernel]:.1f}" for kernel in ("numpy", "numba") if kernel in rates
+        )
+        print(
+            f"{name:<12}{rates['roi']:>12.1f}{rates['full_frame']:>12.1f}"
+            f"{rates['speedup']:>11.1f}x{kernels:>24}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""Compositor Module
+
+This module warps ad creatives into their placement quads and blends them over video frames.
+All per-pixel work is done by OpenCV and vectorized NumPy operations on whole arrays; no Python
+code runs per pixel.
+
+Key Features:
+- Warps a premultiplied BGRA creative with a homography, only inside the bounding box of its
+  quad clipped to the frame.
+- Blends the warped creative over a view of that box of the BGR frame, in place, using integer
+  arithmetic; pixels outside every placement are never read or written.
+- Composites any number of placements in one pass per frame, in z-order: placements whose
+  bounding boxes overlap are stacked into one layer over their merged box, which is blended into
+  the frame once.
+- Measures the time spent on each placement.
+- Can run the fused warp-and-blend kernels of `backend.render.kernels` instead of OpenCV.
+
+Example:
+    from backend.render.compositor import composite_creative, composite_layers
+
+    composite_creative(frame, creative, homography)
+    composite_layers(frame, [("billboard", creative, homography, quad)], timings)
+"""
+
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from .kernels import DEFAULT_KERNEL, get_kernel
+
+# (x0, y0, x1, y1) pixel bounds, end exclusive
+Bounds = Tuple[int, int, int, int]
+
+
+def blend_premultiplied(frame: np.ndarray, warped: np.ndarray) -> None:
+    """Blend a premultiplied BGRA layer over a BGR frame of the same size, in place.
+
+    Computes `frame = warped.rgb + frame * (1 - warped.alpha)` with rounding, in uint16.
+
+    Args:
+        frame (np.ndarray): The (H, W, 3) uint8 frame to modify.
+        warped (np.ndarray): The (H, W, 4) uint8 premultiplied layer.
+    """
+    inverse_alpha = 255 - warped[..., 3:4].astype(np.uint16)
+    blended = frame.astype(np.uint16) * inverse_alpha
+    blended += 127
+    blended //= 255
+    blended += warped[..., :3]
+    np.minimum(blended, 255, out=blended)
+    frame[...] = blended
+
+
+def over_premultiplied(below: np.ndarray, above: np.ndarray) -> None:
+    """Stack a premultiplied BGRA layer over another of the same size, in place.
+
+    Computes `below = above + below * (1 - above.alpha)` on all four channels, with rounding.
+
+    Args:
+        below (np.ndarray): The (H, W, 4) uint8 premultiplied layer to modify.
+        above (np.ndarray): The (H, W, 4) uint8 premultiplied layer drawn on top.
+    """
+    inverse_alpha = 255 - above[..., 3:4].astype(np.uint16)
+    stacked = below.astype(np.uint16) * inverse_alpha
+    stacked += 127
+    stacked //= 255
+    stacked += above
+    np.minimum(stacked, 255, out=stacked)
+    below[...] = stacked
+
+
+def warped_quad(creative: np.ndarray, homography: np.ndarray) -> np.ndarray:
+    """Return the (4, 2) frame positions of the corners of a creative warped by a homography."""
+    height, width = creative.shape[:2]
+    corners = np.array([[[0, 0], [width, 0], [width, height], [0, height]]], np.float64)
+    return cv2.perspectiveTransform(corners, homography)[0]
+
+
+def layer_bounds(quad: np.ndarray, width: int, height: int) -> Optional[Bounds]:
+    """Return the pixels a quad can touch, clipped to the frame, or None if it is off-frame.
+
+    The box is padded by one pixel, which bilinear sampling can reach past the corners. A quad
+    with a corner at infinity covers the whole frame.
+    """
+    if not np.isfinite(quad).all():
+        return 0, 0, width, height
+    low = np.floor(quad.min(axis=0)).astype(np.int64) - 1
+    high = np.ceil(quad.max(axis=0)).astype(np.int64) + 2
+    x0, y0 = max(int(low[0]), 0), max(int(low[1]), 0)
+    x1, y1 = min(int(high[0]), width), min(int(high[1]), height)
+    if x0 >= x1 or y0 >= y1:
+        return None
+    return x0, y0, x1, y1
+
+
+def merge_bounds(bounds: Sequence[Optional[Bounds]]) -> List[Tuple[Bounds, List[int]]]:
+    """Merge overlapping boxes until no two boxes overlap.
+
+    Args:
+        bounds (Sequence[Optional[Bounds]]): The box of each layer, None for hidden layers.
+
+    Returns:
+        List[Tuple[Bounds, List[int]]]: Each merged box with the indices of its layers, in
+        increasing order.
+    """
+    groups: List[Tuple[Bounds, List[int]]] = []
+    for index, box in enumerate(bounds):
+        if box is None:
+            continue
+        members = [index]
+        merged = True
+        while merged:
+            merged = False
+            for position, (other, other_members) in enumerate(groups):
+                if (
+                    other[0] < box[2]
+                    and box[0] < other[2]
+                    and other[1] < box[3]
+                    and box[1] < other[3]
+                ):
+                    box = (
+                        min(box[0], other[0]),
+                        min(box[1], other[1]),
+                        max(box[2], other[2]),
+                        max(box[3], other[3]),
+                    )
+                    members = sorted(other_members + members)
+                    del groups[position]
+                    merged = True
+                    break
+        groups.append((box, members))
+    return groups
+
+
+def region_homography(homography: np.ndarray, x0: int, y0: int) -> np.ndarray:
+    """Return a homography moved so that it maps onto a box of the frame starting at x0, y0."""
+    shift = np.array([[1.0, 0.0, -x0], [0.0, 1.0, -y0], [0.0, 0.0, 1.0]])
+    return shift @ homography
+
+
+def warp_region(
+    creative: np.ndarray,
+    homography: np.ndarray,
+    bounds: Bounds,
+    interpolation: int = cv2.INTER_LINEAR,
+) -> np.ndarray:
+    """Warp a creative into a box of the frame only.
+
+    Args:
+        creative (np.ndarray): The (h, w, 4) uint8 premultiplied BGRA creative.
+        homography (np.ndarray): The 3x3 matrix mapping creative pixels to frame pixels.
+        bounds (Bounds): The box of the frame to produce.
+        interpolation (int, optional): The OpenCV sampling flag. Defaults to bilinear.
+
+    Returns:
+        np.ndarray: The (y1 - y0, x1 - x0, 4) uint8 warped creative, transparent outside it.
+    """
+    x0, y0, x1, y1 = bounds
+    # Moving the frame origin to the corner of the box makes the warp produce only the box
+    return cv2.warpPerspective(
+        creative,
+        region_homography(homography, x0, y0),
+        (x1 - x0, y1 - y0),
+        flags=interpolation,
+        borderMode=cv2.BORDER_CONSTANT,
+        borderValue=(0, 0, 0, 0),
+    )
+
+
+def composite_layers(
+    frame: np.ndarray,
+    layers: Sequence[Tuple[str, np.ndarray, np.ndarray, np.ndarray]],
+    timings: Optional[Dict[str, float]] = None,
+    interpolation: int = cv2.INTER_LINEAR,
+    kernel: str = DEFAULT_KERNEL,
+) -> None:
+    """Composite every placement of a frame in place, bottom layer first.
+
+    Each layer is warped only inside the bounding box of its quad. Layers whose boxes overlap
+    are stacked inside their merged box, and each merged box is blended into a view of the frame
+    once, so every frame pixel is read and written at most once however many placements cover
+    it, and pixels outside every box are never touched. Fused kernels instead warp and blend
+    each layer straight into its box of the frame, bottom first, without a stacked layer.
+
+    Args:
+        frame (np.ndarray): The (H, W, 3) uint8 BGR frame to modify.
+        layers (Sequence[Tuple]): The `(name, creative, homography, quad)` of each placement,
+        bottom first, with the creative premultiplied BGRA and the quad in frame pixels.
+        timings (Dict[str, float], optional): Seconds spent on each layer, accumulated by name.
+        interpolation (int, optional): The OpenCV sampling flag. Defaults to bilinear. Fused
+        kernels always sample bilinearly.
+        kernel (str, optional): The compositing backend, one of `KERNEL_BACKENDS`.
+    """
+    height, width = frame.shape[:2]
+    bounds = [layer_bounds(quad, width, height) for _, _, _, quad in layers]
+    warp_blend = get_kernel(kernel)
+    if warp_blend is not None:
+        for (name, creative, homography, _), box in zip(layers, bounds):
+            if box is None:
+                continue
+            started = time.perf_counter()
+            x0, y0, x1, y1 = box
+            warp_blend(frame[y0:y1, x0:x1], creative, region_homography(homography, x0, y0))
+            if timings is not None:
+                timings[name] = timings.get(name, 0.0) + time.perf_counter() - started
+        return
+
+    for (x0, y0, x1, y1), members in merge_bounds(bounds):
+        region = frame[y0:y1, x0:x1]
+        if len(members) == 1:
+            started = time.perf_counter()
+            name, creative, homography, _ = layers[members[0]]
+            blend_premultiplied(
+                region, warp_region(creative, homography, bounds[members[0]], interpolation)
+            )
+            if timings is not None:
+                timings[name] = timings.get(name, 0.0) + time.perf_counter() - started
+            continue
+
+        stacked = np.zeros((y1 - y0, x1 - x0, 4), dtype=np.uint8)
+        for index in members:
+            started = time.perf_counter()
+            name, creative, homography, _ = layers[index]
+            lx0, ly0, lx1, ly1 = bounds[index]
+            over_premultiplied(
+                stacked[ly0 - y0 : ly1 - y0, lx0 - x0 : lx1 - x0],
+                warp_region(creative, homography, bounds[index], interpolation),
+            )
+            if timings is not None:
+                timings[name] = timings.get(name, 0.0) + time.perf_counter() - started
+        blend_premultiplied(region, stacked)
+
+
+def composite_creative(
+    frame: np.ndarray,
+    creative: np.ndarray,
+    homography: np.ndarray,
+    interpolation: int = cv2.INTER_LINEAR,
+    kernel: str = DEFAULT_KERNEL,
+) -> None:
+    """Warp a creative into the frame with the given homography and blend it in place.
+
+    Only the bounding box of the warped creative, clipped to the frame, is warped and blended.
+
+    Args:
+        frame (np.ndarray): The (H, W, 3) uint8 BGR frame to modify.
+        creative (np.ndarray): The (h, w, 4) uint8 premultiplied BGRA creative.
+        homography (np.ndarray): The 3x3 matrix mapping creative pixels to frame pixels.
+        interpolation (int, optional): The OpenCV sampling flag. Defaults to bilinear.
+        kernel (str, optional): The compositing backend, one of `KERNEL_BACKENDS`.
+    """
+    height, width = frame.shape[:2]
+    bounds = layer_bounds(warped_quad(creative, homography), width, height)
+    if bounds is None:
+        return
+    x0, y0, x1, y1 = bounds
+    warp_blend = get_kernel(kernel)
+    if warp_blend is not None:
+        warp_blend(frame[y0:y1, x0:x1], creative, region_homography(homography, x0, y0))
+        return
+    blend_premultiplied(
+        frame[y0:y1, x0:x1], warp_region(creative, homography, bounds, interpolation)
+    )
@@ -0,0 +1,309 @@
+"""Creative Cache Module
+
+This module keeps decoded ad creatives ready for the renderer. Every creative is fetched once,
+decoded to premultiplied BGRA, and expanded into a mip pyramid so a large creative warped into a
+small quad is sampled from a level close to the quad's size instead of aliasing. Pyramids live
+in a bounded in-memory LRU backed by an on-disk cache, so restarts and other worker processes do
+not fetch or decode the same creative again.
+
+Key Features:
+- Keys decoded pyramids by the SHA-256 digest of the creative's bytes, so identical creatives
+  behind different URLs are stored once.
+- Revalidates local files by modification time and size, and remote URLs after a TTL.
+- Picks the pyramid level matching the on-screen size of a placement.
+- Reports hit and miss counters.
+
+Example:
+    from backend.render.creative_cache import get_creative_cache
+
+    pyramid = get_creative_cache().get("file:///tmp/banner.png")
+    image, homography = pyramid.level_for(homography)
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from backend.utils import get_settings
+
+from .creatives import check_creative_url, decode_creative, fetch_creative_bytes
+
+MIN_LEVEL_SIZE = 16
+
+
+class CreativePyramid:
+    """A premultiplied BGRA creative and its successively halved mip levels.
+
+    Attributes:
+        levels (List[np.ndarray]): The (h, w, 4) uint8 levels, full resolution first.
+    """
+
+    def __init__(self, levels: List[np.ndarray]):
+        self.levels = levels
+
+    @classmethod
+    def build(cls, creative: np.ndarray, min_size: int = MIN_LEVEL_SIZE) -> "CreativePyramid":
+        """Build the pyramid of a premultiplied creative.
+
+        Downsampling premultiplied color is exact for alpha, so transparent edges do not darken.
+        """
+        levels = [creative]
+        while min(levels[-1].shape[:2]) >= 2 * min_size:
+            levels.append(cv2.pyrDown(levels[-1]))
+        return cls(levels)
+
+    @property
+    def width(self) -> int:
+        """Return the width of the full-resolution creative."""
+        return self.levels[0].shape[1]
+
+    @property
+    def height(self) -> int:
+        """Return the height of the full-resolution creative."""
+        return self.levels[0].shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        """Return the memory used by all levels."""
+        return sum(level.nbytes for level in self.levels)
+
+    def level_for(self, homography: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the level to warp with a homography, and the homography adjusted to it.
+
+        The level is the smallest one still at least as large as the placement on screen, so
+        warping never minifies by more than a factor of two.
+
+        Args:
+            homography (np.ndarray): The 3x3 matrix mapping full-resolution creative pixels to
+            frame pixels.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The level and the 3x3 matrix mapping its pixels to
+            frame pixels.
+        """
+        if len(self.levels) == 1:
+            return self.levels[0], homography
+        width, height = self.width, self.height
+        corners = np.array([[[0, 0], [width, 0], [width, height], [0, height]]], np.float64)
+        quad = cv2.perspectiveTransform(corners, homography)[0]
+        x, y = quad[:, 0], quad[:, 1]
+        area = 0.5 * abs(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))
+        scale = np.sqrt(area / (width * height))
+        if not np.isfinite(scale) or scale >= 0.5:
+            return self.levels[0], homography
+
+        index = min(int(np.floor(np.log2(1.0 / scale))), len(self.levels) - 1)
+        level = self.levels[index]
+        to_full = np.diag([width / level.shape[1], height / level.shape[0], 1.0])
+        return level, homography @ to_full
+
+
+class CreativeCache:
+    """A two-tier cache of creative pyramids: an in-memory LRU over an on-disk store.
+
+    Attributes:
+        directory (str): The directory of the on-disk cache.
+        max_bytes (int): The memory budget of the in-memory LRU.
+        url_ttl (float): Seconds a remote URL is trusted to keep the same content.
+        fetcher (Callable): Function returning the encoded bytes of a URL.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int,
+        url_ttl: float,
+        fetcher: Callable[[str], bytes] = fetch_creative_bytes,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.url_ttl = url_ttl
+        self.fetcher = fetcher
+        self._pyramids: "OrderedDict[str, CreativePyramid]" = OrderedDict()
+        self._urls: Dict[str, Tuple[str, str, float]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        os.makedirs(os.path.join(directory, "urls"), exist_ok=True)
+        os.makedirs(os.path.join(directory, "pyramids"), exist_ok=True)
+
+    def get(self, url: str) -> CreativePyramid:
+        """Return the pyramid of a creative, fetching and decoding it only if needed.
+
+        Args:
+            url (str): An HTTP(S) URL, a `file://` URL or a local path.
+
+        Returns:
+            CreativePyramid: The decoded creative and its mip levels.
+
+        Raises:
+            ValueError: If the creative cannot be decoded.
+        """
+        digest, data = self._resolve(url)
+        with self._lock:
+            pyramid = self._pyramids.get(digest)
+            if pyramid is not None:
+                self._pyramids.move_to_end(digest)
+                self._counters["memory_hits"] += 1
+                return pyramid
+
+        pyramid = self._load(digest)
+        if pyramid is not None:
+            self._counters["disk_hits"] += 1
+        else:
+            self._counters["misses"] += 1
+            if data is None:
+                data = self.fetcher(url)
+            pyramid = CreativePyramid.build(decode_creative(data))
+            self._save(digest, pyramid)
+        self._remember(digest, pyramid)
+        return pyramid
+
+    def digest(self, url: str) -> str:
+        """Return the SHA-256 digest of a creative's content, fetching it only if needed."""
+        return self._resolve(url)[0]
+
+    def cached_digest(self, url: str) -> Optional[str]:
+        """Return the SHA-256 digest of a creative if it is known without fetching it.
+
+        Args:
+            url (str): The creative URL.
+
+        Returns:
+            str: The digest, or None if the creative was never fetched or must be revalidated.
+
+        Raises:
+            ValueError: If creatives cannot be loaded from the URL.
+        """
+        # Also for remembered URLs, which may have been cached while local files were allowed
+        check_creative_url(url)
+        remembered = self._urls.get(url) or self._read_index(url)
+        if remembered is None:
+            return None
+        digest, remembered_validator, resolved_at = remembered
+        validator = _local_validator(url)
+        if validator is not None and validator == remembered_validator:
+            return digest
+        if validator is None and time.time() - resolved_at < self.url_ttl:
+            return digest
+        return None
+
+    def stats(self) -> dict:
+        """Return the hit counters and the memory used by the in-memory LRU."""
+        with self._lock:
+            return {**self._counters, "entries": len(self._pyramids), "bytes": self._bytes}
+
+    def clear(self) -> None:
+        """Empty the in-memory LRU. The on-disk cache is kept."""
+        with self._lock:
+            self._pyramids.clear()
+            self._urls.clear()
+            self._bytes = 0
+
+    def _resolve(self, url: str) -> Tuple[str, Optional[bytes]]:
+        """Return the content digest of a URL, and its bytes if they had to be fetched."""
+        digest = self.cached_digest(url)
+        if digest is not None:
+            return digest, None
+
+        validator = _local_validator(url)
+        now = time.time()
+        data = self.fetcher(url)
+        digest = hashlib.sha256(data).hexdigest()
+        self._urls[url] = (digest, validator, now)
+        self._write_index(url, digest, validator, now)
+        return digest, data
+
+    def _remember(self, digest: str, pyramid: CreativePyramid) -> None:
+        with self._lock:
+            if digest in self._pyramids:
+                return
+            self._pyramids[digest] = pyramid
+            self._bytes += pyramid.nbytes
+            while self._bytes > self.max_bytes and len(self._pyramids) > 1:
+                _, evicted = self._pyramids.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+    def _index_path(self, url: str) -> str:
+        return os.path.join(
+            self.directory, "urls", hashlib.sha256(url.encode()).hexdigest() + ".json"
+        )
+
+    def _pyramid_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "pyramids", digest + ".npz")
+
+    def _read_index(self, url: str) -> Optional[Tuple[str, str, float]]:
+        try:
+            with open(self._index_path(url)) as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if entry.get("url") != url or not os.path.exists(self._pyramid_path(entry["sha256"])):
+            return None
+        remembered = (entry["sha256"], entry.get("validator"), entry["resolved_at"])
+        self._urls[url] = remembered
+        return remembered
+
+    def _write_index(self, url: str, digest: str, validator: Optional[str], now: float) -> None:
+        entry = {"url": url, "sha256": digest, "validator": validator, "resolved_at": now}
+        _atomic_write(self._index_path(url), json.dumps(entry).encode())
+
+    def _load(self, digest: str) -> Optional[CreativePyramid]:
+        try:
+            with np.load(self._pyramid_path(digest), allow_pickle=False) as archive:
+                return CreativePyramid([archive[f"level{i}"] for i in range(len(archive.files))])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _save(self, digest: str, pyramid: CreativePyramid) -> None:
+        path = self._pyramid_path(digest)
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(file_descriptor, "wb") as file:
+                np.savez(file, **{f"level{i}": level for i, level in enumerate(pyramid.levels)})
+            os.replace(temporary_path, path)
+        except OSError as e:
+            print(f"Unable to cache creative {digest}: {e}")
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+
+
+def _local_validator(url: str) -> Optional[str]:
+    """Return a validator string for a local creative, or None for remote URLs."""
+    parsed = urllib.parse.urlparse(url)
+    if parsed.scheme in ("http", "https"):
+        return None
+    path = urllib.parse.unquote(parsed.path) if parsed.scheme == "file" else url
+    try:
+        status = os.stat(path)
+    except OSError:
+        return None
+    return f"{status.st_mtime_ns}:{status.st_size}"
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(file_descriptor, "wb") as file:
+        file.write(data)
+    os.replace(temporary_path, path)
+
+
+@lru_cache(maxsize=1)
+def get_creative_cache() -> CreativeCache:
+    """Return the process-wide creative cache configured from the settings."""
+    settings = get_settings()
+    return CreativeCache(
+        directory=settings.creative_cache_dir,
+        max_bytes=settings.creative_cache_max_bytes,
+        url_ttl=settings.creative_url_ttl,
+    )
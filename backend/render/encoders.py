@@ -0,0 +1,157 @@
+"""Encoder Module
+
+This module writes rendered frames through an FFmpeg encoder instead of OpenCV's built-in
+writer. Raw BGR frames are piped to an `ffmpeg` process, so the output can use the same codec as
+the source video and be spliced with stream-copied parts of it.
+
+Key Features:
+- Maps source codec names to the FFmpeg encoders able to produce them.
+- Exposes the `write`/`release`/`isOpened` interface of `cv2.VideoWriter`.
+- Writes MPEG-TS, which repeats codec parameters in-band so independently encoded parts can be
+  joined with a stream copy, or MP4 for finished videos.
+- Exposes the encoder preset and quality, so draft renders can trade quality for speed.
+
+Requirements:
+The `ffmpeg` executable must be on the `PATH`, built with the encoders listed in `ENCODERS`.
+
+Example:
+    from backend.render.encoders import FFmpegWriter
+
+    writer = FFmpegWriter("part.ts", 25.0, (1920, 1080), codec="h264")
+    writer.write(frame)
+    writer.release()
+"""
+
+import functools
+import shutil
+import subprocess
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+from .engine import RenderError
+from .presets import RenderPreset
+
+# FFmpeg encoders producing each source codec, as reported by `ffprobe`
+ENCODERS = {"h264": "libx264", "hevc": "libx265"}
+# Bitstream filters moving codec parameters in-band, so parts can be concatenated
+ANNEXB_FILTERS = {"h264": "h264_mp4toannexb", "hevc": "hevc_mp4toannexb"}
+DEFAULT_PRESET = "medium"
+DEFAULT_CRF = 18
+
+
+class FFmpegWriter:
+    """A video writer encoding frames with an FFmpeg process.
+
+    Attributes:
+        output_path (str): The file to write.
+        codec (str): The codec name of the output, a key of `ENCODERS`.
+        container (str): The FFmpeg output format, "mpegts" or "mp4".
+    """
+
+    def __init__(
+        self,
+        output_path: str,
+        fps: float,
+        size: Tuple[int, int],
+        codec: str,
+        preset: str = DEFAULT_PRESET,
+        crf: int = DEFAULT_CRF,
+        container: str = "mpegts",
+    ):
+        if codec not in ENCODERS:
+            raise RenderError(f"No encoder for codec {codec}")
+        self.output_path = output_path
+        self.codec = codec
+        self.container = container
+        width, height = size
+        self._frame_bytes = width * height * 3
+        self._process: Optional[subprocess.Popen] = subprocess.Popen(
+            [
+                "ffmpeg",
+                "-v",
+                "error",
+                "-y",
+                "-f",
+                "rawvideo",
+                "-pix_fmt",
+                "bgr24",
+                "-s",
+                f"{width}x{height}",
+                "-r",
+                f"{fps:.6f}",
+                "-i",
+                "-",
+                "-c:v",
+                ENCODERS[codec],
+                "-preset",
+                preset,
+                "-crf",
+                str(crf),
+                "-pix_fmt",
+                "yuv420p",
+                "-f",
+                container,
+                output_path,
+            ],
+            stdin=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+
+    def isOpened(self) -> bool:
+        """Return whether the encoder process is running."""
+        return self._process is not None and self._process.poll() is None
+
+    def write(self, frame: np.ndarray) -> None:
+        """Encode one (H, W, 3) uint8 BGR frame.
+
+        Raises:
+            RenderError: If the frame has the wrong size or the encoder stopped.
+        """
+        if frame.nbytes != self._frame_bytes:
+            raise RenderError("Frame size does not match the encoder")
+        try:
+            self._process.stdin.write(np.ascontiguousarray(frame).data)
+        except (BrokenPipeError, AttributeError) as e:
+            raise RenderError(f"Encoder stopped: {self._errors()}") from e
+
+    def release(self) -> None:
+        """Flush the encoder and wait for it to finish.
+
+        Raises:
+            RenderError: If the encoder failed.
+        """
+        if self._process is None:
+            return
+        process, self._process = self._process, None
+        try:
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+        stderr = process.stderr.read().decode(errors="replace").strip()
+        if process.wait() != 0:
+            raise RenderError(f"Unable to encode {self.output_path}: {stderr}")
+
+    def _errors(self) -> str:
+        if self._process is None:
+            return ""
+        self._process.kill()
+        return self._process.stderr.read().decode(errors="replace").strip()
+
+
+def preset_writer_factory(preset: RenderPreset) -> Optional[Callable]:
+    """Return the writer factory of a render preset, see `RenderEngine`.
+
+    Returns:
+        Callable: A picklable factory of MP4 writers with the encoder settings of the preset, or
+        None when the preset uses the default writer or `ffmpeg` cannot be found.
+    """
+    if preset.encoder_preset is None or shutil.which("ffmpeg") is None:
+        return None
+    return functools.partial(
+        FFmpegWriter,
+        codec="h264",
+        preset=preset.encoder_preset,
+        crf=preset.encoder_crf,
+        container="mp4",
+    )
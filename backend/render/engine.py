@@ -0,0 +1,310 @@
+"""Render Engine Module
+
+This module implements the CPU render engine that replaces in-scene placements with ad
+creatives. It reads the project video frame by frame, warps the creative of every active
+placement into its quad, and writes the composited frames to an output video. Decoding,
+compositing and encoding run as a pipeline of threads over a small ring of reused frames, so
+memory use does not depend on the length of the video.
+
+Key Features:
+- Overlaps decode, composite and encode on three threads sharing a preallocated frame ring.
+- Precomputes the quad and homography of every track on every frame before decoding.
+- Loads creatives through the creative cache and warps from their matching mip level.
+- Composites every placement of a frame in a single z-ordered pass over merged bounding boxes.
+- Renders a range of frames starting on a keyframe, for segment-parallel rendering.
+- Composites with OpenCV or the fused Numba or NumPy kernels, chosen per render.
+- Renders with the quality preset of the job: final, or draft at reduced resolution, without
+  mip levels and optionally skipping frames.
+- Writes through OpenCV or any writer with the same interface, such as an FFmpeg encoder.
+- Reports frame counts, timings, frames per second, the time spent on each placement and the
+  utilization of each pipeline stage.
+
+Placement semantics:
+See `backend.render.interpolation`: a track is hidden before its first keyframe, interpolated
+between keyframes and holds its last keyframe until the end of the video.
+
+Example:
+    from backend.render import RenderEngine, placements_from_annotations
+
+    engine = RenderEngine("input.mp4", "output.mp4", placements_from_annotations(annotations))
+    stats = engine.render()
+    print(stats.fps)
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .compositor import composite_layers
+from .creative_cache import CreativeCache, CreativePyramid, get_creative_cache
+from .interpolation import PlacementTimeline, build_timeline
+from .kernels import DEFAULT_KERNEL, resolve_kernel
+from .pipeline import DEFAULT_RING_FRAMES, STAGES, FramePipeline
+from .placements import Placement, group_tracks
+from .presets import DEFAULT_PRESET, PRESETS, RenderPreset
+
+DEFAULT_FOURCC = "mp4v"
+FALLBACK_FPS = 25.0
+
+
+class RenderError(Exception):
+    """Raised when a video cannot be rendered."""
+
+
+@dataclass
+class RenderStats:
+    """Counters describing a finished render.
+
+    Attributes:
+        frames (int): The number of frames written.
+        seconds (float): The wall-clock duration of the render.
+        composite_seconds (float): The time spent warping and blending.
+        width (int): The width of the output video.
+        height (int): The height of the output video.
+        segments (int): The number of segments the output was assembled from.
+        reused_segments (int): The segments copied from the previous output without rendering.
+        reused_frames (int): The frames of the reused segments, included in `frames`.
+        surface_seconds (Dict[str, float]): The time spent warping each track, to spot costly
+        placements.
+        stage_seconds (Dict[str, float]): The busy time of the decode, composite and encode
+        stages of the render pipelines.
+        pipeline_seconds (float): The wall-clock time of the render pipelines, summed over
+        segments rendered in parallel.
+    """
+
+    frames: int = 0
+    seconds: float = 0.0
+    composite_seconds: float = 0.0
+    width: int = 0
+    height: int = 0
+    segments: int = 0
+    reused_segments: int = 0
+    reused_frames: int = 0
+    surface_seconds: Dict[str, float] = field(default_factory=dict)
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
+    pipeline_seconds: float = 0.0
+
+    @property
+    def fps(self) -> float:
+        """Return the number of frames rendered per second of wall-clock time."""
+        return self.frames / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def stage_utilization(self) -> Dict[str, float]:
+        """Return the fraction of the pipeline time each stage was busy.
+
+        The stage closest to 1 limits the throughput; the others wait on it.
+        """
+        if self.pipeline_seconds <= 0:
+            return {}
+        return {
+            stage: self.stage_seconds.get(stage, 0.0) / self.pipeline_seconds for stage in STAGES
+        }
+
+    def to_dict(self) -> dict:
+        """Return the counters as a JSON-serializable dictionary."""
+        return {
+            "frames": self.frames,
+            "seconds": round(self.seconds, 3),
+            "composite_seconds": round(self.composite_seconds, 3),
+            "fps": round(self.fps, 2),
+            "width": self.width,
+            "height": self.height,
+            "segments": self.segments,
+            "reused_segments": self.reused_segments,
+            "reused_frames": self.reused_frames,
+            "surface_seconds": {
+                track: round(seconds, 3) for track, seconds in self.surface_seconds.items()
+            },
+            "stage_utilization": {
+                stage: round(share, 3) for stage, share in self.stage_utilization.items()
+            },
+        }
+
+
+def sum_timings(results: Iterable[RenderStats], attribute: str) -> Dict[str, float]:
+    """Add up a mapping of timings, such as `surface_seconds`, over the segments of a video."""
+    totals: Dict[str, float] = {}
+    for stats in results:
+        for name, seconds in getattr(stats, attribute).items():
+            totals[name] = totals.get(name, 0.0) + seconds
+    return totals
+
+
+class RenderEngine:
+    """Composites placements into a video, streaming one frame at a time.
+
+    Attributes:
+        source_path (str): The input video file.
+        output_path (str): The output video file.
+        tracks (Dict[str, List[Placement]]): The placements grouped by track.
+        creative_cache (CreativeCache): The cache creatives are loaded from.
+        fourcc (str): The four-character code of the output codec.
+        interpolation (str): How quads are interpolated between keyframes, see
+        `backend.render.interpolation.INTERPOLATION_METHODS`.
+        start_frame (int): The first source frame to render.
+        end_frame (int): The source frame to stop before, or None for the end of the video.
+        writer_factory (Callable): Called with the output path, frame rate and frame size to
+        create the video writer, or None for an OpenCV writer using `fourcc`.
+        kernel (str): The compositing backend, see `backend.render.kernels.KERNEL_BACKENDS`.
+        ring_frames (int): The number of frames in flight between the pipeline stages, which
+        bounds the memory of the render.
+        preset (RenderPreset): The quality settings of the render, see
+        `backend.render.presets`.
+    """
+
+    def __init__(
+        self,
+        source_path: str,
+        output_path: str,
+        placements: Iterable[Placement],
+        creative_cache: Optional[CreativeCache] = None,
+        fourcc: str = DEFAULT_FOURCC,
+        interpolation: str = "linear",
+        start_frame: int = 0,
+        end_frame: Optional[int] = None,
+        writer_factory: Optional[Callable[[str, float, Tuple[int, int]], Any]] = None,
+        kernel: str = DEFAULT_KERNEL,
+        ring_frames: int = DEFAULT_RING_FRAMES,
+        preset: Optional[RenderPreset] = None,
+    ):
+        self.source_path = source_path
+        self.output_path = output_path
+        self.tracks = group_tracks(placements)
+        self.creative_cache = creative_cache or get_creative_cache()
+        self.fourcc = fourcc
+        self.interpolation = interpolation
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+        self.writer_factory = writer_factory
+        self.kernel = resolve_kernel(kernel)
+        self.ring_frames = ring_frames
+        self.preset = preset or PRESETS[DEFAULT_PRESET]
+        self._creatives: Dict[str, CreativePyramid] = {}
+
+    def creative(self, url: str) -> CreativePyramid:
+        """Return the creative pyramid for a URL, looking it up once per render."""
+        creative = self._creatives.get(url)
+        if creative is None:
+            creative = self.creative_cache.get(url)
+            self._creatives[url] = creative
+        return creative
+
+    def timeline(self, frame_count: int, fps: float) -> PlacementTimeline:
+        """Return the per-frame placements of the rendered frames, in output pixels.
+
+        Containers may not report a frame count, so without an end frame the timeline always
+        extends to the last keyframe; frames past its end reuse the last row.
+        """
+        if self.end_frame is None:
+            last_keyframe = max(
+                (keyframes[-1].timestamp for keyframes in self.tracks.values()), default=0.0
+            )
+            end_frame = max(frame_count, int(last_keyframe * fps) + 1)
+        else:
+            end_frame = self.end_frame
+        placements = self.preset.scale_placements(
+            placement for keyframes in self.tracks.values() for placement in keyframes
+        )
+        return build_timeline(
+            placements,
+            max(end_frame - self.start_frame, 0),
+            fps,
+            lambda url: (self.creative(url).width, self.creative(url).height),
+            self.interpolation,
+            first_frame=self.start_frame,
+        )
+
+    def render(self, progress: Optional[Callable[[int, int], None]] = None) -> RenderStats:
+        """Render the output video.
+
+        Args:
+            progress (Callable, optional): Called with the number of frames written and the
+            number of frames to render, which may be zero if the container does not report it.
+
+        Returns:
+            RenderStats: Counters describing the render.
+
+        Raises:
+            RenderError: If the input cannot be read or the output cannot be written.
+        """
+        capture = cv2.VideoCapture(self.source_path)
+        if not capture.isOpened():
+            raise RenderError(f"Unable to open video {self.source_path}")
+
+        fps = capture.get(cv2.CAP_PROP_FPS) or FALLBACK_FPS
+        width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        total_frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        if self.start_frame > 0 and not capture.set(cv2.CAP_PROP_POS_FRAMES, self.start_frame):
+            capture.release()
+            raise RenderError(f"Unable to seek to frame {self.start_frame}")
+        end_frame = self.end_frame if self.end_frame is not None else total_frames
+        frames_to_render = max(end_frame - self.start_frame, 0)
+        output_size = self.preset.output_size(width, height)
+        output_fps = fps / self.preset.frame_step
+        if self.writer_factory is not None:
+            writer = self.writer_factory(self.output_path, output_fps, output_size)
+        else:
+            writer = cv2.VideoWriter(
+                self.output_path, cv2.VideoWriter_fourcc(*self.fourcc), output_fps, output_size
+            )
+        if not writer.isOpened():
+            capture.release()
+            raise RenderError(f"Unable to open output {self.output_path}")
+
+        stats = RenderStats(width=output_size[0], height=output_size[1])
+        step = self.preset.frame_step
+        started = time.perf_counter()
+
+        def composite(position: int, frame: np.ndarray) -> None:
+            layers = []
+            for track, image_url, homography, quad in timeline.layers_at(
+                self.start_frame + position
+            ):
+                pyramid = self.creative(image_url)
+                if self.preset.mipmaps:
+                    # Sample from the mip level closest to the placement's size on screen
+                    creative, homography = pyramid.level_for(homography)
+                else:
+                    creative = pyramid.levels[0]
+                layers.append((track, creative, homography, quad))
+            composite_layers(
+                frame,
+                layers,
+                stats.surface_seconds,
+                interpolation=self.preset.sampling,
+                kernel=self.kernel,
+            )
+
+        def report(frames: int) -> None:
+            # Progress counts source frames, skipped ones included
+            done = frames * step
+            progress(min(done, frames_to_render) if frames_to_render else done, frames_to_render)
+
+        try:
+            timeline = self.timeline(total_frames, fps)
+            pipeline = FramePipeline(
+                capture,
+                writer,
+                composite,
+                (output_size[1], output_size[0], 3),
+                self.ring_frames,
+                frame_step=step,
+                output_size=output_size if output_size != (width, height) else None,
+            )
+            stats.frames, stats.stage_seconds, stats.pipeline_seconds = pipeline.run(
+                frames_to_render if self.end_frame is not None else None,
+                report if progress is not None else None,
+            )
+        finally:
+            capture.release()
+            writer.release()
+
+        stats.composite_seconds = stats.stage_seconds["composite"]
+        stats.seconds = time.perf_counter() - started
+        return stats
+
@@ -0,0 +1,103 @@
+"""Placement Geometry Module
+
+This module converts the points stored on an `Annotation` into the quads and homographies used
+by the renderer. A quad is the four corners of the placement in full-resolution frame pixels,
+ordered top-left, top-right, bottom-right and bottom-left.
+
+Key Features:
+- Parses the supported `Annotation.points` layouts into a (4, 2) float32 array.
+- Computes the homography mapping a creative's pixel grid onto a quad.
+- Scales stored points between coordinate spaces, such as proxy and full-resolution frames.
+
+Supported `points` layouts:
+- A list of four `[x, y]` pairs.
+- A list of four `{"x": ..., "y": ...}` objects.
+- An object with a `corners` list in either form above, plus optional metadata such as `track`.
+
+Example:
+    from backend.render.geometry import creative_homography, parse_quad
+
+    quad = parse_quad([[10, 10], [200, 12], [198, 120], [12, 118]])
+    homography = creative_homography(640, 360, quad)
+"""
+
+from typing import Any
+
+import cv2
+import numpy as np
+
+
+def corner_list(points: Any) -> list:
+    """Return the list of corners held by an `Annotation.points` value."""
+    if isinstance(points, dict):
+        return points.get("corners") or []
+    return points or []
+
+
+def parse_quad(points: Any) -> np.ndarray:
+    """Parse `Annotation.points` into a quad.
+
+    Args:
+        points (Any): The stored points, in one of the supported layouts.
+
+    Returns:
+        np.ndarray: A (4, 2) float32 array of corners in frame pixels.
+
+    Raises:
+        ValueError: If the points do not describe exactly four corners.
+
+    Examples:
+        >>> parse_quad([{"x": 0, "y": 0}, {"x": 10, "y": 0}, {"x": 10, "y": 5}, {"x": 0, "y": 5}])
+        array([[ 0.,  0.], [10.,  0.], [10.,  5.], [ 0.,  5.]], dtype=float32)
+    """
+    corners = corner_list(points)
+    if len(corners) != 4:
+        raise ValueError(f"A placement needs exactly 4 corners, got {len(corners)}")
+    quad = [
+        (corner["x"], corner["y"]) if isinstance(corner, dict) else (corner[0], corner[1])
+        for corner in corners
+    ]
+    return np.asarray(quad, dtype=np.float32)
+
+
+def creative_homography(width: int, height: int, quad: np.ndarray) -> np.ndarray:
+    """Return the homography mapping a `width` x `height` creative onto a quad.
+
+    Args:
+        width (int): The width of the creative in pixels.
+        height (int): The height of the creative in pixels.
+        quad (np.ndarray): The (4, 2) destination corners.
+
+    Returns:
+        np.ndarray: A 3x3 float64 homography matrix.
+    """
+    source = np.array(
+        [[0, 0], [width, 0], [width, height], [0, height]], dtype=np.float32
+    )
+    return cv2.getPerspectiveTransform(source, quad.astype(np.float32))
+
+
+def scale_points(points: Any, scale_x: float, scale_y: float) -> Any:
+    """Return a copy of `Annotation.points` with every corner scaled, keeping its layout.
+
+    Args:
+        points (Any): The points, in one of the supported layouts.
+        scale_x (float): The horizontal scale factor.
+        scale_y (float): The vertical scale factor.
+
+    Returns:
+        Any: The scaled points, in the same layout and with the same metadata.
+
+    Examples:
+        >>> scale_points({"corners": [[10, 10], [20, 10], [20, 20], [10, 20]], "track": "a"}, 2, 2)
+        {'corners': [[20, 20], [40, 20], [40, 40], [20, 40]], 'track': 'a'}
+    """
+    scaled = [
+        {**corner, "x": corner["x"] * scale_x, "y": corner["y"] * scale_y}
+        if isinstance(corner, dict)
+        else [corner[0] * scale_x, corner[1] * scale_y]
+        for corner in corner_list(points)
+    ]
+    if isinstance(points, dict):
+        return {**points, "corners": scaled}
+    return scaled
@@ -0,0 +1,289 @@
+"""Incremental Render Module
+
+This module re-renders only the parts of a video whose placements changed. The source is split
+into short segments at keyframes, and every segment is identified by a hash of what it depends
+on: the source, its frame range, the keyframes that shape its quads, the content of their
+creatives and the render settings. Rendered segments are kept in storage next to the output with
+a manifest of their hashes. When the project is rendered again, segments whose hash is in the
+manifest are reused as they are, the dirty ones are rendered in parallel, and all are joined
+with a stream copy, so untouched segments are never decoded or encoded again.
+
+Key Features:
+- Plans stable segment boundaries from the stored keyframe index.
+- Hashes the inputs of every segment, including creative content behind unchanged URLs.
+- Renders dirty segments on a process pool and splices them with the reused ones.
+- Deletes segments that the new output no longer references.
+
+Example:
+    from backend.render.incremental import render_incremental
+
+    stats = render_incremental(
+        source_key, source_path, f"renders/{project.id}.mp4", output_path, placements, index
+    )
+    print(stats.reused_segments, stats.segments)
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from contextlib import ExitStack
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.storage import get_storage_backend
+
+from .creative_cache import get_creative_cache
+from .engine import DEFAULT_FOURCC, RenderStats, sum_timings
+from .kernels import DEFAULT_KERNEL, resolve_kernel
+from .placements import Placement, placements_in_range
+from .presets import DEFAULT_PRESET, PRESETS, RenderPreset
+from .probe import KeyframeIndex
+from .segments import SegmentTask, concat_segments, run_segment_tasks
+
+# Bump when the output of the render engine changes, so no stale segment is reused
+RENDER_VERSION = 2
+
+
+def segment_bounds(index: KeyframeIndex, seconds: float) -> List[Tuple[int, int]]:
+    """Split a video into frame ranges of about `seconds`, each starting on a keyframe.
+
+    Boundaries depend only on the video, so every render of the same source plans the same
+    segments.
+
+    Returns:
+        List[Tuple[int, int]]: The `(start, end)` frame ranges, end exclusive.
+    """
+    step = max(int(round(seconds * index.fps)), 1)
+    cuts = []
+    target = step
+    for keyframe in index.keyframe_list():
+        if keyframe >= index.frame_count:
+            break
+        if keyframe >= target:
+            cuts.append(keyframe)
+            target = keyframe + step
+    bounds = [0] + cuts + [index.frame_count]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def segment_hash(
+    source_key: str,
+    start: int,
+    end: int,
+    placements: Sequence[Placement],
+    interpolation: str,
+    creative_digest: Callable[[str], str],
+    kernel: str = DEFAULT_KERNEL,
+    preset: Optional[RenderPreset] = None,
+) -> str:
+    """Return the hex SHA-256 digest of everything a rendered segment depends on.
+
+    Args:
+        source_key (str): The blob key of the source video.
+        start (int): The first frame of the segment.
+        end (int): The frame after the last frame of the segment.
+        placements (Sequence[Placement]): The keyframes shaping the quads of the segment.
+        interpolation (str): How quads are interpolated between keyframes.
+        creative_digest (Callable): Returns the content digest of the creative at a URL.
+        kernel (str, optional): The compositing backend.
+        preset (RenderPreset, optional): The quality settings of the render. Defaults to the
+        final preset.
+
+    Returns:
+        str: The segment hash.
+    """
+    description = {
+        "version": RENDER_VERSION,
+        "fourcc": DEFAULT_FOURCC,
+        "source": source_key,
+        "frames": [start, end],
+        "interpolation": interpolation,
+        "kernel": kernel,
+        "preset": (preset or PRESETS[DEFAULT_PRESET]).describe(),
+        "placements": [
+            [
+                placement.track,
+                round(placement.timestamp, 6),
+                np.round(placement.quad.astype(np.float64), 3).tolist(),
+                creative_digest(placement.image_url),
+                placement.z,
+                placement.hidden,
+            ]
+            for placement in placements
+        ],
+    }
+    return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+
+def manifest_key(state_key: str) -> str:
+    """Return the storage key of the segment manifest of an output."""
+    return f"{os.path.splitext(state_key)[0]}.segments.json"
+
+
+def segment_key(state_key: str, digest: str) -> str:
+    """Return the storage key of a rendered segment of an output."""
+    return f"{os.path.splitext(state_key)[0]}.segments/{digest}.mp4"
+
+
+def load_manifest(state_key: str) -> Optional[dict]:
+    """Return the segment manifest of the previous render of an output, if any."""
+    storage = get_storage_backend()
+    key = manifest_key(state_key)
+    if not storage.exists(key):
+        return None
+    file = storage.open_read(key)
+    try:
+        return json.load(file)
+    except ValueError:
+        return None
+    finally:
+        file.close()
+
+
+def render_incremental(
+    source_key: str,
+    source_path: str,
+    state_key: str,
+    output_path: str,
+    placements: List[Placement],
+    keyframe_index: KeyframeIndex,
+    segment_seconds: float,
+    workers: int,
+    interpolation: str = "linear",
+    progress: Optional[Callable[[int, int], None]] = None,
+    kernel: str = DEFAULT_KERNEL,
+    preset: Optional[RenderPreset] = None,
+) -> RenderStats:
+    """Render a video, reusing the segments of the previous output that did not change.
+
+    Args:
+        source_key (str): The blob key of the source video.
+        source_path (str): A local copy of the source video.
+        state_key (str): The storage key locating the manifest and segments of the previous
+        render of the same output.
+        output_path (str): The local file the joined output is written to.
+        placements (List[Placement]): The keyframes of every track.
+        keyframe_index (KeyframeIndex): The keyframe index of the source.
+        segment_seconds (float): The approximate length of a segment.
+        workers (int): The number of processes rendering dirty segments at once.
+        interpolation (str, optional): How quads are interpolated between keyframes.
+        progress (Callable, optional): Called with the frames available, reused ones included,
+        and the frame count of the video.
+        kernel (str, optional): The compositing backend, see `RenderEngine`.
+        preset (RenderPreset, optional): The quality settings of the render. Defaults to the
+        final preset.
+
+    Returns:
+        RenderStats: Counters of the render. Reused frames count as written.
+    """
+    started = time.perf_counter()
+    storage = get_storage_backend()
+    creative_cache = get_creative_cache()
+    fps = keyframe_index.fps
+    preset = preset or PRESETS[DEFAULT_PRESET]
+
+    previous = load_manifest(state_key) or {}
+    previous_hashes = {segment["hash"] for segment in previous.get("segments", [])}
+    segments = []
+    for start, end in segment_bounds(keyframe_index, segment_seconds):
+        segment_placements = placements_in_range(placements, start / fps, end / fps)
+        digest = segment_hash(
+            source_key,
+            start,
+            end,
+            segment_placements,
+            interpolation,
+            creative_cache.digest,
+            resolve_kernel(kernel),
+            preset,
+        )
+        reused = digest in previous_hashes and storage.exists(segment_key(state_key, digest))
+        segments.append(
+            {
+                "start": start,
+                "end": end,
+                "hash": digest,
+                "key": segment_key(state_key, digest),
+                "placements": segment_placements,
+                "reused": reused,
+            }
+        )
+
+    total_frames = keyframe_index.frame_count
+    reused_frames = sum(s["end"] - s["start"] for s in segments if s["reused"])
+    segment_directory = tempfile.mkdtemp(prefix="segments-")
+    try:
+        tasks = [
+            SegmentTask(
+                index=index,
+                source_path=source_path,
+                output_path=os.path.join(segment_directory, f"{segment['hash']}.mp4"),
+                placements=segment["placements"],
+                start_frame=segment["start"],
+                end_frame=segment["end"],
+                interpolation=interpolation,
+                kernel=kernel,
+                preset=preset,
+            )
+            for index, segment in enumerate(segments)
+            if not segment["reused"]
+        ]
+        if progress is not None:
+            progress(reused_frames, total_frames)
+        results = run_segment_tasks(tasks, workers, progress, total_frames, reused_frames)
+        for task in tasks:
+            storage.put_file(task.output_path, segments[task.index]["key"])
+
+        with ExitStack() as stack:
+            rendered = {task.index: task.output_path for task in tasks}
+            paths = [
+                rendered.get(index) or stack.enter_context(storage.local_copy(segment["key"]))
+                for index, segment in enumerate(segments)
+            ]
+            concat_segments(paths, output_path)
+    finally:
+        shutil.rmtree(segment_directory, ignore_errors=True)
+
+    # The job queue runs one render per state key at a time, so no other render is reading the
+    # segments of the previous manifest
+    _save_manifest(state_key, source_key, segments)
+    current_hashes = {segment["hash"] for segment in segments}
+    for stale in previous_hashes - current_hashes:
+        storage.delete(segment_key(state_key, stale))
+
+    width, height = preset.output_size(keyframe_index.width, keyframe_index.height)
+    return RenderStats(
+        frames=reused_frames + sum(stats.frames for stats in results),
+        seconds=time.perf_counter() - started,
+        composite_seconds=sum(stats.composite_seconds for stats in results),
+        surface_seconds=sum_timings(results, "surface_seconds"),
+        stage_seconds=sum_timings(results, "stage_seconds"),
+        pipeline_seconds=sum(stats.pipeline_seconds for stats in results),
+        width=width,
+        height=height,
+        segments=len(segments),
+        reused_segments=len(segments) - len(tasks),
+        reused_frames=reused_frames,
+    )
+
+
+def _save_manifest(state_key: str, source_key: str, segments: List[dict]) -> None:
+    manifest = {
+        "source": source_key,
+        "segments": [
+            {"start": segment["start"], "end": segment["end"], "hash": segment["hash"]}
+            for segment in segments
+        ],
+    }
+    file_descriptor, manifest_path = tempfile.mkstemp(suffix=".json")
+    try:
+        with os.fdopen(file_descriptor, "w") as file:
+            json.dump(manifest, file)
+        get_storage_backend().put_file(manifest_path, manifest_key(state_key), move=True)
+    finally:
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
@@ -0,0 +1,308 @@
+"""Keyframe Interpolation Module
+
+This module expands the sparse keyframes stored as `Annotation` rows into a per-frame timeline
+of placement quads and homographies. The whole timeline of a track is computed with a handful of
+vectorized NumPy operations, including one batched linear solve for every frame's homography, so
+the render loop and previews only index into precomputed tables.
+
+Key Features:
+- Loads all annotations of a project sorted by timestamp.
+- Interpolates quad corners per frame with hold, linear or Catmull-Rom spline interpolation.
+- Precomputes a table of per-frame homography matrices for every track.
+- Gives constant-time random access to the placements of any frame, in z-order.
+- Tells which frames show at least one placement inside the frame.
+
+Timeline semantics:
+A track is hidden before its first keyframe, interpolated between keyframes, and holds its last
+keyframe until the end of the video. A hidden keyframe hides the track from its timestamp until
+the next keyframe, and the track holds still before it. Its creative and z-order change at each
+keyframe. The
+placements of a frame are drawn by increasing z-order, ties in track name order.
+
+Example:
+    from backend.render.interpolation import build_timeline, load_placements
+
+    timeline = build_timeline(load_placements(project.id), frame_count, fps, creative_size)
+    for image_url, homography in timeline.placements_at(120):
+        ...
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from backend.models import Annotation
+
+from .placements import Placement, group_tracks, placements_from_annotations
+
+INTERPOLATION_METHODS = ("hold", "linear", "spline")
+
+
+def load_placements(project_id: str) -> List[Placement]:
+    """Load every annotation of a project as placements sorted by timestamp."""
+    annotations = (
+        Annotation.query.filter_by(project_id=project_id).order_by(Annotation.timestamp).all()
+    )
+    return placements_from_annotations(annotations)
+
+
+@dataclass
+class TrackTimeline:
+    """The per-frame state of one placement track.
+
+    Attributes:
+        track (str): The track identifier.
+        image_urls (List[str]): The creative URL of each keyframe.
+        z_orders (List[int]): The z-order of each keyframe.
+        visible (np.ndarray): (N,) bool, whether the track is shown on each frame.
+        keyframe_index (np.ndarray): (N,) int, the keyframe in effect on each frame.
+        quads (np.ndarray): (N, 4, 2) float32, the interpolated corners on each frame.
+        homographies (np.ndarray): (N, 3, 3) float64, creative-to-frame mapping on each frame.
+    """
+
+    track: str
+    image_urls: List[str]
+    z_orders: List[int]
+    visible: np.ndarray
+    keyframe_index: np.ndarray
+    quads: np.ndarray
+    homographies: np.ndarray
+
+
+@dataclass
+class PlacementTimeline:
+    """Per-frame quads and homographies of every track of a project.
+
+    Attributes:
+        frame_count (int): The number of frames covered by the tables.
+        fps (float): The frame rate used to convert timestamps to frames.
+        tracks (Dict[str, TrackTimeline]): The timeline of each track.
+        first_frame (int): The video frame index of the first row of the tables.
+    """
+
+    frame_count: int
+    fps: float
+    tracks: Dict[str, TrackTimeline]
+    first_frame: int = 0
+
+    def row(self, frame_index: int) -> int:
+        """Return the table row of a video frame index, clamped to the covered range."""
+        return min(max(frame_index - self.first_frame, 0), self.frame_count - 1)
+
+    def layers_at(self, frame_index: int) -> List[Tuple[str, str, np.ndarray, np.ndarray]]:
+        """Return the track, creative URL, homography and quad of every layer of a frame.
+
+        Layers are ordered bottom first, by z-order and then track name. Frames past the end of
+        the tables reuse the last row, which covers containers that under-report their frame
+        count.
+        """
+        if self.frame_count == 0:
+            return []
+        row = self.row(frame_index)
+        order = sorted(
+            (timeline.z_orders[timeline.keyframe_index[row]], track)
+            for track, timeline in self.tracks.items()
+            if timeline.visible[row]
+        )
+        layers = []
+        for _, track in order:
+            timeline = self.tracks[track]
+            image_url = timeline.image_urls[timeline.keyframe_index[row]]
+            layers.append((track, image_url, timeline.homographies[row], timeline.quads[row]))
+        return layers
+
+    def placements_at(self, frame_index: int) -> List[Tuple[str, np.ndarray]]:
+        """Return the creative URL and homography of every track shown on a frame, in z-order."""
+        return [
+            (image_url, homography)
+            for _, image_url, homography, _ in self.layers_at(frame_index)
+        ]
+
+    def visible_frames(self, width: int, height: int) -> np.ndarray:
+        """Return whether any placement is drawn on each frame of the tables.
+
+        A placement counts only if the bounding box of its quad overlaps the frame.
+
+        Args:
+            width (int): The frame width in pixels.
+            height (int): The frame height in pixels.
+
+        Returns:
+            np.ndarray: (frame_count,) bool, one entry per table row.
+        """
+        visible = np.zeros(self.frame_count, dtype=bool)
+        for timeline in self.tracks.values():
+            low = timeline.quads.min(axis=1)
+            high = timeline.quads.max(axis=1)
+            inside = (
+                (high[:, 0] > 0) & (low[:, 0] < width) & (high[:, 1] > 0) & (low[:, 1] < height)
+            )
+            visible |= timeline.visible & inside
+        return visible
+
+    def quads_at(self, frame_index: int) -> Dict[str, np.ndarray]:
+        """Return the quad of every track visible on a frame, keyed by track."""
+        if self.frame_count == 0:
+            return {}
+        row = self.row(frame_index)
+        return {
+            track: timeline.quads[row]
+            for track, timeline in self.tracks.items()
+            if timeline.visible[row]
+        }
+
+
+def interpolate_corners(
+    keyframe_times: np.ndarray,
+    keyframe_corners: np.ndarray,
+    frame_times: np.ndarray,
+    method: str = "linear",
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Interpolate keyframe corners at every frame time.
+
+    Args:
+        keyframe_times (np.ndarray): (K,) sorted keyframe timestamps in seconds.
+        keyframe_corners (np.ndarray): (K, 4, 2) keyframe corners.
+        frame_times (np.ndarray): (N,) frame timestamps in seconds.
+        method (str, optional): "hold", "linear" or "spline". Defaults to "linear".
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: The (N,) visibility mask, the (N,) index of
+        the keyframe in effect and the (N, 4, 2) interpolated corners.
+
+    Raises:
+        ValueError: If the method is unknown.
+    """
+    if method not in INTERPOLATION_METHODS:
+        raise ValueError(f"Unknown interpolation method: {method}")
+
+    count = len(keyframe_times)
+    visible = frame_times >= keyframe_times[0]
+    start = np.clip(np.searchsorted(keyframe_times, frame_times, side="right") - 1, 0, count - 1)
+    end = np.minimum(start + 1, count - 1)
+
+    corners = keyframe_corners.reshape(count, 8).astype(np.float64)
+    if method == "hold" or count == 1:
+        return visible, start, corners[start].reshape(-1, 4, 2).astype(np.float32)
+
+    span = keyframe_times[end] - keyframe_times[start]
+    weight = np.divide(
+        frame_times - keyframe_times[start],
+        span,
+        out=np.zeros_like(frame_times, dtype=np.float64),
+        where=span > 0,
+    )
+    weight = np.clip(weight, 0.0, 1.0)[:, None]
+
+    if method == "linear":
+        result = corners[start] * (1.0 - weight) + corners[end] * weight
+    else:
+        # Uniform Catmull-Rom spline through the keyframes, clamped at both ends
+        before = corners[np.maximum(start - 1, 0)]
+        p1 = corners[start]
+        p2 = corners[end]
+        after = corners[np.minimum(start + 2, count - 1)]
+        t2 = weight * weight
+        t3 = t2 * weight
+        result = 0.5 * (
+            2.0 * p1
+            + (p2 - before) * weight
+            + (2.0 * before - 5.0 * p1 + 4.0 * p2 - after) * t2
+            + (3.0 * p1 - before - 3.0 * p2 + after) * t3
+        )
+    return visible, start, result.reshape(-1, 4, 2).astype(np.float32)
+
+
+def batch_homographies(source_sizes: np.ndarray, quads: np.ndarray) -> np.ndarray:
+    """Compute the homography mapping each source rectangle onto each quad in one solve.
+
+    Args:
+        source_sizes (np.ndarray): (N, 2) widths and heights of the creatives.
+        quads (np.ndarray): (N, 4, 2) destination corners.
+
+    Returns:
+        np.ndarray: (N, 3, 3) float64 homographies. Degenerate quads produce NaN matrices.
+    """
+    count = len(quads)
+    width = source_sizes[:, 0].astype(np.float64)
+    height = source_sizes[:, 1].astype(np.float64)
+    zeros = np.zeros(count)
+    source = np.stack(
+        [
+            np.stack([zeros, zeros], axis=1),
+            np.stack([width, zeros], axis=1),
+            np.stack([width, height], axis=1),
+            np.stack([zeros, height], axis=1),
+        ],
+        axis=1,
+    )
+    destination = quads.astype(np.float64)
+
+    x, y = source[..., 0], source[..., 1]
+    u, v = destination[..., 0], destination[..., 1]
+    ones = np.ones_like(x)
+    zero = np.zeros_like(x)
+    rows_u = np.stack([x, y, ones, zero, zero, zero, -x * u, -y * u], axis=-1)
+    rows_v = np.stack([zero, zero, zero, x, y, ones, -x * v, -y * v], axis=-1)
+    system = np.concatenate([rows_u, rows_v], axis=1)
+    target = np.concatenate([u, v], axis=1)
+
+    solution = np.full((count, 8), np.nan)
+    determinant = np.linalg.det(system)
+    solvable = np.abs(determinant) > 1e-12
+    if np.any(solvable):
+        solution[solvable] = np.linalg.solve(system[solvable], target[solvable][..., None])[..., 0]
+    return np.concatenate([solution, np.ones((count, 1))], axis=1).reshape(count, 3, 3)
+
+
+def build_timeline(
+    placements: Iterable[Placement],
+    frame_count: int,
+    fps: float,
+    creative_size: Callable[[str], Tuple[int, int]],
+    method: str = "linear",
+    first_frame: int = 0,
+) -> PlacementTimeline:
+    """Build the per-frame timeline of every track.
+
+    Args:
+        placements (Iterable[Placement]): The keyframes of the project.
+        frame_count (int): The number of frames to cover.
+        fps (float): The frame rate of the video.
+        creative_size (Callable): Returns the (width, height) of the creative at a URL.
+        method (str, optional): "hold", "linear" or "spline". Defaults to "linear".
+        first_frame (int, optional): The video frame index of the first frame to cover, for
+        timelines of a single segment. Defaults to 0.
+
+    Returns:
+        PlacementTimeline: The precomputed timeline.
+    """
+    frame_times = np.arange(first_frame, first_frame + frame_count, dtype=np.float64) / fps
+    tracks = {}
+    for track, keyframes in group_tracks(placements).items():
+        keyframe_times = np.array([k.timestamp for k in keyframes], dtype=np.float64)
+        keyframe_corners = np.stack([k.quad for k in keyframes])
+        visible, keyframe_index, quads = interpolate_corners(
+            keyframe_times, keyframe_corners, frame_times, method
+        )
+        # Frames in effect of a hidden keyframe are not drawn
+        visible &= ~np.array([k.hidden for k in keyframes])[keyframe_index]
+        image_urls = [k.image_url for k in keyframes]
+        z_orders = [k.z for k in keyframes]
+        keyframe_sizes = np.array([creative_size(url) for url in image_urls], dtype=np.float64)
+        homographies = batch_homographies(keyframe_sizes[keyframe_index], quads)
+        # Frames whose quad degenerated into a line or point are not drawn
+        visible &= np.isfinite(homographies).all(axis=(1, 2))
+        tracks[track] = TrackTimeline(
+            track=track,
+            image_urls=image_urls,
+            z_orders=z_orders,
+            visible=visible,
+            keyframe_index=keyframe_index,
+            quads=quads,
+            homographies=homographies,
+        )
+    return PlacementTimeline(
+        frame_count=frame_count, fps=fps, tracks=tracks, first_frame=first_frame
+    )
@@ -0,0 +1,229 @@
+"""Compositing Kernel Module
+
+This module provides fused warp-and-blend kernels, an alternative to warping a creative with
+OpenCV into a temporary layer and blending that layer into the frame. A kernel maps every pixel
+of a frame region back into the creative through the inverse homography, samples it
+bilinearly and blends the premultiplied result into the region in place.
+
+Backends:
+- "opencv": `cv2.warpPerspective` and a NumPy blend, see `backend.render.compositor`. The
+  default.
+- "numpy": the fused kernel written with vectorized NumPy operations on the whole region.
+- "numba": the same kernel as an allocation-free loop compiled by Numba. Numba is optional;
+  without it, this backend runs the NumPy kernel instead.
+
+Both fused backends compute in float64 with the same rounding, so their outputs match to within
+one level; `kernel_parity` checks it, and the test suite enforces it. They always sample
+bilinearly.
+
+Example:
+    from backend.render.kernels import get_kernel
+
+    warp_blend = get_kernel("numba")
+    warp_blend(frame[y0:y1, x0:x1], creative, region_homography)
+"""
+
+import math
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+KERNEL_BACKENDS = ("opencv", "numpy", "numba")
+DEFAULT_KERNEL = "opencv"
+PARITY_TOLERANCE = 1
+
+
+class KernelParityError(Exception):
+    """Raised when two kernels disagree by more than `PARITY_TOLERANCE` levels."""
+
+
+def numba_available() -> bool:
+    """Return whether the Numba backend is compiled rather than emulated with NumPy."""
+    return numba is not None
+
+
+def resolve_kernel(name: str) -> str:
+    """Return the backend that runs for a requested backend name.
+
+    Raises:
+        ValueError: If the backend is unknown.
+    """
+    if name not in KERNEL_BACKENDS:
+        raise ValueError(f"Unknown compositing kernel: {name}")
+    if name == "numba" and not numba_available():
+        return "numpy"
+    return name
+
+
+def warp_blend_numpy(region: np.ndarray, creative: np.ndarray, homography: np.ndarray) -> None:
+    """Warp a creative into a frame region and blend it in place, with NumPy.
+
+    Args:
+        region (np.ndarray): The (H, W, 3) uint8 BGR frame region to modify, usually a view.
+        creative (np.ndarray): The (h, w, 4) uint8 premultiplied BGRA creative.
+        homography (np.ndarray): The 3x3 matrix mapping creative pixels to region pixels.
+    """
+    height, width = region.shape[:2]
+    creative_height, creative_width = creative.shape[:2]
+    inverse = np.linalg.inv(homography)
+    x = np.arange(width, dtype=np.float64)[None, :]
+    y = np.arange(height, dtype=np.float64)[:, None]
+    denominator = inverse[2, 0] * x + inverse[2, 1] * y + inverse[2, 2]
+    u = (inverse[0, 0] * x + inverse[0, 1] * y + inverse[0, 2]) / denominator
+    v = (inverse[1, 0] * x + inverse[1, 1] * y + inverse[1, 2]) / denominator
+    u0 = np.floor(u)
+    v0 = np.floor(v)
+    fu = (u - u0)[..., None]
+    fv = (v - v0)[..., None]
+    u0 = u0.astype(np.int64)
+    v0 = v0.astype(np.int64)
+
+    sampled = np.zeros((height, width, 4), dtype=np.float64)
+    for du, dv, weight in (
+        (0, 0, (1 - fu) * (1 - fv)),
+        (1, 0, fu * (1 - fv)),
+        (0, 1, (1 - fu) * fv),
+        (1, 1, fu * fv),
+    ):
+        # Pixels outside the creative are transparent, like OpenCV's constant border
+        column = u0 + du
+        row = v0 + dv
+        inside = (column >= 0) & (column < creative_width) & (row >= 0) & (row < creative_height)
+        texel = creative[row.clip(0, creative_height - 1), column.clip(0, creative_width - 1)]
+        sampled += np.where(inside[..., None], weight * texel, 0.0)
+
+    layer = np.floor(sampled + 0.5).astype(np.uint16)
+    blended = region.astype(np.uint16) * (255 - layer[..., 3:4])
+    blended += 127
+    blended //= 255
+    blended += layer[..., :3]
+    np.minimum(blended, 255, out=blended)
+    region[...] = blended
+
+
+def _warp_blend_loops(region: np.ndarray, creative: np.ndarray, inverse: np.ndarray) -> None:
+    # Written for Numba: one pass over the region, no temporary arrays
+    height, width = region.shape[0], region.shape[1]
+    creative_height, creative_width = creative.shape[0], creative.shape[1]
+    sample = np.zeros(4)
+    for y in range(height):
+        for x in range(width):
+            denominator = inverse[2, 0] * x + inverse[2, 1] * y + inverse[2, 2]
+            u = (inverse[0, 0] * x + inverse[0, 1] * y + inverse[0, 2]) / denominator
+            v = (inverse[1, 0] * x + inverse[1, 1] * y + inverse[1, 2]) / denominator
+            if not (-1.0 < u < creative_width and -1.0 < v < creative_height):
+                continue
+            u0 = math.floor(u)
+            v0 = math.floor(v)
+            fu = u - u0
+            fv = v - v0
+            for channel in range(4):
+                sample[channel] = 0.0
+            for corner in range(4):
+                column = u0 + (corner & 1)
+                row = v0 + (corner >> 1)
+                if column < 0 or column >= creative_width or row < 0 or row >= creative_height:
+                    continue
+                weight = (fu if corner & 1 else 1.0 - fu) * (fv if corner >> 1 else 1.0 - fv)
+                for channel in range(4):
+                    sample[channel] += weight * creative[row, column, channel]
+            alpha = int(math.floor(sample[3] + 0.5))
+            if alpha == 0 and sample[0] + sample[1] + sample[2] < 0.5:
+                continue
+            for channel in range(3):
+                value = (int(region[y, x, channel]) * (255 - alpha) + 127) // 255
+                value += int(math.floor(sample[channel] + 0.5))
+                region[y, x, channel] = min(value, 255)
+
+
+if numba is not None:
+    _warp_blend_compiled = numba.njit(cache=True, nogil=True)(_warp_blend_loops)
+else:
+    _warp_blend_compiled = None
+
+
+def warp_blend_numba(region: np.ndarray, creative: np.ndarray, homography: np.ndarray) -> None:
+    """Warp a creative into a frame region and blend it in place, with the compiled loop.
+
+    Falls back to `warp_blend_numpy` when Numba is not installed. The arguments are those of
+    `warp_blend_numpy`.
+    """
+    if _warp_blend_compiled is None:
+        warp_blend_numpy(region, creative, homography)
+        return
+    _warp_blend_compiled(region, creative, np.linalg.inv(homography))
+
+
+FUSED_KERNELS: Dict[str, Callable[[np.ndarray, np.ndarray, np.ndarray], None]] = {
+    "numpy": warp_blend_numpy,
+    "numba": warp_blend_numba,
+}
+
+
+def get_kernel(name: str) -> Optional[Callable[[np.ndarray, np.ndarray, np.ndarray], None]]:
+    """Return the fused kernel of a backend, or None for the OpenCV backend.
+
+    Raises:
+        ValueError: If the backend is unknown.
+    """
+    return FUSED_KERNELS.get(resolve_kernel(name))
+
+
+def kernel_parity(cases: int = 20, size: int = 96, seed: int = 0) -> int:
+    """Compare the NumPy kernel with the loop kernel on random placements.
+
+    The loop kernel runs compiled when Numba is installed and as plain Python otherwise, so the
+    check always exercises both implementations.
+
+    Args:
+        cases (int, optional): The number of random placements to compare.
+        size (int, optional): The side of the square frame regions, in pixels.
+        seed (int, optional): The seed of the random placements.
+
+    Returns:
+        int: The largest difference between the two outputs, in levels.
+
+    Raises:
+        KernelParityError: If a difference exceeds `PARITY_TOLERANCE`.
+    """
+    rng = np.random.default_rng(seed)
+    loops = _warp_blend_compiled or _warp_blend_loops
+    worst = 0
+    for _ in range(cases):
+        creative = rng.integers(0, 256, (int(rng.integers(8, 64)), int(rng.integers(8, 64)), 4))
+        creative = creative.astype(np.uint8)
+        creative[..., :3] = creative[..., :3].astype(np.uint16) * creative[..., 3:4] // 255
+        frame = rng.integers(0, 256, (size, size, 3)).astype(np.uint8)
+        creative_height, creative_width = creative.shape[:2]
+        # A random perspective placement, partly outside the region
+        source = np.array(
+            [[0, 0], [creative_width, 0], [creative_width, creative_height], [0, creative_height]],
+            dtype=np.float64,
+        )
+        target = rng.uniform(-0.2 * size, 1.2 * size, (4, 2))
+        homography = _homography(source, target)
+
+        expected = frame.copy()
+        warp_blend_numpy(expected, creative, homography)
+        actual = frame.copy()
+        loops(actual, creative, np.linalg.inv(homography))
+        difference = int(np.abs(expected.astype(np.int16) - actual.astype(np.int16)).max())
+        if difference > PARITY_TOLERANCE:
+            raise KernelParityError(f"Kernels differ by {difference} levels")
+        worst = max(worst, difference)
+    return worst
+
+
+def _homography(source: np.ndarray, target: np.ndarray) -> np.ndarray:
+    rows = []
+    for (x, y), (u, v) in zip(source, target):
+        rows.append([x, y, 1, 0, 0, 0, -x * u, -y * u, u])
+        rows.append([0, 0, 0, x, y, 1, -x * v, -y * v, v])
+    system = np.array(rows, dtype=np.float64)
+    solution = np.linalg.solve(system[:, :8], system[:, 8])
+    return np.append(solution, 1.0).reshape(3, 3)
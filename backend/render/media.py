@@ -0,0 +1,241 @@
+"""Media Preparation Module
+
+This module generates the lightweight files the annotation UI works with, so scrubbing never
+touches the full-resolution upload. Every uploaded video gets a low-resolution, all-intra proxy,
+in which any frame decodes on its own, and a thumbnail sprite sheet with an index mapping
+timestamps to tiles. The files are keyed by the digest of the source video, so identical uploads
+share them and they never change once written.
+
+Key Features:
+- Encodes an all-intra H.264 proxy with FFmpeg.
+- Builds a JPEG sprite sheet from the proxy, with cheap seeks thanks to its intra frames.
+- Records the source and proxy sizes so proxy coordinates map back to full-resolution frames.
+
+Requirements:
+The `ffmpeg` executable must be on the `PATH`.
+
+Example:
+    from backend.render.media import prepare_media
+
+    index = prepare_media(project.file_path)
+"""
+
+import json
+import math
+import os
+import shutil
+import subprocess
+import tempfile
+from typing import Callable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from backend.storage import blob_key, derived_key, get_storage_backend
+
+from .engine import FALLBACK_FPS, RenderError
+from .segments import ffmpeg_available
+
+PROXY_HEIGHT = 360
+SPRITE_TILE_WIDTH = 160
+SPRITE_COLUMNS = 10
+SPRITE_MAX_TILES = 200
+SPRITE_MIN_INTERVAL = 1.0
+SPRITE_QUALITY = 80
+
+
+def build_proxy(source_path: str, output_path: str, height: int = PROXY_HEIGHT) -> None:
+    """Encode a low-resolution proxy in which every frame is a keyframe.
+
+    Args:
+        source_path (str): The full-resolution video.
+        output_path (str): The MP4 file to write.
+        height (int, optional): The proxy height; smaller sources keep their size.
+
+    Raises:
+        RenderError: If FFmpeg is missing or fails.
+    """
+    if not ffmpeg_available():
+        raise RenderError("FFmpeg is required to generate proxies")
+    result = subprocess.run(
+        [
+            "ffmpeg",
+            "-v",
+            "error",
+            "-y",
+            "-i",
+            source_path,
+            "-an",
+            "-vf",
+            f"scale=-2:'min({height},ih)'",
+            "-c:v",
+            "libx264",
+            "-preset",
+            "veryfast",
+            "-crf",
+            "28",
+            # A GOP of one frame makes the proxy all-intra, so any seek decodes a single frame
+            "-g",
+            "1",
+            "-pix_fmt",
+            "yuv420p",
+            "-movflags",
+            "+faststart",
+            "-f",
+            "mp4",
+            output_path,
+        ],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RenderError(f"Unable to generate proxy: {result.stderr.strip()}")
+
+
+def video_size(path: str) -> Tuple[int, int, float, int]:
+    """Return the width, height, frame rate and frame count of a video."""
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise RenderError(f"Unable to open video {path}")
+    try:
+        return (
+            int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            capture.get(cv2.CAP_PROP_FPS) or FALLBACK_FPS,
+            int(capture.get(cv2.CAP_PROP_FRAME_COUNT)),
+        )
+    finally:
+        capture.release()
+
+
+def build_sprite(
+    proxy_path: str,
+    tile_width: int = SPRITE_TILE_WIDTH,
+    columns: int = SPRITE_COLUMNS,
+    max_tiles: int = SPRITE_MAX_TILES,
+) -> Tuple[bytes, dict]:
+    """Build a thumbnail sprite sheet from an all-intra proxy.
+
+    Args:
+        proxy_path (str): The proxy video.
+        tile_width (int, optional): The width of a thumbnail.
+        columns (int, optional): The number of thumbnails per sprite row.
+        max_tiles (int, optional): The maximum number of thumbnails.
+
+    Returns:
+        Tuple[bytes, dict]: The JPEG sprite sheet and its index. The index lists the time of
+        every tile with its position in the sheet.
+    """
+    width, height, fps, frame_count = video_size(proxy_path)
+    duration = frame_count / fps
+    interval = max(duration / max_tiles, SPRITE_MIN_INTERVAL)
+    count = max(1, min(max_tiles, int(math.ceil(duration / interval))))
+    tile_height = max(1, int(round(height * tile_width / max(width, 1))))
+    rows = int(math.ceil(count / columns))
+    sheet = np.zeros((rows * tile_height, columns * tile_width, 3), dtype=np.uint8)
+
+    tiles = []
+    capture = cv2.VideoCapture(proxy_path)
+    try:
+        for index in range(count):
+            timestamp = index * interval
+            capture.set(cv2.CAP_PROP_POS_FRAMES, min(int(timestamp * fps), frame_count - 1))
+            ok, frame = capture.read()
+            if not ok:
+                break
+            x = (index % columns) * tile_width
+            y = (index // columns) * tile_height
+            sheet[y : y + tile_height, x : x + tile_width] = cv2.resize(
+                frame, (tile_width, tile_height), interpolation=cv2.INTER_AREA
+            )
+            tiles.append({"t": round(timestamp, 3), "x": x, "y": y})
+    finally:
+        capture.release()
+
+    ok, encoded = cv2.imencode(".jpg", sheet, [cv2.IMWRITE_JPEG_QUALITY, SPRITE_QUALITY])
+    if not ok:
+        raise RenderError("Unable to encode sprite sheet")
+    index = {
+        "interval": interval,
+        "columns": columns,
+        "tile_width": tile_width,
+        "tile_height": tile_height,
+        "tiles": tiles,
+    }
+    return encoded.tobytes(), index
+
+
+def prepare_media(
+    digest: str, progress: Optional[Callable[[int, int], None]] = None
+) -> dict:
+    """Generate and store the proxy and sprite sheet of a stored video.
+
+    Files that already exist are not generated again, since they depend only on the content.
+
+    Args:
+        digest (str): The blob key of the video, such as `Project.file_path`.
+        progress (Callable, optional): Called with the steps done and the number of steps.
+
+    Returns:
+        dict: The sprite index, which also holds the source and proxy sizes.
+    """
+    storage = get_storage_backend()
+    index_key = derived_key(digest, "sprite.json")
+    if storage.exists(index_key):
+        return load_media_index(digest)
+
+    working_directory = tempfile.mkdtemp(prefix="media-")
+    proxy_path = os.path.join(working_directory, "proxy.mp4")
+    try:
+        with storage.local_copy(blob_key(digest)) as source_path:
+            source_width, source_height, _, _ = video_size(source_path)
+            build_proxy(source_path, proxy_path)
+        if progress is not None:
+            progress(1, 2)
+
+        sprite, index = build_sprite(proxy_path)
+        proxy_width, proxy_height, fps, frame_count = video_size(proxy_path)
+        index.update(
+            {
+                "duration": frame_count / fps,
+                "source": {"width": source_width, "height": source_height},
+                "proxy": {"width": proxy_width, "height": proxy_height},
+            }
+        )
+        sprite_path = os.path.join(working_directory, "sprite.jpg")
+        with open(sprite_path, "wb") as file:
+            file.write(sprite)
+        index_path = os.path.join(working_directory, "sprite.json")
+        with open(index_path, "w") as file:
+            json.dump(index, file)
+
+        storage.put_file(proxy_path, derived_key(digest, "proxy.mp4"), move=True)
+        storage.put_file(sprite_path, derived_key(digest, "sprite.jpg"), move=True)
+        # The index is written last, so its presence means every file is complete
+        storage.put_file(index_path, index_key, move=True)
+        if progress is not None:
+            progress(2, 2)
+    finally:
+        shutil.rmtree(working_directory, ignore_errors=True)
+    return index
+
+
+def load_media_index(digest: str) -> Optional[dict]:
+    """Return the sprite index of a stored video, or None if it was not generated yet."""
+    storage = get_storage_backend()
+    key = derived_key(digest, "sprite.json")
+    if not storage.exists(key):
+        return None
+    file = storage.open_read(key)
+    try:
+        return json.load(file)
+    finally:
+        file.close()
+
+
+def proxy_scale(index: dict) -> Tuple[float, float]:
+    """Return the factors mapping proxy coordinates to full-resolution frame coordinates."""
+    return (
+        index["source"]["width"] / index["proxy"]["width"],
+        index["source"]["height"] / index["proxy"]["height"],
+    )
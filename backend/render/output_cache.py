@@ -0,0 +1,198 @@
+"""Render Output Cache Module
+
+This module keeps finished renders keyed by what they were rendered from, so an identical
+`/apply` request costs nothing. The key hashes the source video digest, the normalized keyframes
+of the project, the content digests of their creatives and the settings that change the output.
+Cached videos live in storage under a key derived from the render key and are indexed by the
+`RenderCacheEntry` table, so the cache survives restarts and is shared by every process. When the
+cached videos exceed their budget, the least recently used ones are deleted.
+
+Key Features:
+- Computes a stable render key that ignores annotation order and URL changes that keep the
+  creative content.
+- Answers lookups only when the cached video still exists in storage.
+- Gives every render job its own output key, so jobs rendering the same key at once never write
+  the same object; the first to finish is kept.
+- Evicts the least recently used renders over a size budget, except the outputs of jobs that
+  finished less than `JOB_OUTPUT_RETENTION` ago.
+
+Configuration (read through `Settings`):
+- RENDER_CACHE_MAX_BYTES: Budget of the cached renders. Defaults to 20 GiB; 0 disables the cache.
+
+Example:
+    from backend.render.output_cache import cache_settings, lookup_render, render_cache_key
+
+    key = render_cache_key(project.file_path, placements, cache_settings(job.options))
+    entry = lookup_render(key)
+"""
+
+import hashlib
+import json
+import time
+from typing import Iterable, Optional
+
+import numpy as np
+from sqlalchemy.exc import IntegrityError
+
+from backend.models.database import db, transactional
+from backend.models.render_cache import RenderCacheEntry
+from backend.models.render_job import RenderJob
+from backend.storage import get_storage_backend
+
+from .creative_cache import get_creative_cache
+from .engine import DEFAULT_FOURCC
+from .incremental import RENDER_VERSION
+from .kernels import DEFAULT_KERNEL
+from .placements import Placement
+from .presets import DEFAULT_PRESET
+
+CACHE_PREFIX = "renders/cache"
+# Cached renders that jobs finished within this many seconds point to are never evicted
+JOB_OUTPUT_RETENTION = 7 * 24 * 60 * 60
+# The render options that change the rendered pixels, with their defaults
+CACHED_OPTIONS = {
+    "interpolation": "linear",
+    "smart": False,
+    "kernel": DEFAULT_KERNEL,
+    "preset": DEFAULT_PRESET,
+    "frame_step": 1,
+}
+
+
+def render_cache_key(
+    source_key: str,
+    placements: Iterable[Placement],
+    render_settings: dict,
+    fetch: bool = True,
+) -> Optional[str]:
+    """Return the hex SHA-256 digest identifying the output of a render.
+
+    Args:
+        source_key (str): The blob key of the source video, itself a content digest.
+        placements (Iterable[Placement]): The keyframes of the project.
+        render_settings (dict): The options that change the rendered pixels, such as the
+        interpolation method.
+        fetch (bool, optional): Whether creatives whose digest is not cached may be fetched.
+        Request handlers pass False, so they never wait on, or reach out to, creative hosts.
+
+    Returns:
+        str: The render key, or None if `fetch` is False and a creative digest is not cached.
+    """
+    creative_cache = get_creative_cache()
+    digest = creative_cache.digest if fetch else creative_cache.cached_digest
+    keyframes = []
+    for placement in placements:
+        creative_digest = digest(placement.image_url)
+        if creative_digest is None:
+            return None
+        keyframes.append(
+            [
+                placement.track,
+                round(placement.timestamp, 6),
+                np.round(placement.quad.astype(np.float64), 3).tolist(),
+                creative_digest,
+                placement.z,
+                placement.hidden,
+            ]
+        )
+    keyframes.sort()
+    description = {
+        "version": RENDER_VERSION,
+        "fourcc": DEFAULT_FOURCC,
+        "source": source_key,
+        "settings": render_settings,
+        "placements": keyframes,
+    }
+    return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+
+def cache_settings(options: dict) -> dict:
+    """Return the render options that are part of the render key, with defaults filled in."""
+    return {name: options.get(name, default) for name, default in CACHED_OPTIONS.items()}
+
+
+def cached_output_key(key: str, job_id: str) -> str:
+    """Return the storage key a job writes the cached render with a render key to."""
+    return f"{CACHE_PREFIX}/{key[:2]}/{key}/{job_id}.mp4"
+
+
+@transactional
+def lookup_render(key: str) -> Optional[RenderCacheEntry]:
+    """Return the cached render with a render key and mark it as used, or None on a miss."""
+    entry = db.session.get(RenderCacheEntry, key)
+    if entry is None:
+        return None
+    if not get_storage_backend().exists(entry.output_key):
+        db.session.delete(entry)
+        return None
+    entry.hits += 1
+    entry.last_used_at = time.time()
+    return entry
+
+
+def record_render(key: str, output_key: str, max_bytes: int) -> RenderCacheEntry:
+    """Index a finished render and evict the least recently used ones over the budget.
+
+    If another job already cached a render with the same key, its video is kept and the one
+    at `output_key` is deleted; the job should then point to the entry's `output_key`.
+
+    Args:
+        key (str): The render key.
+        output_key (str): The storage key of the rendered video.
+        max_bytes (int): The budget of all cached renders.
+
+    Returns:
+        RenderCacheEntry: The entry of the render.
+    """
+    for _ in range(2):
+        try:
+            return _record_render(key, output_key, max_bytes)
+        except IntegrityError:
+            # Another job indexed the same key concurrently; keep its render instead
+            continue
+    raise RuntimeError(f"Failed to record render {key}")
+
+
+@transactional
+def _record_render(key: str, output_key: str, max_bytes: int) -> RenderCacheEntry:
+    storage = get_storage_backend()
+    now = time.time()
+    entry = db.session.get(RenderCacheEntry, key)
+    if entry is not None and entry.output_key != output_key and storage.exists(entry.output_key):
+        storage.delete(output_key)
+        entry.last_used_at = now
+        return entry
+    if entry is None:
+        entry = RenderCacheEntry(key=key, created_at=now, hits=0)
+        db.session.add(entry)
+    entry.output_key = output_key
+    entry.size = storage.size(output_key)
+    entry.last_used_at = now
+    db.session.flush()
+
+    total = db.session.query(db.func.coalesce(db.func.sum(RenderCacheEntry.size), 0)).scalar()
+    if total > max_bytes:
+        # Jobs hand their output key out to clients, so recent ones keep their video
+        referenced = {
+            row.output_key
+            for row in db.session.query(RenderJob.output_key).filter(
+                RenderJob.output_key.like(f"{CACHE_PREFIX}/%"),
+                db.or_(
+                    RenderJob.finished_at.is_(None),
+                    RenderJob.finished_at >= now - JOB_OUTPUT_RETENTION,
+                ),
+            )
+        }
+        for evicted in (
+            RenderCacheEntry.query.filter(RenderCacheEntry.key != key)
+            .order_by(RenderCacheEntry.last_used_at)
+            .all()
+        ):
+            if total <= max_bytes:
+                break
+            if evicted.output_key in referenced:
+                continue
+            storage.delete(evicted.output_key)
+            total -= evicted.size
+            db.session.delete(evicted)
+    return entry
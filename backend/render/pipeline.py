@@ -0,0 +1,207 @@
+"""Frame Pipeline Module
+
+This module runs the decode, composite and encode stages of a render on their own threads, so
+decoding and encoding, which OpenCV and FFmpeg run without holding the GIL, overlap with
+compositing. Frames live in a ring of preallocated arrays: the stages hand each other slot
+indices through bounded queues, the decoder decodes into a free slot, the compositor draws on it
+in place and the encoder returns it to the ring once written. No frame is allocated or copied
+per frame, and when a stage falls behind the stages before it wait for a free slot, so memory
+never exceeds the ring.
+
+Key Features:
+- Decodes, composites and encodes on three threads connected by bounded queues.
+- Reuses a fixed ring of frame arrays for the whole render.
+- Skips source frames and downscales decoded frames into the ring, for draft renders.
+- Stops every stage on the first error and raises it in the calling thread.
+- Measures the busy time of each stage, to show which one limits the throughput.
+
+Example:
+    from backend.render.pipeline import FramePipeline
+
+    pipeline = FramePipeline(capture, writer, composite, (1080, 1920, 3), ring_frames=6)
+    frames, stage_seconds, seconds = pipeline.run()
+"""
+
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+STAGES = ("decode", "composite", "encode")
+DEFAULT_RING_FRAMES = 6
+# How often a stage blocked on a queue checks whether another stage failed
+POLL_INTERVAL = 0.1
+
+
+class _Stopped(Exception):
+    """Raised inside a stage when another stage failed."""
+
+
+class FramePipeline:
+    """Runs a render through decoder, compositor and encoder threads sharing a frame ring.
+
+    Attributes:
+        capture (cv2.VideoCapture): The opened source, positioned on the first frame to render.
+        writer: The opened video writer, with the `write` method of `cv2.VideoWriter`.
+        composite (Callable): Called with the position of a frame in the source, relative to
+        the first frame of the render, and the frame, which it modifies in place.
+        frames (List[np.ndarray]): The preallocated frame ring.
+        frame_step (int): Render every `frame_step`-th source frame.
+        output_size (Tuple[int, int]): The (width, height) decoded frames are resized to, or
+        None to keep the source size.
+    """
+
+    def __init__(
+        self,
+        capture,
+        writer,
+        composite: Callable[[int, np.ndarray], None],
+        frame_shape: Tuple[int, int, int],
+        ring_frames: int = DEFAULT_RING_FRAMES,
+        frame_step: int = 1,
+        output_size: Optional[Tuple[int, int]] = None,
+    ):
+        self.capture = capture
+        self.writer = writer
+        self.composite = composite
+        self.frame_step = frame_step
+        self.output_size = output_size
+        self.frames: List[np.ndarray] = [
+            np.empty(frame_shape, dtype=np.uint8) for _ in range(max(ring_frames, 2))
+        ]
+        self._free: queue.Queue = queue.Queue()
+        for slot in range(len(self.frames)):
+            self._free.put(slot)
+        self._decoded: queue.Queue = queue.Queue(maxsize=len(self.frames))
+        self._composited: queue.Queue = queue.Queue(maxsize=len(self.frames))
+        self._stop = threading.Event()
+        self._errors: List[BaseException] = []
+        self._busy = {stage: 0.0 for stage in STAGES}
+
+    def run(
+        self,
+        max_frames: Optional[int] = None,
+        progress: Optional[Callable[[int], None]] = None,
+    ) -> Tuple[int, Dict[str, float], float]:
+        """Render until the source ends or `max_frames` source frames are consumed.
+
+        The calling thread runs the encoder.
+
+        Args:
+            max_frames (int, optional): The number of source frames to render, None for all.
+            progress (Callable, optional): Called with the number of frames written.
+
+        Returns:
+            Tuple[int, Dict[str, float], float]: The frames written, the busy seconds of each
+            stage and the wall-clock seconds of the pipeline.
+
+        Raises:
+            Exception: The first error raised by any stage.
+        """
+        started = time.perf_counter()
+        threads = [
+            threading.Thread(target=self._guard, args=(self._decode, max_frames), daemon=True),
+            threading.Thread(target=self._guard, args=(self._composite_frames,), daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+        written = 0
+        try:
+            while True:
+                item = self._take(self._composited)
+                if item is None:
+                    break
+                slot, _ = item
+                stage_started = time.perf_counter()
+                self.writer.write(self.frames[slot])
+                self._busy["encode"] += time.perf_counter() - stage_started
+                self._free.put(slot)
+                written += 1
+                if progress is not None:
+                    progress(written)
+        except _Stopped:
+            pass
+        except BaseException as e:
+            self._errors.append(e)
+        finally:
+            # Lets the other stages exit if the encoder failed; a no-op after a full render
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+        if self._errors:
+            raise self._errors[0]
+        return written, dict(self._busy), time.perf_counter() - started
+
+    def _guard(self, stage: Callable, *args) -> None:
+        try:
+            stage(*args)
+        except _Stopped:
+            pass
+        except BaseException as e:
+            self._errors.append(e)
+            self._stop.set()
+
+    def _decode(self, max_frames: Optional[int]) -> None:
+        position = 0
+        # The full-size frame of downscaled renders, reused like the ring
+        source_frame = None
+        while max_frames is None or position < max_frames:
+            slot = self._take(self._free)
+            stage_started = time.perf_counter()
+            # Skipped frames are only grabbed, which spares their conversion to BGR
+            skipped = self.frame_step - 1 if position > 0 else 0
+            ok = all(self.capture.grab() for _ in range(skipped))
+            if ok and self.output_size is None:
+                # Passing the slot lets OpenCV decode into it instead of allocating a frame
+                ok, frame = self.capture.read(self.frames[slot])
+            elif ok:
+                ok, source_frame = self.capture.read(source_frame)
+                if ok:
+                    frame = cv2.resize(
+                        source_frame,
+                        self.output_size,
+                        dst=self.frames[slot],
+                        interpolation=cv2.INTER_AREA,
+                    )
+            self._busy["decode"] += time.perf_counter() - stage_started
+            if not ok:
+                self._free.put(slot)
+                break
+            if frame is not self.frames[slot]:
+                # The decoder could not reuse the slot, for example after a size change
+                self.frames[slot] = frame
+            self._give(self._decoded, (slot, position))
+            position += self.frame_step
+        self._give(self._decoded, None)
+
+    def _composite_frames(self) -> None:
+        while True:
+            item = self._take(self._decoded)
+            if item is None:
+                self._give(self._composited, None)
+                return
+            slot, position = item
+            stage_started = time.perf_counter()
+            self.composite(position, self.frames[slot])
+            self._busy["composite"] += time.perf_counter() - stage_started
+            self._give(self._composited, item)
+
+    def _take(self, source: queue.Queue):
+        while True:
+            try:
+                return source.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                if self._stop.is_set():
+                    raise _Stopped()
+
+    def _give(self, target: queue.Queue, item) -> None:
+        while True:
+            try:
+                target.put(item, timeout=POLL_INTERVAL)
+                return
+            except queue.Full:
+                if self._stop.is_set():
+                    raise _Stopped()
@@ -0,0 +1,150 @@
+"""Placement Module
+
+This module converts `Annotation` rows into the placements rendered by the engine. A placement
+is one keyframe: the quad a creative occupies from a given timestamp. Keyframes sharing a track,
+the `track` key of `points` or else the `image_url`, describe one moving placement. The `z` key
+of `points` orders overlapping placements: higher values are drawn on top, and placements with
+the same `z` are drawn in track order. A keyframe whose `points` have `"hidden": true` ends its
+track: the placement is not drawn from its timestamp until the next keyframe of the track, so a
+placement can be confined to a few shots of a video. A hidden keyframe needs no corners and no
+creative; it keeps those of the keyframe before it.
+
+Key Features:
+- Converts annotations into placements sorted by timestamp.
+- Groups placements into tracks of keyframes.
+- Reads the z-order of every keyframe.
+- Reads the hidden keyframes that end a track.
+- Selects the keyframes needed to render one segment of a video.
+
+Example:
+    from backend.render.placements import group_tracks, placements_from_annotations
+
+    tracks = group_tracks(placements_from_annotations(annotations))
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from .geometry import parse_quad
+
+
+@dataclass(frozen=True)
+class Placement:
+    """A keyframe of an ad placement.
+
+    Attributes:
+        track (str): The placement the keyframe belongs to.
+        timestamp (float): The time in seconds at which the keyframe starts.
+        quad (np.ndarray): The (4, 2) corners of the placement in frame pixels.
+        image_url (str): The URL of the creative shown in the placement.
+        z (int): The stacking order of the placement, higher values drawn on top.
+        hidden (bool): Whether the keyframe hides the placement until the next keyframe of its
+        track. A hidden keyframe repeats the quad, creative and z-order of the keyframe before
+        it, so the placement holds still until it disappears.
+    """
+
+    track: str
+    timestamp: float
+    quad: np.ndarray = field(compare=False)
+    image_url: str
+    z: int = 0
+    hidden: bool = False
+
+
+def track_of(points, image_url: str) -> str:
+    """Return the track an annotation belongs to."""
+    if isinstance(points, dict) and points.get("track") is not None:
+        return str(points["track"])
+    return image_url
+
+
+def z_order_of(points) -> int:
+    """Return the stacking order of an annotation, 0 unless `points` has a `z` key.
+
+    Raises:
+        ValueError: If the `z` key is not an integer.
+    """
+    if not isinstance(points, dict) or points.get("z") is None:
+        return 0
+    z = points["z"]
+    if isinstance(z, bool) or not isinstance(z, (int, float)) or int(z) != z:
+        raise ValueError(f"A placement z-order must be an integer, got {z!r}")
+    return int(z)
+
+
+def is_hidden(points) -> bool:
+    """Return whether an annotation hides its track, with a `hidden` key set to true."""
+    return isinstance(points, dict) and points.get("hidden") is True
+
+
+def placements_from_annotations(annotations: Iterable) -> List[Placement]:
+    """Convert annotations into placements sorted by timestamp.
+
+    Hidden keyframes take the quad, creative and z-order of the keyframe before them in their
+    track. A hidden keyframe that starts a track changes nothing and is left out.
+
+    Args:
+        annotations (Iterable[Annotation]): The annotations of a project.
+
+    Returns:
+        List[Placement]: The placements, sorted by timestamp.
+
+    Raises:
+        ValueError: If an annotation does not describe a valid quad.
+    """
+    ordered = sorted(annotations, key=lambda annotation: float(annotation.timestamp or 0.0))
+    placements = []
+    previous: Dict[str, Placement] = {}
+    for annotation in ordered:
+        track = track_of(annotation.points, annotation.image_url)
+        timestamp = float(annotation.timestamp or 0.0)
+        if is_hidden(annotation.points):
+            before = previous.get(track)
+            if before is None:
+                continue
+            placement = Placement(
+                track=track,
+                timestamp=timestamp,
+                quad=before.quad,
+                image_url=before.image_url,
+                z=before.z,
+                hidden=True,
+            )
+        else:
+            placement = Placement(
+                track=track,
+                timestamp=timestamp,
+                quad=parse_quad(annotation.points),
+                image_url=annotation.image_url,
+                z=z_order_of(annotation.points),
+            )
+        previous[track] = placement
+        placements.append(placement)
+    return placements
+
+
+def group_tracks(placements: Iterable[Placement]) -> Dict[str, List[Placement]]:
+    """Group placements by track, each track sorted by timestamp."""
+    tracks: Dict[str, List[Placement]] = {}
+    for placement in sorted(placements, key=lambda p: p.timestamp):
+        tracks.setdefault(placement.track, []).append(placement)
+    return tracks
+
+
+def placements_in_range(
+    placements: Iterable[Placement], start: float, end: float
+) -> List[Placement]:
+    """Return the keyframes needed to render the time range from `start` to `end` seconds.
+
+    Besides the keyframes inside the range, each track keeps two keyframes on either side of it,
+    enough for spline interpolation at the range edges to match a full render.
+    """
+    needed = []
+    for keyframes in group_tracks(placements).values():
+        before = [k for k in keyframes if k.timestamp < start][-2:]
+        inside = [k for k in keyframes if start <= k.timestamp <= end]
+        after = [k for k in keyframes if k.timestamp > end][:2]
+        needed.extend(before + inside + after)
+    return sorted(needed, key=lambda placement: placement.timestamp)
@@ -0,0 +1,121 @@
+"""Render Preset Module
+
+This module defines the quality presets of a render. While placements are being adjusted, a
+draft render shows where the creatives land at a fraction of the cost of the final one: it
+composites and encodes at reduced resolution, samples creatives without mip levels, encodes with
+the fastest encoder settings and can skip frames. The final preset renders at full resolution
+with mip-mapped sampling, and is what renders default to.
+
+Key Features:
+- Describes each preset as an immutable, picklable value shared by every render path.
+- Scales placements into the output resolution, so frames are composited at that resolution.
+- Selects the sampling filter, mip-mapping, frame step and encoder settings of a render.
+- Gives a stable description of a preset for render cache keys.
+
+Example:
+    from backend.render.presets import get_preset
+
+    preset = get_preset("draft", frame_step=2)
+    width, height = preset.output_size(3840, 2160)
+"""
+
+import dataclasses
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple
+
+import cv2
+
+from .placements import Placement
+
+DEFAULT_PRESET = "final"
+
+
+@dataclass(frozen=True)
+class RenderPreset:
+    """The quality settings of a render.
+
+    Attributes:
+        name (str): The name of the preset.
+        scale (float): The size of the output relative to the source.
+        sampling (int): The OpenCV filter creatives are sampled with.
+        mipmaps (bool): Whether creatives are sampled from their closest mip level.
+        frame_step (int): Render every `frame_step`-th source frame, at a frame rate divided by
+        the step.
+        encoder_preset (str): The x264 preset of the encoder, or None for the default OpenCV
+        writer.
+        encoder_crf (int): The x264 constant rate factor, when `encoder_preset` is set.
+    """
+
+    name: str
+    scale: float = 1.0
+    sampling: int = cv2.INTER_LINEAR
+    mipmaps: bool = True
+    frame_step: int = 1
+    encoder_preset: Optional[str] = None
+    encoder_crf: int = 23
+
+    @property
+    def is_full_quality(self) -> bool:
+        """Return whether the output keeps the resolution and frames of the source."""
+        return self.scale == 1.0 and self.frame_step == 1
+
+    def output_size(self, width: int, height: int) -> Tuple[int, int]:
+        """Return the output frame size for a source frame size, rounded to even numbers."""
+        if self.scale == 1.0:
+            return width, height
+        return (
+            max(2, int(round(width * self.scale / 2)) * 2),
+            max(2, int(round(height * self.scale / 2)) * 2),
+        )
+
+    def scale_placements(self, placements: Iterable[Placement]) -> List[Placement]:
+        """Return placements with their quads moved into the output resolution."""
+        if self.scale == 1.0:
+            return list(placements)
+        return [
+            dataclasses.replace(placement, quad=placement.quad * self.scale)
+            for placement in placements
+        ]
+
+    def describe(self) -> dict:
+        """Return the settings of the preset, for render cache keys."""
+        return dataclasses.asdict(self)
+
+
+PRESETS = {
+    "draft": RenderPreset(
+        name="draft",
+        scale=0.5,
+        sampling=cv2.INTER_NEAREST,
+        mipmaps=False,
+        encoder_preset="ultrafast",
+        encoder_crf=28,
+    ),
+    "final": RenderPreset(name="final"),
+}
+
+
+def get_preset(name: str = DEFAULT_PRESET, frame_step: Optional[int] = None) -> RenderPreset:
+    """Return a render preset, optionally with another frame step.
+
+    Args:
+        name (str, optional): "draft" or "final". Defaults to "final".
+        frame_step (int, optional): Render every `frame_step`-th frame. Only draft renders may
+        skip frames.
+
+    Returns:
+        RenderPreset: The preset.
+
+    Raises:
+        ValueError: If the preset is unknown or the frame step is invalid for it.
+    """
+    if name not in PRESETS:
+        raise ValueError(f"Unknown render preset: {name}")
+    preset = PRESETS[name]
+    if frame_step is None or frame_step == preset.frame_step:
+        return preset
+    if frame_step < 1:
+        raise ValueError("frame_step must be a positive integer")
+    if name != "draft":
+        raise ValueError("Only draft renders can skip frames")
+    return dataclasses.replace(preset, frame_step=frame_step)
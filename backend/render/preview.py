@@ -0,0 +1,279 @@
+"""Frame Preview Module
+
+This module composites a single frame of a project at a chosen timestamp, so users can check
+their placements without queueing a full render. Decoding starts at the keyframe found in the
+stored keyframe index and stops at the requested frame, and the decoded group of pictures (GOP)
+is kept in memory, so scrubbing to nearby timestamps decodes nothing or only the few frames
+after the ones already cached.
+
+Key Features:
+- Seeks through the keyframe index, decoding only the frames between the keyframe and the target.
+- Never probes a video in the request: until the media job has stored its keyframe index, a
+  preview raises `MediaNotReady`.
+- Caches decoded GOPs in a memory-bounded LRU and keeps recently used sources open.
+- Applies the interpolated quads of the frame with creatives from the creative cache.
+- Encodes the frame as JPEG or WebP, optionally downscaled.
+
+Example:
+    from backend.render.preview import render_preview
+
+    image, mimetype = render_preview(project.file_path, annotations, 12.5, image_format="webp")
+"""
+
+import threading
+from collections import OrderedDict
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from backend.storage import blob_key, get_storage_backend
+from backend.utils import get_settings
+
+from .compositor import composite_layers
+from .creative_cache import get_creative_cache
+from .engine import RenderError
+from .interpolation import build_timeline
+from .placements import placements_from_annotations, placements_in_range
+from .probe import KeyframeIndex, load_keyframe_index
+
+PREVIEW_FORMATS = {
+    "jpeg": (".jpg", "image/jpeg", cv2.IMWRITE_JPEG_QUALITY),
+    "webp": (".webp", "image/webp", cv2.IMWRITE_WEBP_QUALITY),
+}
+DEFAULT_QUALITY = 85
+
+
+class MediaNotReady(Exception):
+    """Raised when a video has no keyframe index yet, because its media job has not run."""
+
+
+@dataclass
+class DecodedGop:
+    """The frames decoded so far from one keyframe.
+
+    Attributes:
+        keyframe (int): The frame index of the keyframe the GOP starts with.
+        frames (List[np.ndarray]): The consecutive decoded frames, keyframe first.
+    """
+
+    keyframe: int
+    frames: List[np.ndarray] = field(default_factory=list)
+
+    @property
+    def nbytes(self) -> int:
+        """Return the memory used by the decoded frames."""
+        return sum(frame.nbytes for frame in self.frames)
+
+
+class _OpenSource:
+    """A source video kept open between previews, with its read position."""
+
+    def __init__(self, digest: str):
+        self.lock = threading.Lock()
+        self.resources = ExitStack()
+        path = self.resources.enter_context(get_storage_backend().local_copy(blob_key(digest)))
+        self.capture = cv2.VideoCapture(path)
+        if not self.capture.isOpened():
+            self.resources.close()
+            raise RenderError(f"Unable to open video {digest}")
+        self.position = 0
+
+    def close(self) -> None:
+        with self.lock:
+            self.capture.release()
+            self.resources.close()
+
+
+class FrameCache:
+    """Decodes single frames through a keyframe index and caches the decoded GOPs.
+
+    Attributes:
+        max_bytes (int): The memory budget of the cached GOPs.
+        max_sources (int): The number of source videos kept open.
+    """
+
+    def __init__(self, max_bytes: int, max_sources: int):
+        self.max_bytes = max_bytes
+        self.max_sources = max_sources
+        self._gops: "OrderedDict[Tuple[str, int], DecodedGop]" = OrderedDict()
+        self._gop_bytes: dict = {}
+        self._sources: "OrderedDict[str, _OpenSource]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "decoded_frames": 0}
+
+    def frame(self, digest: str, index: KeyframeIndex, frame_index: int) -> np.ndarray:
+        """Return a decoded frame. The returned array is shared and must not be modified.
+
+        Args:
+            digest (str): The blob key of the video.
+            index (KeyframeIndex): The keyframe index of the video.
+            frame_index (int): The frame to decode.
+
+        Returns:
+            np.ndarray: The (H, W, 3) uint8 BGR frame.
+
+        Raises:
+            RenderError: If the video cannot be opened or the frame cannot be decoded.
+        """
+        keyframe = 0
+        if len(index.frames):
+            keyframe = int(index.frames[index.keyframe_before(frame_index)])
+        key = (digest, keyframe)
+        offset = frame_index - keyframe
+        with self._lock:
+            gop = self._gops.get(key)
+            if gop is not None:
+                self._gops.move_to_end(key)
+                if offset < len(gop.frames):
+                    self._counters["hits"] += 1
+                    return gop.frames[offset]
+            self._counters["misses"] += 1
+
+        source = self._source(digest)
+        with source.lock:
+            if gop is None or source.position != keyframe + len(gop.frames):
+                # Continuing a GOP needs the decoder state, so restart from its keyframe
+                gop = DecodedGop(keyframe)
+                source.capture.set(cv2.CAP_PROP_POS_FRAMES, keyframe)
+                source.position = keyframe
+            decoded = 0
+            while keyframe + len(gop.frames) <= frame_index:
+                ok, frame = source.capture.read()
+                if not ok:
+                    break
+                gop.frames.append(frame)
+                decoded += 1
+            source.position = keyframe + len(gop.frames)
+
+        if not gop.frames:
+            raise RenderError(f"Unable to decode frame {frame_index}")
+        self._remember(key, gop, decoded)
+        return gop.frames[min(offset, len(gop.frames) - 1)]
+
+    def stats(self) -> dict:
+        """Return the hit counters and the memory used by the cached GOPs."""
+        with self._lock:
+            return {**self._counters, "gops": len(self._gops), "bytes": self._bytes}
+
+    def clear(self) -> None:
+        """Drop every cached GOP and close every open source."""
+        with self._lock:
+            sources = list(self._sources.values())
+            self._sources.clear()
+            self._gops.clear()
+            self._gop_bytes.clear()
+            self._bytes = 0
+        for source in sources:
+            source.close()
+
+    def _source(self, digest: str) -> _OpenSource:
+        with self._lock:
+            source = self._sources.get(digest)
+            if source is not None:
+                self._sources.move_to_end(digest)
+                return source
+        source = _OpenSource(digest)
+        evicted = []
+        with self._lock:
+            if digest in self._sources:
+                evicted.append(source)
+                source = self._sources[digest]
+            else:
+                self._sources[digest] = source
+                while len(self._sources) > self.max_sources:
+                    evicted.append(self._sources.popitem(last=False)[1])
+        for stale in evicted:
+            stale.close()
+        return source
+
+    def _remember(self, key: Tuple[str, int], gop: DecodedGop, decoded: int) -> None:
+        size = gop.nbytes
+        with self._lock:
+            self._counters["decoded_frames"] += decoded
+            self._bytes += size - self._gop_bytes.get(key, 0)
+            self._gops[key] = gop
+            self._gop_bytes[key] = size
+            self._gops.move_to_end(key)
+            while self._bytes > self.max_bytes and len(self._gops) > 1:
+                evicted_key, _ = self._gops.popitem(last=False)
+                self._bytes -= self._gop_bytes.pop(evicted_key)
+
+
+@lru_cache(maxsize=1)
+def get_frame_cache() -> FrameCache:
+    """Return the process-wide preview frame cache configured from the settings."""
+    settings = get_settings()
+    return FrameCache(settings.preview_cache_max_bytes, settings.preview_cache_sources)
+
+
+def render_preview(
+    source_key: str,
+    annotations: Iterable,
+    timestamp: float,
+    interpolation: str = "linear",
+    image_format: str = "jpeg",
+    quality: int = DEFAULT_QUALITY,
+    max_width: Optional[int] = None,
+) -> Tuple[bytes, str]:
+    """Composite the frame of a video shown at a timestamp.
+
+    Args:
+        source_key (str): The blob key of the source video, such as `Project.file_path`.
+        annotations (Iterable[Annotation]): The annotations of the project.
+        timestamp (float): The time of the frame in seconds.
+        interpolation (str, optional): How quads are interpolated between keyframes.
+        image_format (str, optional): "jpeg" or "webp". Defaults to "jpeg".
+        quality (int, optional): The encoder quality, from 1 to 100.
+        max_width (int, optional): Downscale wider frames to this width after compositing.
+
+    Returns:
+        Tuple[bytes, str]: The encoded image and its content type.
+
+    Raises:
+        MediaNotReady: If the keyframe index of the video has not been stored yet.
+        RenderError: If the video cannot be decoded or the image cannot be encoded.
+        ValueError: If the image format is not supported.
+    """
+    if image_format not in PREVIEW_FORMATS:
+        raise ValueError(f"Unsupported preview format: {image_format}")
+    extension, mimetype, quality_flag = PREVIEW_FORMATS[image_format]
+
+    # Probing reads every packet, and downloads the whole source from S3, so it is left to the
+    # media job
+    index = load_keyframe_index(source_key)
+    if index is None:
+        raise MediaNotReady(f"Media of {source_key} is still being prepared")
+    frame_index = index.frame_at(timestamp)
+    frame = get_frame_cache().frame(source_key, index, frame_index).copy()
+
+    creative_cache = get_creative_cache()
+    frame_time = frame_index / index.fps
+    placements = placements_in_range(
+        placements_from_annotations(annotations), frame_time, frame_time
+    )
+    timeline = build_timeline(
+        placements,
+        1,
+        index.fps,
+        lambda url: (creative_cache.get(url).width, creative_cache.get(url).height),
+        interpolation,
+        first_frame=frame_index,
+    )
+    layers = []
+    for track, image_url, homography, quad in timeline.layers_at(frame_index):
+        creative, level_homography = creative_cache.get(image_url).level_for(homography)
+        layers.append((track, creative, level_homography, quad))
+    composite_layers(frame, layers)
+
+    if max_width and frame.shape[1] > max_width:
+        height = max(1, int(round(frame.shape[0] * max_width / frame.shape[1])))
+        frame = cv2.resize(frame, (max_width, height), interpolation=cv2.INTER_AREA)
+    ok, encoded = cv2.imencode(extension, frame, [quality_flag, quality])
+    if not ok:
+        raise RenderError(f"Unable to encode preview as {image_format}")
+    return encoded.tobytes(), mimetype
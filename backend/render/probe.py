@@ -0,0 +1,295 @@
+"""Video Probe Module
+
+This module probes a stored video once and keeps what it learns, so no later step has to open
+the file just to know its frame rate, size or where its keyframes are. Stream metadata and a
+keyframe index are written together to a compact binary sidecar next to the blob, and the
+metadata is copied onto the `Video` rows referencing the blob.
+
+Key Features:
+- Reads stream metadata and packet headers with `ffprobe`, without decoding any frame.
+- Maps frames and timestamps to the keyframe to seek to, with its PTS and byte offset, by binary
+  search.
+- Stores the index as a fixed header followed by packed arrays, loaded without parsing.
+
+Sidecar layout (little-endian):
+- A header: magic `KFX1`, width, height, fps, frame count, duration, codec name and the number of
+  keyframes.
+- The keyframe frame indices as uint32, their PTS in seconds as float64, and their byte offsets
+  in the file as int64, -1 when unknown.
+
+Requirements:
+The `ffprobe` executable must be on the `PATH`.
+
+Example:
+    from backend.render.probe import probe_media
+
+    index = probe_media(project.file_path)
+    frame, pts, offset = index.seek_point(annotation.timestamp)
+"""
+
+import bisect
+import json
+import os
+import struct
+import subprocess
+import tempfile
+from dataclasses import dataclass
+from fractions import Fraction
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from backend.models import Video
+from backend.models.database import transactional
+from backend.storage import blob_key, derived_key, get_storage_backend
+
+from .engine import FALLBACK_FPS, RenderError
+
+SIDECAR_NAME = "keyframes.bin"
+SIDECAR_MAGIC = b"KFX1"
+SIDECAR_HEADER = struct.Struct("<4sIIdId16sI")
+
+
+@dataclass
+class KeyframeIndex:
+    """The stream metadata and keyframes of a video.
+
+    Attributes:
+        width (int): The frame width in pixels.
+        height (int): The frame height in pixels.
+        fps (float): The average frame rate.
+        frame_count (int): The number of frames.
+        duration (float): The duration in seconds.
+        codec (str): The codec name reported by FFmpeg, such as `h264`.
+        frames (np.ndarray): The sorted uint32 frame indices of the keyframes.
+        pts (np.ndarray): The float64 presentation timestamps of the keyframes, in seconds.
+        offsets (np.ndarray): The int64 byte offsets of the keyframe packets, -1 when unknown.
+    """
+
+    width: int
+    height: int
+    fps: float
+    frame_count: int
+    duration: float
+    codec: str
+    frames: np.ndarray
+    pts: np.ndarray
+    offsets: np.ndarray
+
+    def frame_at(self, timestamp: float) -> int:
+        """Return the frame shown at a timestamp, clamped to the video."""
+        return min(max(int(round(timestamp * self.fps)), 0), max(self.frame_count - 1, 0))
+
+    def keyframe_before(self, frame: int) -> int:
+        """Return the position in the index of the last keyframe at or before a frame."""
+        return max(bisect.bisect_right(self.frames, frame) - 1, 0)
+
+    def seek_point(self, timestamp: float) -> Tuple[int, float, int]:
+        """Return where to start decoding to reach the frame shown at a timestamp.
+
+        Returns:
+            Tuple[int, float, int]: The frame index, PTS and byte offset of the keyframe.
+        """
+        position = self.keyframe_before(self.frame_at(timestamp))
+        return int(self.frames[position]), float(self.pts[position]), int(self.offsets[position])
+
+    def keyframe_list(self) -> List[int]:
+        """Return the keyframe frame indices as a list, as used to plan segments."""
+        return self.frames.tolist()
+
+    def to_bytes(self) -> bytes:
+        """Serialize the index to the sidecar layout."""
+        header = SIDECAR_HEADER.pack(
+            SIDECAR_MAGIC,
+            self.width,
+            self.height,
+            self.fps,
+            self.frame_count,
+            self.duration,
+            self.codec.encode()[:16],
+            len(self.frames),
+        )
+        return b"".join(
+            [
+                header,
+                self.frames.astype("<u4").tobytes(),
+                self.pts.astype("<f8").tobytes(),
+                self.offsets.astype("<i8").tobytes(),
+            ]
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "KeyframeIndex":
+        """Load an index from the sidecar layout.
+
+        Raises:
+            ValueError: If the data is not a keyframe index.
+        """
+        if len(data) < SIDECAR_HEADER.size:
+            raise ValueError("Truncated keyframe index")
+        magic, width, height, fps, frame_count, duration, codec, count = (
+            SIDECAR_HEADER.unpack_from(data)
+        )
+        if magic != SIDECAR_MAGIC:
+            raise ValueError("Not a keyframe index")
+        offset = SIDECAR_HEADER.size
+        frames = np.frombuffer(data, "<u4", count, offset)
+        offset += frames.nbytes
+        pts = np.frombuffer(data, "<f8", count, offset)
+        offset += pts.nbytes
+        offsets = np.frombuffer(data, "<i8", count, offset)
+        return cls(
+            width=width,
+            height=height,
+            fps=fps,
+            frame_count=frame_count,
+            duration=duration,
+            codec=codec.rstrip(b"\0").decode(),
+            frames=frames,
+            pts=pts,
+            offsets=offsets,
+        )
+
+
+def _ffprobe(path: str, *arguments: str) -> str:
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-select_streams", "v:0", *arguments, path],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RenderError(f"Unable to probe {path}: {result.stderr.strip()}")
+    return result.stdout
+
+
+def probe_video(path: str) -> KeyframeIndex:
+    """Probe the first video stream of a file.
+
+    Only stream and packet headers are read. Packets are listed in decode order, so frame
+    indices are the ranks of the presentation timestamps.
+
+    Args:
+        path (str): The video file.
+
+    Returns:
+        KeyframeIndex: The stream metadata and keyframes.
+
+    Raises:
+        RenderError: If `ffprobe` fails or the file has no video stream.
+    """
+    streams = json.loads(
+        _ffprobe(
+            path,
+            "-show_entries",
+            "stream=codec_name,width,height,avg_frame_rate,r_frame_rate",
+            "-of",
+            "json",
+        )
+    ).get("streams")
+    if not streams:
+        raise RenderError(f"No video stream in {path}")
+    stream = streams[0]
+    fps = FALLBACK_FPS
+    for rate in (stream.get("avg_frame_rate"), stream.get("r_frame_rate")):
+        try:
+            if rate and Fraction(rate) > 0:
+                fps = float(Fraction(rate))
+                break
+        except (ValueError, ZeroDivisionError):
+            continue
+
+    packets = []
+    output = _ffprobe(path, "-show_entries", "packet=pts_time,pos,flags", "-of", "csv=p=0")
+    for order, line in enumerate(output.splitlines()):
+        pts, position, flags = (line.split(",") + ["", "", ""])[:3]
+        try:
+            timestamp = float(pts)
+        except ValueError:
+            timestamp = order / fps
+        packets.append((timestamp, int(position) if position.isdigit() else -1, "K" in flags))
+    packets.sort(key=lambda packet: packet[0])
+    keyframes = [
+        (index, timestamp, position)
+        for index, (timestamp, position, is_keyframe) in enumerate(packets)
+        if is_keyframe
+    ]
+
+    frame_count = len(packets)
+    return KeyframeIndex(
+        width=int(stream.get("width") or 0),
+        height=int(stream.get("height") or 0),
+        fps=fps,
+        frame_count=frame_count,
+        duration=frame_count / fps,
+        codec=stream.get("codec_name") or "",
+        frames=np.array([keyframe[0] for keyframe in keyframes], dtype=np.uint32),
+        pts=np.array([keyframe[1] for keyframe in keyframes], dtype=np.float64),
+        offsets=np.array([keyframe[2] for keyframe in keyframes], dtype=np.int64),
+    )
+
+
+def probe_pixel_format(path: str) -> str:
+    """Return the pixel format of the first video stream of a file, such as `yuv420p`.
+
+    Raises:
+        RenderError: If `ffprobe` fails.
+    """
+    return _ffprobe(path, "-show_entries", "stream=pix_fmt", "-of", "csv=p=0").strip()
+
+
+def load_keyframe_index(digest: str) -> Optional[KeyframeIndex]:
+    """Return the stored keyframe index of a video, or None if it was not probed yet."""
+    storage = get_storage_backend()
+    key = derived_key(digest, SIDECAR_NAME)
+    if not storage.exists(key):
+        return None
+    file = storage.open_read(key)
+    try:
+        return KeyframeIndex.from_bytes(file.read())
+    except ValueError:
+        return None
+    finally:
+        file.close()
+
+
+def probe_media(digest: str) -> KeyframeIndex:
+    """Return the keyframe index of a stored video, probing it and storing the sidecar once.
+
+    Args:
+        digest (str): The blob key of the video, such as `Project.file_path`.
+
+    Returns:
+        KeyframeIndex: The stream metadata and keyframes.
+    """
+    index = load_keyframe_index(digest)
+    if index is not None:
+        return index
+
+    storage = get_storage_backend()
+    with storage.local_copy(blob_key(digest)) as source_path:
+        index = probe_video(source_path)
+    file_descriptor, sidecar_path = tempfile.mkstemp(suffix=".bin")
+    try:
+        with os.fdopen(file_descriptor, "wb") as file:
+            file.write(index.to_bytes())
+        storage.put_file(sidecar_path, derived_key(digest, SIDECAR_NAME), move=True)
+    finally:
+        if os.path.exists(sidecar_path):
+            os.remove(sidecar_path)
+    return index
+
+
+@transactional
+def save_video_metadata(digest: str, index: KeyframeIndex) -> None:
+    """Copy probed metadata onto every `Video` row referencing a blob."""
+    Video.query.filter_by(filename=digest).update(
+        {
+            "width": index.width,
+            "height": index.height,
+            "fps": index.fps,
+            "frame_count": index.frame_count,
+            "duration": index.duration,
+            "codec": index.codec,
+        },
+        synchronize_session=False,
+    )
@@ -0,0 +1,163 @@
+"""Project Render Module
+
+This module renders a project's stored video with its annotations and stores the result. The
+source is fetched from the storage backend to a local file, rendered in one process or as
+parallel segments, and the output is moved into storage.
+
+Key Features:
+- Works with every storage backend through local copies.
+- Splits renders into parallel segments according to the settings or per-call options, at
+  the keyframes of the stored keyframe index when the source was already probed.
+- Re-renders only the segments whose placements changed since the previous render of the same
+  output, when the source was probed and FFmpeg is installed.
+- Smart renders copy the GOPs without visible placements from the source and re-encode the
+  others with the source codec.
+
+Configuration (read through `Settings`):
+- RENDER_SEGMENTS: Number of segments a video is split into. Defaults to 1, a single process.
+- RENDER_SEGMENT_WORKERS: Number of processes rendering segments at once. Defaults to the
+  number of cores.
+- RENDER_INCREMENTAL: Whether unchanged segments of the previous output are reused. Defaults to
+  true. Incremental renders split the video by duration instead of RENDER_SEGMENTS.
+- RENDER_SEGMENT_SECONDS: Approximate length of the segments of incremental renders, and of
+  the rendered runs of smart renders. Defaults to 10.
+- RENDER_SMART: Whether renders are smart renders when the source codec allows it. Defaults to
+  false. Smart renders take precedence over incremental ones.
+- RENDER_KERNEL: The compositing backend, "opencv", "numpy" or "numba". Defaults to "opencv".
+
+Draft renders, see `backend.render.presets`, are never smart renders, since their frames do not
+match the source GOPs.
+
+Example:
+    from backend.render.project import render_project
+
+    stats = render_project(project.file_path, annotations, f"renders/{project.id}.mp4")
+"""
+
+import os
+import tempfile
+from typing import Callable, Iterable, Optional
+
+from backend.storage import blob_key, get_storage_backend
+from backend.utils import get_settings
+
+from .engine import RenderStats
+from .incremental import render_incremental
+from .placements import placements_from_annotations
+from .presets import DEFAULT_PRESET, get_preset
+from .probe import load_keyframe_index
+from .segments import ffmpeg_available, render_segmented
+from .smart import render_smart, smart_supported
+
+
+def render_project(
+    source_key: str,
+    annotations: Iterable,
+    output_key: str,
+    progress: Optional[Callable[[int, int], None]] = None,
+    interpolation: str = "linear",
+    segments: Optional[int] = None,
+    workers: Optional[int] = None,
+    incremental: Optional[bool] = None,
+    state_key: Optional[str] = None,
+    smart: Optional[bool] = None,
+    kernel: Optional[str] = None,
+    preset: str = DEFAULT_PRESET,
+    frame_step: Optional[int] = None,
+) -> RenderStats:
+    """Render a project's video with its annotations and store the result.
+
+    Args:
+        source_key (str): The blob key of the source video, such as `Project.file_path`.
+        annotations (Iterable[Annotation]): The annotations to apply.
+        output_key (str): The storage key the rendered video is written to.
+        progress (Callable, optional): Progress callback, see `RenderEngine.render`.
+        interpolation (str, optional): How quads are interpolated between keyframes.
+        segments (int, optional): Number of parallel segments. Defaults to the settings.
+        workers (int, optional): Number of segment processes. Defaults to the settings.
+        incremental (bool, optional): Whether to reuse the unchanged segments of the previous
+        render of the same output. Defaults to the settings.
+        state_key (str, optional): The key locating the segments of previous renders of the same
+        output, when `output_key` changes between renders. Defaults to `output_key`.
+        smart (bool, optional): Whether to copy the GOPs without placements from the source
+        instead of rendering them. Defaults to the settings.
+        kernel (str, optional): The compositing backend, see
+        `backend.render.kernels.KERNEL_BACKENDS`. Defaults to the settings.
+        preset (str, optional): The quality preset, "draft" or "final". Defaults to "final".
+        frame_step (int, optional): Render every `frame_step`-th frame, for draft renders.
+
+    Returns:
+        RenderStats: Counters describing the render.
+
+    Raises:
+        ValueError: If the preset is unknown or the frame step is invalid for it.
+    """
+    settings = get_settings()
+    render_preset = get_preset(preset, frame_step)
+    placements = placements_from_annotations(annotations)
+    storage = get_storage_backend()
+    workers = workers or settings.render_segment_workers
+    if incremental is None:
+        incremental = settings.render_incremental
+    if smart is None:
+        smart = settings.render_smart
+    kernel = kernel or settings.render_kernel
+    keyframe_index = load_keyframe_index(source_key)
+    file_descriptor, output_path = tempfile.mkstemp(suffix=os.path.splitext(output_key)[1])
+    os.close(file_descriptor)
+    try:
+        with storage.local_copy(blob_key(source_key)) as source_path:
+            if (
+                smart
+                and render_preset.is_full_quality
+                and keyframe_index is not None
+                and smart_supported(keyframe_index, source_path)
+            ):
+                stats = render_smart(
+                    source_path,
+                    output_path,
+                    placements,
+                    keyframe_index,
+                    workers=workers,
+                    interpolation=interpolation,
+                    segment_seconds=settings.render_segment_seconds,
+                    progress=progress,
+                    kernel=kernel,
+                )
+            elif incremental and keyframe_index is not None and ffmpeg_available():
+                stats = render_incremental(
+                    source_key,
+                    source_path,
+                    state_key or output_key,
+                    output_path,
+                    placements,
+                    keyframe_index,
+                    segment_seconds=settings.render_segment_seconds,
+                    workers=workers,
+                    interpolation=interpolation,
+                    progress=progress,
+                    kernel=kernel,
+                    preset=render_preset,
+                )
+            else:
+                stats = render_segmented(
+                    source_path,
+                    output_path,
+                    placements,
+                    segments=segments or settings.render_segments,
+                    workers=workers,
+                    interpolation=interpolation,
+                    progress=progress,
+                    keyframe_index=keyframe_index,
+                    kernel=kernel,
+                    preset=render_preset,
+                )
+        storage.put_file(output_path, output_key, move=True)
+    finally:
+        if os.path.exists(output_path):
+            os.remove(output_path)
+    print(
+        f"Rendered {stats.frames} frames in {stats.seconds:.2f}s ({stats.fps:.1f} fps) "
+        f"to {output_key}, reusing {stats.reused_segments} of {stats.segments} segments"
+    )
+    return stats
@@ -0,0 +1,335 @@
+"""Segment-Parallel Rendering Module
+
+This module renders a video on several cores at once. The source video is split at keyframes
+into segments, every segment is rendered by its own process with only the keyframes it needs,
+and the rendered segments are joined with the FFmpeg concat demuxer without re-encoding. Each
+segment decoder starts on a keyframe, so seeking is exact and no frame is decoded twice.
+
+Key Features:
+- Lists the keyframes of a video with `ffprobe`, without decoding any frame, or reads them from
+  the stored keyframe index.
+- Plans segment boundaries on the keyframes closest to an even split.
+- Renders segments on a process pool and aggregates their progress and statistics.
+- Joins the segments with a stream copy.
+
+Requirements:
+The `ffmpeg` and `ffprobe` executables must be on the `PATH`. Without them, videos are rendered
+in a single process.
+
+Example:
+    from backend.render.segments import render_segmented
+
+    stats = render_segmented("input.mp4", "output.mp4", placements, segments=8, workers=8)
+"""
+
+import bisect
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import cv2
+
+from .encoders import preset_writer_factory
+from .engine import (
+    FALLBACK_FPS,
+    RenderEngine,
+    RenderError,
+    RenderStats,
+    sum_timings,
+)
+from .kernels import DEFAULT_KERNEL
+from .placements import Placement, placements_in_range
+from .presets import DEFAULT_PRESET, PRESETS, RenderPreset
+from .probe import KeyframeIndex, probe_video
+
+PROGRESS_INTERVAL = 0.5
+
+
+def ffmpeg_available() -> bool:
+    """Return whether the `ffmpeg` and `ffprobe` executables can be found."""
+    return shutil.which("ffmpeg") is not None and shutil.which("ffprobe") is not None
+
+
+def probe_keyframes(path: str) -> Tuple[int, List[int]]:
+    """Return the frame count and the keyframe indices of the first video stream.
+
+    Args:
+        path (str): The video file.
+
+    Returns:
+        Tuple[int, List[int]]: The number of frames and the sorted indices of the keyframes.
+
+    Raises:
+        RenderError: If `ffprobe` fails.
+    """
+    index = probe_video(path)
+    return index.frame_count, index.keyframe_list()
+
+
+def plan_segments(
+    keyframes: Sequence[int], frame_count: int, segments: int
+) -> List[Tuple[int, int]]:
+    """Split a video into at most `segments` frame ranges starting on keyframes.
+
+    Args:
+        keyframes (Sequence[int]): The sorted keyframe indices.
+        frame_count (int): The number of frames in the video.
+        segments (int): The desired number of segments.
+
+    Returns:
+        List[Tuple[int, int]]: The `(start, end)` frame ranges, end exclusive. Fewer ranges are
+        returned when the video has too few keyframes.
+    """
+    cuts = set()
+    for segment in range(1, segments):
+        target = frame_count * segment / segments
+        position = bisect.bisect_left(keyframes, target)
+        candidates = keyframes[max(position - 1, 0) : position + 1]
+        if candidates:
+            cuts.add(min(candidates, key=lambda keyframe: abs(keyframe - target)))
+    bounds = [0] + sorted(cut for cut in cuts if 0 < cut < frame_count) + [frame_count]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def concat_segments(segment_paths: Sequence[str], output_path: str) -> None:
+    """Join rendered segments into one video without re-encoding.
+
+    Raises:
+        RenderError: If `ffmpeg` fails.
+    """
+    list_path = f"{output_path}.txt"
+    with open(list_path, "w") as file:
+        for path in segment_paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            file.write(f"file '{escaped}'\n")
+    try:
+        result = subprocess.run(
+            [
+                "ffmpeg",
+                "-v",
+                "error",
+                "-y",
+                "-f",
+                "concat",
+                "-safe",
+                "0",
+                "-i",
+                list_path,
+                "-c",
+                "copy",
+                "-f",
+                "mp4",
+                output_path,
+            ],
+            capture_output=True,
+            text=True,
+        )
+    finally:
+        os.remove(list_path)
+    if result.returncode != 0:
+        raise RenderError(f"Unable to join segments: {result.stderr.strip()}")
+
+
+@dataclass
+class SegmentTask:
+    """The work of one segment process.
+
+    Attributes:
+        index (int): The position of the segment in the video.
+        source_path (str): The input video file.
+        output_path (str): The file the segment is written to.
+        placements (List[Placement]): The keyframes needed by the segment.
+        start_frame (int): The first frame of the segment.
+        end_frame (int): The frame after the last frame of the segment.
+        interpolation (str): How quads are interpolated between keyframes.
+        progress (dict): A shared mapping receiving the frames written, keyed by segment index.
+        writer_factory (Callable): Creates the video writer, see `RenderEngine`. Must be
+        picklable.
+        kernel (str): The compositing backend, see `RenderEngine`.
+        preset (RenderPreset): The quality settings of the render, see `RenderEngine`.
+    """
+
+    index: int
+    source_path: str
+    output_path: str
+    placements: List[Placement]
+    start_frame: int
+    end_frame: int
+    interpolation: str
+    progress: Optional[dict] = None
+    writer_factory: Optional[Callable] = None
+    kernel: str = DEFAULT_KERNEL
+    preset: RenderPreset = PRESETS[DEFAULT_PRESET]
+
+
+def render_segment(task: SegmentTask) -> RenderStats:
+    """Render one segment, reporting progress through the shared mapping of the task."""
+    last_report = 0.0
+
+    def report(frames: int, _: int) -> None:
+        nonlocal last_report
+        now = time.monotonic()
+        if task.progress is not None and now - last_report >= PROGRESS_INTERVAL:
+            last_report = now
+            task.progress[task.index] = frames
+
+    engine = RenderEngine(
+        task.source_path,
+        task.output_path,
+        task.placements,
+        interpolation=task.interpolation,
+        start_frame=task.start_frame,
+        end_frame=task.end_frame,
+        writer_factory=task.writer_factory or preset_writer_factory(task.preset),
+        kernel=task.kernel,
+        preset=task.preset,
+    )
+    stats = engine.render(report)
+    if task.progress is not None:
+        # Source frames, which include the frames skipped by draft renders
+        task.progress[task.index] = task.end_frame - task.start_frame
+    return stats
+
+
+def run_segment_tasks(
+    tasks: Sequence[SegmentTask],
+    workers: int,
+    progress: Optional[Callable[[int, int], None]] = None,
+    total_frames: int = 0,
+    frames_done: int = 0,
+) -> List[RenderStats]:
+    """Render segments on a process pool.
+
+    Args:
+        tasks (Sequence[SegmentTask]): The segments to render. Their `progress` is replaced by
+        a mapping shared with the pool.
+        workers (int): The number of processes rendering segments at once.
+        progress (Callable, optional): Called with the frames written and `total_frames`.
+        total_frames (int, optional): The frame count reported to `progress`.
+        frames_done (int, optional): Frames already available, added to the frames written.
+
+    Returns:
+        List[RenderStats]: The counters of every segment, in the order of the tasks.
+    """
+    if not tasks:
+        return []
+    # Fork so segment processes inherit the render worker's imports; renders run in worker
+    # processes with no other threads, unlike the API process, see `backend.jobs.dispatcher`
+    context = multiprocessing.get_context("fork")
+    with context.Manager() as manager, ProcessPoolExecutor(
+        max_workers=max(min(workers, len(tasks)), 1), mp_context=context
+    ) as pool:
+        frames_written = manager.dict()
+        for task in tasks:
+            task.progress = frames_written
+        futures = [pool.submit(render_segment, task) for task in tasks]
+        pending = set(futures)
+        while pending:
+            _, pending = wait(pending, timeout=PROGRESS_INTERVAL, return_when=FIRST_COMPLETED)
+            if progress is not None:
+                progress(frames_done + sum(frames_written.values()), total_frames)
+        return [future.result() for future in futures]
+
+
+def render_segmented(
+    source_path: str,
+    output_path: str,
+    placements: List[Placement],
+    segments: int,
+    workers: int,
+    interpolation: str = "linear",
+    progress: Optional[Callable[[int, int], None]] = None,
+    keyframe_index: Optional[KeyframeIndex] = None,
+    kernel: str = DEFAULT_KERNEL,
+    preset: Optional[RenderPreset] = None,
+) -> RenderStats:
+    """Render a video as parallel segments joined without re-encoding.
+
+    Falls back to a single-process render when FFmpeg is not installed or the video has too few
+    keyframes to split.
+
+    Args:
+        source_path (str): The input video file.
+        output_path (str): The output video file.
+        placements (List[Placement]): The keyframes of every track.
+        segments (int): The desired number of segments.
+        workers (int): The number of processes rendering segments at once.
+        interpolation (str, optional): How quads are interpolated between keyframes.
+        progress (Callable, optional): Called with the frames written over all segments and
+        the frame count of the video.
+        keyframe_index (KeyframeIndex, optional): The stored index of the source, which spares
+        probing it again.
+        kernel (str, optional): The compositing backend, see `RenderEngine`.
+        preset (RenderPreset, optional): The quality settings of the render. Defaults to the
+        final preset.
+
+    Returns:
+        RenderStats: The combined counters of all segments, with the wall-clock duration of
+        the whole render.
+    """
+    preset = preset or PRESETS[DEFAULT_PRESET]
+    bounds = []
+    if segments > 1 and keyframe_index is not None:
+        bounds = plan_segments(
+            keyframe_index.keyframe_list(), keyframe_index.frame_count, segments
+        )
+    elif segments > 1 and ffmpeg_available():
+        frame_count, keyframes = probe_keyframes(source_path)
+        bounds = plan_segments(keyframes, frame_count, segments)
+    if len(bounds) < 2:
+        return RenderEngine(
+            source_path,
+            output_path,
+            placements,
+            interpolation=interpolation,
+            writer_factory=preset_writer_factory(preset),
+            kernel=kernel,
+            preset=preset,
+        ).render(progress)
+
+    if keyframe_index is not None:
+        fps = keyframe_index.fps
+    else:
+        capture = cv2.VideoCapture(source_path)
+        fps = capture.get(cv2.CAP_PROP_FPS) or FALLBACK_FPS
+        capture.release()
+
+    started = time.perf_counter()
+    segment_directory = tempfile.mkdtemp(prefix="segments-")
+    try:
+        tasks = [
+            SegmentTask(
+                index=index,
+                source_path=source_path,
+                output_path=os.path.join(segment_directory, f"{index:05d}.mp4"),
+                placements=placements_in_range(placements, start / fps, end / fps),
+                start_frame=start,
+                end_frame=end,
+                interpolation=interpolation,
+                kernel=kernel,
+                preset=preset,
+            )
+            for index, (start, end) in enumerate(bounds)
+        ]
+        results = run_segment_tasks(tasks, workers, progress, bounds[-1][1])
+        concat_segments([task.output_path for task in tasks], output_path)
+    finally:
+        shutil.rmtree(segment_directory, ignore_errors=True)
+
+    return RenderStats(
+        frames=sum(stats.frames for stats in results),
+        seconds=time.perf_counter() - started,
+        composite_seconds=sum(stats.composite_seconds for stats in results),
+        surface_seconds=sum_timings(results, "surface_seconds"),
+        stage_seconds=sum_timings(results, "stage_seconds"),
+        pipeline_seconds=sum(stats.pipeline_seconds for stats in results),
+        width=results[0].width,
+        height=results[0].height,
+        segments=len(results),
+    )
@@ -0,0 +1,237 @@
+"""Smart Render Module
+
+This module renders only the groups of pictures (GOPs) in which a placement is visible. Most
+frames of a typical video show no placement, and decoding and re-encoding them changes nothing
+but their quality. The placement timeline and its visibility test mark every GOP as clean or
+dirty. Clean GOPs are copied from the source bitstream unchanged. Dirty GOPs are decoded,
+composited and re-encoded with the source codec, and all parts are joined with a stream copy.
+
+Key Features:
+- Classifies GOPs with the per-frame visibility of every placement, clipped to the frame.
+- Copies runs of clean GOPs with FFmpeg, without decoding them.
+- Re-encodes dirty runs in parallel, with the codec of the source, as MPEG-TS parts.
+- Joins copied and rendered parts, whose codec parameters are carried in-band, with a stream copy.
+
+Limitations:
+Only 8-bit 4:2:0 sources whose codec has an encoder in `backend.render.encoders.ENCODERS` can be
+smart rendered, since re-encoded GOPs must match the copied ones. GOPs are assumed to be closed,
+which is the default of common encoders.
+
+Example:
+    from backend.render.smart import render_smart, smart_supported
+
+    if smart_supported(keyframe_index, "input.mp4"):
+        stats = render_smart("input.mp4", "output.mp4", placements, keyframe_index, workers=8)
+"""
+
+import functools
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from .creative_cache import get_creative_cache
+from .encoders import ANNEXB_FILTERS, ENCODERS, FFmpegWriter
+from .engine import RenderError, RenderStats, sum_timings
+from .interpolation import build_timeline
+from .kernels import DEFAULT_KERNEL
+from .placements import Placement, placements_in_range
+from .probe import KeyframeIndex, probe_pixel_format
+from .segments import SegmentTask, concat_segments, ffmpeg_available, run_segment_tasks
+
+# Added to keyframe timestamps before seeking, so rounding never seeks to the previous keyframe
+SEEK_EPSILON = 0.0005
+# The pixel formats `FFmpegWriter` encodes; re-encoded GOPs of a 10-bit or 4:2:2 source could not
+# be spliced with the GOPs copied from it
+SMART_PIXEL_FORMATS = ("yuv420p",)
+
+
+def smart_supported(index: KeyframeIndex, source_path: str) -> bool:
+    """Return whether a video can be smart rendered.
+
+    Args:
+        index (KeyframeIndex): The keyframe index of the video.
+        source_path (str): A local copy of the video, whose pixel format is probed.
+
+    Returns:
+        bool: Whether its codec can be encoded and its pixel format matches the encoder's.
+    """
+    if index.codec not in ENCODERS or len(index.frames) == 0 or not ffmpeg_available():
+        return False
+    try:
+        return probe_pixel_format(source_path) in SMART_PIXEL_FORMATS
+    except RenderError:
+        return False
+
+
+def plan_smart_ranges(
+    index: KeyframeIndex, visible: np.ndarray, max_frames: int
+) -> List[Tuple[int, int, bool]]:
+    """Group the GOPs of a video into runs of clean or dirty GOPs.
+
+    Args:
+        index (KeyframeIndex): The keyframe index of the video.
+        visible (np.ndarray): (frame_count,) bool, whether any placement is drawn on a frame.
+        max_frames (int): Dirty runs are cut at the first keyframe past this length, so they
+        can be rendered in parallel.
+
+    Returns:
+        List[Tuple[int, int, bool]]: The `(start, end, dirty)` frame ranges, end exclusive.
+    """
+    starts = [keyframe for keyframe in index.keyframe_list() if keyframe < index.frame_count]
+    # Frames before the first keyframe cannot be copied on their own, so they are rendered
+    leading = not starts or starts[0] != 0
+    if leading:
+        starts = [0] + starts[1:]
+    ranges: List[Tuple[int, int, bool]] = []
+    for start, end in zip(starts, starts[1:] + [index.frame_count]):
+        dirty = bool(visible[start:end].any()) or (leading and start == 0)
+        if ranges and ranges[-1][2] == dirty:
+            previous_start = ranges[-1][0]
+            if not dirty or end - previous_start <= max_frames:
+                ranges[-1] = (previous_start, end, dirty)
+                continue
+        ranges.append((start, end, dirty))
+    return ranges
+
+
+def copy_range(
+    source_path: str, output_path: str, index: KeyframeIndex, start: int, end: int
+) -> None:
+    """Copy the frames of a range starting on a keyframe from the source bitstream.
+
+    The seek uses the keyframe's PTS as it is, not offset by the start time of the file, so
+    sources that do not start at 0, such as MPEG-TS, copy the right GOPs.
+
+    Raises:
+        RenderError: If `ffmpeg` fails.
+    """
+    position = index.keyframe_before(start)
+    result = subprocess.run(
+        [
+            "ffmpeg",
+            "-v",
+            "error",
+            "-y",
+            "-seek_timestamp",
+            "1",
+            "-ss",
+            f"{float(index.pts[position]) + SEEK_EPSILON:.6f}",
+            "-i",
+            source_path,
+            "-map",
+            "0:v:0",
+            "-frames:v",
+            str(end - start),
+            "-c",
+            "copy",
+            "-bsf:v",
+            ANNEXB_FILTERS[index.codec],
+            "-f",
+            "mpegts",
+            output_path,
+        ],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RenderError(f"Unable to copy frames {start}-{end}: {result.stderr.strip()}")
+
+
+def render_smart(
+    source_path: str,
+    output_path: str,
+    placements: List[Placement],
+    keyframe_index: KeyframeIndex,
+    workers: int,
+    interpolation: str = "linear",
+    segment_seconds: float = 10.0,
+    progress: Optional[Callable[[int, int], None]] = None,
+    kernel: str = DEFAULT_KERNEL,
+) -> RenderStats:
+    """Render a video, copying the GOPs that show no placement from the source.
+
+    Args:
+        source_path (str): The input video file.
+        output_path (str): The output video file.
+        placements (List[Placement]): The keyframes of every track.
+        keyframe_index (KeyframeIndex): The keyframe index of the source.
+        workers (int): The number of processes rendering dirty runs at once.
+        interpolation (str, optional): How quads are interpolated between keyframes.
+        segment_seconds (float, optional): The approximate maximum length of a dirty run.
+        progress (Callable, optional): Called with the frames available, copied ones included,
+        and the frame count of the video.
+        kernel (str, optional): The compositing backend, see `RenderEngine`.
+
+    Returns:
+        RenderStats: Counters of the render. Copied GOP runs count as reused segments and their
+        frames as written.
+
+    Raises:
+        RenderError: If the source codec or pixel format cannot be encoded or FFmpeg fails.
+    """
+    if not smart_supported(keyframe_index, source_path):
+        raise RenderError(f"Smart rendering is not supported for {keyframe_index.codec}")
+    started = time.perf_counter()
+    fps = keyframe_index.fps
+    creative_cache = get_creative_cache()
+    timeline = build_timeline(
+        placements,
+        keyframe_index.frame_count,
+        fps,
+        lambda url: (creative_cache.get(url).width, creative_cache.get(url).height),
+        interpolation,
+    )
+    visible = timeline.visible_frames(keyframe_index.width, keyframe_index.height)
+    ranges = plan_smart_ranges(keyframe_index, visible, max(int(segment_seconds * fps), 1))
+
+    total_frames = keyframe_index.frame_count
+    segment_directory = tempfile.mkdtemp(prefix="smart-")
+    try:
+        paths = [os.path.join(segment_directory, f"{i:05d}.ts") for i in range(len(ranges))]
+        copied_frames = 0
+        for path, (start, end, dirty) in zip(paths, ranges):
+            if not dirty:
+                copy_range(source_path, path, keyframe_index, start, end)
+                copied_frames += end - start
+                if progress is not None:
+                    progress(copied_frames, total_frames)
+
+        writer_factory = functools.partial(FFmpegWriter, codec=keyframe_index.codec)
+        tasks = [
+            SegmentTask(
+                index=i,
+                source_path=source_path,
+                output_path=paths[i],
+                placements=placements_in_range(placements, start / fps, end / fps),
+                start_frame=start,
+                end_frame=end,
+                interpolation=interpolation,
+                writer_factory=writer_factory,
+                kernel=kernel,
+            )
+            for i, (start, end, dirty) in enumerate(ranges)
+            if dirty
+        ]
+        results = run_segment_tasks(tasks, workers, progress, total_frames, copied_frames)
+        concat_segments(paths, output_path)
+    finally:
+        shutil.rmtree(segment_directory, ignore_errors=True)
+
+    return RenderStats(
+        frames=copied_frames + sum(stats.frames for stats in results),
+        seconds=time.perf_counter() - started,
+        composite_seconds=sum(stats.composite_seconds for stats in results),
+        surface_seconds=sum_timings(results, "surface_seconds"),
+        stage_seconds=sum_timings(results, "stage_seconds"),
+        pipeline_seconds=sum(stats.pipeline_seconds for stats in results),
+        width=keyframe_index.width,
+        height=keyframe_index.height,
+        segments=len(ranges),
+        reused_segments=len(ranges) - len(tasks),
+        reused_frames=copied_frames,
+    )
@@ -0,0 +1,285 @@
+"""Placement Tracking Module
+
+This module propagates sparse, user-drawn placement quads through the frames between them with
+pyramidal Lucas-Kanade optical flow, so users only annotate a few keyframes per shot. Only a
+region around each quad is converted and searched, so the tracking cost of a frame grows with the
+placement area, not with the frame size.
+
+Key Features:
+- Tracks feature points inside the quad and fits a RANSAC homography that moves its corners.
+- Falls back to tracking the four corners directly on surfaces with too little texture.
+- Spreads the drift measured at the next user keyframe back over the tracked span.
+- Decodes the video once for all tracks.
+- Stores tracked quads as derived annotations, kept apart from user-drawn ones.
+
+Tracking semantics:
+Every user keyframe starts a span that is tracked forward until the next keyframe of its track,
+or until the end of the video after the last keyframe. Hidden keyframes start no span, and a span
+ending on one is not corrected for drift. A span whose tracking is lost stops
+producing quads, and the renderer interpolates the rest of it as usual.
+
+Example:
+    from backend.render.tracking import track_placements
+
+    derived = track_placements("input.mp4", placements, stride=2)
+"""
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from backend.models import Annotation
+from backend.models.database import db, transactional
+
+from .engine import FALLBACK_FPS, RenderError
+from .placements import Placement, group_tracks
+
+DEFAULT_STRIDE = 1
+MIN_MARGIN = 16
+MARGIN_RATIO = 0.25
+MAX_FEATURES = 200
+MIN_FEATURES = 8
+RANSAC_THRESHOLD = 3.0
+LK_PARAMETERS = {
+    "winSize": (21, 21),
+    "maxLevel": 3,
+    "criteria": (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 30, 0.01),
+}
+
+
+def search_region(quad: np.ndarray, width: int, height: int) -> Tuple[int, int, int, int]:
+    """Return the `(x0, y0, x1, y1)` box around a quad searched for its motion.
+
+    The quad's bounding box is grown by a margin proportional to its size, so fast motion of a
+    large placement stays inside the box, and clipped to the frame.
+    """
+    x0, y0 = quad.min(axis=0)
+    x1, y1 = quad.max(axis=0)
+    margin = max(MIN_MARGIN, MARGIN_RATIO * max(x1 - x0, y1 - y0))
+    return (
+        int(max(np.floor(x0 - margin), 0)),
+        int(max(np.floor(y0 - margin), 0)),
+        int(min(np.ceil(x1 + margin), width)),
+        int(min(np.ceil(y1 + margin), height)),
+    )
+
+
+def track_quad(
+    previous: np.ndarray, current: np.ndarray, quad: np.ndarray
+) -> Optional[np.ndarray]:
+    """Move a quad from the previous frame to the current one.
+
+    Args:
+        previous (np.ndarray): The previous (H, W, 3) BGR frame.
+        current (np.ndarray): The current (H, W, 3) BGR frame.
+        quad (np.ndarray): The (4, 2) corners of the placement in the previous frame.
+
+    Returns:
+        np.ndarray: The (4, 2) float32 corners in the current frame, or None if tracking was
+        lost.
+    """
+    height, width = current.shape[:2]
+    x0, y0, x1, y1 = search_region(quad, width, height)
+    if x1 - x0 < 2 or y1 - y0 < 2:
+        return None
+    offset = np.array([x0, y0], dtype=np.float32)
+    previous_gray = cv2.cvtColor(previous[y0:y1, x0:x1], cv2.COLOR_BGR2GRAY)
+    current_gray = cv2.cvtColor(current[y0:y1, x0:x1], cv2.COLOR_BGR2GRAY)
+    local_quad = (quad - offset).astype(np.float32)
+
+    mask = np.zeros_like(previous_gray)
+    cv2.fillConvexPoly(mask, np.round(local_quad).astype(np.int32), 255)
+    features = cv2.goodFeaturesToTrack(
+        previous_gray, MAX_FEATURES, qualityLevel=0.01, minDistance=5, mask=mask
+    )
+
+    if features is not None and len(features) >= MIN_FEATURES:
+        moved, status, _ = cv2.calcOpticalFlowPyrLK(
+            previous_gray, current_gray, features, None, **LK_PARAMETERS
+        )
+        found = status.ravel() == 1
+        if found.sum() >= MIN_FEATURES:
+            homography, _ = cv2.findHomography(
+                features[found], moved[found], cv2.RANSAC, RANSAC_THRESHOLD
+            )
+            if homography is not None:
+                moved_quad = cv2.perspectiveTransform(local_quad[None], homography)[0]
+                return moved_quad + offset
+
+    # Too little texture inside the placement: follow the corners themselves
+    corners = local_quad.reshape(-1, 1, 2)
+    moved, status, _ = cv2.calcOpticalFlowPyrLK(
+        previous_gray, current_gray, corners, None, **LK_PARAMETERS
+    )
+    if status is None or not status.all():
+        return None
+    return moved.reshape(4, 2) + offset
+
+
+@dataclass
+class TrackedSpan:
+    """The frames of one track between two user keyframes.
+
+    Attributes:
+        keyframe (Placement): The user keyframe the span starts from.
+        start_frame (int): The frame of the starting keyframe.
+        end_frame (int): The frame of the next keyframe, or None after the last one.
+        end_quad (np.ndarray): The quad of the next keyframe, used to correct drift.
+        quad (np.ndarray): The tracked quad on the latest processed frame.
+        tracked (List[Tuple[int, np.ndarray]]): The frames and quads tracked so far.
+        lost (bool): Whether tracking was lost.
+    """
+
+    keyframe: Placement
+    start_frame: int
+    end_frame: Optional[int]
+    end_quad: Optional[np.ndarray]
+    quad: np.ndarray
+    tracked: List[Tuple[int, np.ndarray]] = field(default_factory=list)
+    lost: bool = False
+
+    def correct_drift(self, quad_at_end: np.ndarray) -> None:
+        """Spread the error between the tracked and the drawn end quad over the span."""
+        if self.end_quad is None or self.end_frame == self.start_frame:
+            return
+        error = self.end_quad - quad_at_end
+        length = self.end_frame - self.start_frame
+        self.tracked = [
+            (frame, quad + error * ((frame - self.start_frame) / length))
+            for frame, quad in self.tracked
+        ]
+
+
+def plan_spans(placements: Iterable[Placement], fps: float) -> Dict[int, List[TrackedSpan]]:
+    """Return the spans to track, keyed by the frame they start on."""
+    spans: Dict[int, List[TrackedSpan]] = {}
+    for keyframes in group_tracks(placements).values():
+        for index, keyframe in enumerate(keyframes):
+            if keyframe.hidden:
+                continue
+            start_frame = int(round(keyframe.timestamp * fps))
+            following = keyframes[index + 1] if index + 1 < len(keyframes) else None
+            end_frame = int(round(following.timestamp * fps)) if following else None
+            if end_frame is not None and end_frame - start_frame < 2:
+                continue
+            spans.setdefault(start_frame, []).append(
+                TrackedSpan(
+                    keyframe=keyframe,
+                    start_frame=start_frame,
+                    end_frame=end_frame,
+                    end_quad=following.quad if following and not following.hidden else None,
+                    quad=keyframe.quad.astype(np.float32),
+                )
+            )
+    return spans
+
+
+def track_placements(
+    video_path: str,
+    placements: Iterable[Placement],
+    stride: int = DEFAULT_STRIDE,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> List[Placement]:
+    """Track user keyframes through a video and return the derived keyframes.
+
+    Args:
+        video_path (str): The video file.
+        placements (Iterable[Placement]): The user-drawn keyframes.
+        stride (int, optional): Keep a derived keyframe every `stride` frames. Defaults to 1.
+        progress (Callable, optional): Called with the frames processed and the frame count.
+
+    Returns:
+        List[Placement]: The derived keyframes, sorted by timestamp. They never fall on the
+        frame of a user keyframe.
+
+    Raises:
+        RenderError: If the video cannot be opened.
+    """
+    capture = cv2.VideoCapture(video_path)
+    if not capture.isOpened():
+        raise RenderError(f"Unable to open video {video_path}")
+    fps = capture.get(cv2.CAP_PROP_FPS) or FALLBACK_FPS
+    total_frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    pending = plan_spans(placements, fps)
+    active: List[TrackedSpan] = []
+    finished: List[TrackedSpan] = []
+    previous = None
+    frame_index = -1
+    try:
+        while pending or active:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            frame_index += 1
+
+            still_active = []
+            for span in active:
+                quad = track_quad(previous, frame, span.quad)
+                if quad is None:
+                    span.lost = True
+                    finished.append(span)
+                    continue
+                if frame_index == span.end_frame:
+                    span.correct_drift(quad)
+                    finished.append(span)
+                    continue
+                span.quad = quad
+                if (frame_index - span.start_frame) % stride == 0:
+                    span.tracked.append((frame_index, quad))
+                still_active.append(span)
+            active = still_active + pending.pop(frame_index, [])
+
+            previous = frame
+            if progress is not None:
+                progress(frame_index + 1, total_frames)
+    finally:
+        capture.release()
+    finished.extend(active)
+
+    derived = [
+        Placement(
+            track=span.keyframe.track,
+            timestamp=frame / fps,
+            quad=quad.astype(np.float32),
+            image_url=span.keyframe.image_url,
+            z=span.keyframe.z,
+        )
+        for span in finished
+        for frame, quad in span.tracked
+    ]
+    return sorted(derived, key=lambda placement: placement.timestamp)
+
+
+@transactional
+def delete_derived_annotations(project_id: str) -> None:
+    """Delete the annotations derived by tracking a project."""
+    Annotation.query.filter_by(project_id=project_id, is_derived=True).delete(
+        synchronize_session=False
+    )
+
+
+@transactional
+def save_derived_annotations(project_id: str, derived: Iterable[Placement]) -> None:
+    """Replace the derived annotations of a project with freshly tracked keyframes."""
+    Annotation.query.filter_by(project_id=project_id, is_derived=True).delete(
+        synchronize_session=False
+    )
+    db.session.bulk_save_objects(
+        [
+            Annotation(
+                project_id=project_id,
+                timestamp=placement.timestamp,
+                points={
+                    "corners": np.round(placement.quad.astype(np.float64), 2).tolist(),
+                    "track": placement.track,
+                    "z": placement.z,
+                },
+                image_url=placement.image_url,
+                is_derived=True,
+            )
+            for placement in derived
+        ]
+    )
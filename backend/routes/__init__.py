@@ -6,8 +6,8 @@ the React application. The module provides a function to register these blueprin
 the main Flask application.
 
 Key Features:
-- Imports blueprints for handling authentication, project-related operations, and serving
-  the React frontend.
+- Imports blueprints for handling authentication, project-related operations, chunked
+  uploads, proxy and sprite media, and serving the React frontend.
 - Provides a utility function to register multiple blueprints with a Flask application.
 
 Functions:
@@ -31,8 +31,11 @@ from typing import List
 from flask import Blueprint, Flask
 
 from .auth import app as auth_blueprint
+from .media import app as media_blueprint
 from .project import app as project_blueprint
 from .react import app as react_blueprint
+from .upload import app as upload_blueprint
+from .util import refresh_session_record
 
 
 def register_blueprint(app: Flask, *blueprints: List[Blueprint]) -> None:
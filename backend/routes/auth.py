@@ -12,6 +12,7 @@ Key Features:
 - Token refresh functionality using refresh tokens stored in secure cookies.
 - Logout functionality that clears authentication cookies.
 - Access token verification against AWS Cognito.
+- Optional server-side sessions, where the tokens stay on the server behind a session cookie.
 
 Routes:
 - POST /auth/register: Registers a new user in AWS Cognito.
@@ -38,12 +39,21 @@ from http import HTTPStatus
 import jwt
 from flask import Blueprint, jsonify, make_response, request
 
-from backend.utils import get_environment_variable
-from backend.utils.cognito import cognito_client, login_user, sign_up, verify_sign_up
+from backend.sessions import SESSION_COOKIE_NAME, get_session_store
+from backend.utils import get_settings
+from backend.utils.cognito import (
+    cognito_client,
+    login_user,
+    refresh_tokens,
+    sign_up,
+    verify_sign_up,
+)
 
 from .util import (
+    build_session_record,
     decode_and_verify_token,
     login_required,
+    refresh_session_record,
     set_secure_http_only_cookie,
     validate_input,
 )
@@ -117,6 +127,9 @@ def login_user_endpoint():
     """
     Authenticate a user with AWS Cognito, returning tokens as HTTP-only cookies.
 
+    When server-side sessions are enabled, the tokens are kept in the session store and only
+    the opaque session ID is returned as a cookie.
+
     Expects JSON input with:
         - username (str): The user's username.
         - password (str): The user's password.
@@ -129,6 +142,17 @@ def login_user_endpoint():
         # Authenticate user with Cognito
         data = request.json
         response_data = login_user(data["username"], data["password"])
+
+        session_store = get_session_store()
+        if session_store is not None:
+            record = build_session_record(response_data["AuthenticationResult"])
+            session_store.save(record)
+            response = make_response(
+                jsonify({"message": "Login successful"}), HTTPStatus.OK
+            )
+            set_secure_http_only_cookie(response, SESSION_COOKIE_NAME, record.session_id)
+            return response
+
         tokens = {
             "id_token": response_data["AuthenticationResult"]["IdToken"],
             "access_token": response_data["AuthenticationResult"]["AccessToken"],
@@ -166,6 +190,11 @@ def refresh_access_token():
         Response: JSON indicating success with a new access token or an
         error message with relevant HTTP status.
     """
+    session_store = get_session_store()
+    session_id = request.cookies.get(SESSION_COOKIE_NAME)
+    if session_store is not None and session_id:
+        return refresh_server_side_session(session_store, session_id)
+
     # Retrieve the refresh token from the secure HTTP-only cookie
     refresh_token = request.cookies.get("refresh_token")
 
@@ -177,11 +206,7 @@ def refresh_access_token():
 
     try:
         # Call Cognito to refresh the tokens
-        response = cognito_client.initiate_auth(
-            ClientId=get_environment_variable("COGNITO_CLIENT_ID"),
-            AuthFlow="REFRESH_TOKEN_AUTH",
-            AuthParameters={"REFRESH_TOKEN": refresh_token},
-        )
+        response = refresh_tokens(refresh_token)
 
         # Extract the new access token
         new_access_token = response["AuthenticationResult"]["AccessToken"]
@@ -214,6 +239,43 @@ def refresh_access_token():
         )
 
 
+def refresh_server_side_session(session_store, session_id):
+    """
+    Refreshes the tokens of a server-side session immediately.
+
+    Args:
+        session_store (SessionStore): The configured session store.
+        session_id (str): The session ID from the session cookie.
+
+    Returns:
+        Response: JSON indicating success or an error message with relevant HTTP status.
+    """
+    record = session_store.get(session_id)
+    if record is None:
+        return jsonify({"error": "Session not found"}), HTTPStatus.UNAUTHORIZED
+
+    try:
+        new_record = refresh_session_record(record)
+    except Exception as e:
+        print(f"Token refresh error: {e}")
+        return (
+            jsonify({"error": "Failed to refresh token"}),
+            HTTPStatus.INTERNAL_SERVER_ERROR,
+        )
+
+    if new_record is None:
+        session_store.delete(session_id)
+        response = make_response(
+            jsonify({"error": "Refresh token has expired. Please log in again."}),
+            HTTPStatus.UNAUTHORIZED,
+        )
+        response.set_cookie(SESSION_COOKIE_NAME, "", expires=0)
+        return response
+
+    session_store.save(new_record)
+    return jsonify({"message": "Token refreshed successfully"}), HTTPStatus.OK
+
+
 @app.route("/resend-verification", methods=["POST"])
 def resend_verification():
     try:
@@ -226,7 +288,7 @@ def resend_verification():
 
         # Call the ResendConfirmationCode API
         response = cognito_client.resend_confirmation_code(
-            ClientId=get_environment_variable("COGNITO_CLIENT_ID"), Username=username
+            ClientId=get_settings().cognito_client_id, Username=username
         )
 
         return (
@@ -250,12 +312,18 @@ def resend_verification():
 @login_required
 def logout():
     """
-    Clears authentication cookies on logout.
+    Clears authentication cookies on logout and removes the server-side session, if any.
     """
+    session_store = get_session_store()
+    session_id = request.cookies.get(SESSION_COOKIE_NAME)
+    if session_store is not None and session_id:
+        session_store.delete(session_id)
+
     response = make_response(jsonify({"message": "Logout successful"}), HTTPStatus.OK)
     response.set_cookie("access_token", "", expires=0)
     response.set_cookie("id_token", "", expires=0)
     response.set_cookie("refresh_token", "", expires=0)
+    response.set_cookie(SESSION_COOKIE_NAME, "", expires=0)
     return response
 
 
@@ -267,6 +335,23 @@ def verify_access_token():
     Returns:
         Response: JSON indicating verification success or failure, with relevant HTTP status.
     """
+    session_store = get_session_store()
+    session_id = request.cookies.get(SESSION_COOKIE_NAME)
+    if session_store is not None and session_id:
+        record = session_store.get(session_id)
+        if record is None or record.is_expired(leeway=60):
+            return jsonify({"error": "Session expired"}), HTTPStatus.UNAUTHORIZED
+        return (
+            jsonify(
+                {
+                    "message": "Token is valid",
+                    "decoded_token": record.access_claims,
+                    "decoded_id_token": record.id_claims,
+                }
+            ),
+            HTTPStatus.OK,
+        )
+
     # Retrieve the token from the secure HTTP-only cookie
     access_token = request.cookies.get("access_token")
     id_token = request.cookies.get("id_token")
@@ -0,0 +1,169 @@
+"""Media Routes Module
+
+This module serves the proxy video and thumbnail sprite sheet generated for every upload, which
+the annotation UI scrubs instead of the full-resolution video. The files are derived from the
+content of the source video and never change, so responses carry a strong ETag and may be cached
+by the browser indefinitely. Byte ranges are supported, so video players can seek in the proxy.
+
+Key Features:
+- Serve the all-intra proxy of a project's video, or of one of its uploaded videos.
+- Serve the sprite sheet and its index, including the factors mapping proxy coordinates to
+  full-resolution frame coordinates.
+
+Routes:
+- GET /api/projects/<project_id>/proxy: Returns the proxy video.
+- GET /api/projects/<project_id>/sprite: Returns the JPEG sprite sheet.
+- GET /api/projects/<project_id>/sprite.json: Returns the sprite index.
+
+All routes accept an optional `video_id` query parameter selecting an uploaded video instead of
+the project's main video.
+
+Example:
+    from backend.routes.media import app as media_app
+
+    # Register the media blueprint in the main application
+    main_app.register_blueprint(media_app)
+"""
+
+from typing import Optional
+
+from flask import Blueprint, Response, jsonify, request, send_file
+from werkzeug.datastructures import ContentRange
+
+from backend.models import Project, Video
+from backend.render import load_media_index, proxy_scale
+from backend.storage import LocalStorageBackend, derived_key, get_storage_backend
+
+from .util import login_required
+
+app = Blueprint("media", __name__, url_prefix="/api/projects")
+
+CACHE_CONTROL = "private, max-age=31536000, immutable"
+STREAM_BLOCK_SIZE = 1024 * 1024
+
+
+def get_source_digest(project_id: str) -> Optional[str]:
+    """Return the blob key of the video selected by the request, or None if not accessible."""
+    project = Project.query.filter_by(id=project_id, sub=request.id_token["sub"]).first()
+    if not project:
+        return None
+    video_id = request.args.get("video_id")
+    if not video_id:
+        return project.file_path
+    video = Video.query.filter_by(id=video_id, project_id=project.id).first()
+    return video.filename if video else None
+
+
+def send_derived_file(digest: str, name: str, mimetype: str) -> Response:
+    """Send a file generated from a blob with long-lived caching and byte range support.
+
+    Args:
+        digest (str): The blob key of the source video.
+        name (str): The name of the generated file.
+        mimetype (str): The content type of the response.
+
+    Returns:
+        Response: The file, a partial response for range requests, 304 if the client's copy is
+        current, or 404 if the file has not been generated yet.
+    """
+    storage = get_storage_backend()
+    key = derived_key(digest, name)
+    if not storage.exists(key):
+        return jsonify({"error": "Media is still being prepared"}), 404
+    etag = f"{digest}-{name}"
+
+    if isinstance(storage, LocalStorageBackend):
+        response = send_file(storage.path(key), mimetype=mimetype, conditional=True, etag=etag)
+    elif request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        size = storage.size(key)
+        byte_range = request.range.range_for_length(size) if request.range else None
+        if byte_range is not None:
+            start, end = byte_range
+            response = Response(storage.read_range(key, start, end), 206, mimetype=mimetype)
+            response.content_range = ContentRange("bytes", start, end, size)
+        else:
+            body = storage.open_read(key)
+            response = Response(iter(lambda: body.read(STREAM_BLOCK_SIZE), b""), mimetype=mimetype)
+            response.content_length = size
+        response.accept_ranges = "bytes"
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return response
+
+
+@app.route("/<project_id>/proxy", methods=["GET"])
+@login_required
+def get_proxy(project_id: str):
+    """Return the low-resolution, all-intra proxy of a project video.
+
+    Args:
+        project_id (str): The unique identifier of the project.
+
+    Returns:
+        Response: The MP4 proxy, or 404 if the video is unknown or its proxy is not ready.
+
+    Examples:
+        >>> response = get_proxy("1234")
+        >>> response.mimetype
+        'video/mp4'
+    """
+    digest = get_source_digest(project_id)
+    if not digest:
+        return {"error": "Video not found"}, 404
+    return send_derived_file(digest, "proxy.mp4", "video/mp4")
+
+
+@app.route("/<project_id>/sprite", methods=["GET"])
+@login_required
+def get_sprite(project_id: str):
+    """Return the thumbnail sprite sheet of a project video.
+
+    Args:
+        project_id (str): The unique identifier of the project.
+
+    Returns:
+        Response: The JPEG sprite sheet, or 404 if the video is unknown or not ready.
+
+    Examples:
+        >>> response = get_sprite("1234")
+        >>> response.mimetype
+        'image/jpeg'
+    """
+    digest = get_source_digest(project_id)
+    if not digest:
+        return {"error": "Video not found"}, 404
+    return send_derived_file(digest, "sprite.jpg", "image/jpeg")
+
+
+@app.route("/<project_id>/sprite.json", methods=["GET"])
+@login_required
+def get_sprite_index(project_id: str):
+    """Return the index of the sprite sheet of a project video.
+
+    The index lists the time and position of every tile, the tile size, and the source and
+    proxy sizes. `scale` holds the factors multiplying proxy coordinates into full-resolution
+    frame coordinates.
+
+    Args:
+        project_id (str): The unique identifier of the project.
+
+    Returns:
+        Response: The JSON index, or 404 if the video is unknown or not ready.
+
+    Examples:
+        >>> response = get_sprite_index("1234")
+        >>> response.get_json()["scale"]
+        [6.0, 6.0]
+    """
+    digest = get_source_digest(project_id)
+    if not digest:
+        return {"error": "Video not found"}, 404
+    index = load_media_index(digest)
+    if index is None:
+        return {"error": "Media is still being prepared"}, 404
+    response = jsonify({**index, "scale": list(proxy_scale(index))})
+    response.set_etag(f"{digest}-sprite.json")
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return response.make_conditional(request)
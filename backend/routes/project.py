@@ -8,16 +8,30 @@ utilizes Flask's Blueprint for modular route management.
 Key Features:
 - Create a new project with a title and description.
 - List all projects associated with the authenticated user.
-- Upload videos associated with a specific project.
+- Upload videos associated with a specific project, stored once per distinct content, and
+  queue the generation of their proxy and sprite sheet.
+- Accept annotations drawn on the proxy and map them to full-resolution coordinates.
 - Add annotations to a project, including timestamps and image URLs.
-- Apply annotations to videos, processing frames as needed.
+- Derive annotations between user keyframes by tracking the placements in the background.
+- Apply annotations to videos by queueing a background render of the ad creatives.
+- Render several creative variants of a project in one background pass over the video.
+- Preview one composited frame at a chosen timestamp without queueing a render.
+- Report the status, progress and estimated remaining time of render jobs.
 
 Routes:
 - POST /api/projects/: Creates a new project.
 - GET /api/projects/: Lists all projects for the authenticated user.
-- POST /api/projects/<int:project_id>/upload: Uploads a video for the specified project.
-- POST /api/projects/<int:project_id>/annotations: Adds annotations to the specified project.
-- POST /api/projects/<int:project_id>/apply: Applies annotations to the specified project.
+- POST /api/projects/<project_id>/upload: Uploads a video for the specified project.
+  Large files should use the resumable chunked upload routes in `backend.routes.upload`.
+- POST /api/projects/<project_id>/annotations: Adds annotations to the specified project.
+- POST /api/projects/<project_id>/track: Queues a tracking job deriving annotations between
+  the user-drawn keyframes.
+- POST /api/projects/<project_id>/apply: Queues a render of the annotations into the project
+  video and returns the job.
+- POST /api/projects/<project_id>/apply/batch: Queues a render of several creative variants of
+  the annotations and returns the job.
+- GET /api/projects/<project_id>/preview?t=<seconds>: Returns one composited frame as an image.
+- GET /api/projects/<project_id>/jobs/<job_id>: Returns the status of a render job.
 
 Usage:
 This module is intended to be imported and used within the Flask application to manage
@@ -31,20 +45,48 @@ Example:
     main_app.register_blueprint(project_app)
 """
 
-import os
-
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request
 
+from backend.jobs import (
+    queue_media_preparation,
+    record_cached_job,
+    submit_render_job,
+    wake_render_queue,
+)
 from backend.models import (
     Annotation,
     Project,
+    RenderJob,
     Video,
     delete_object,
     save_object,
     save_objects,
 )
+from backend.models.render_job import JOB_BATCH, JOB_TRACK
+from backend.render import (
+    INTERPOLATION_METHODS,
+    KERNEL_BACKENDS,
+    PRESETS,
+    MediaNotReady,
+    RenderError,
+    cache_settings,
+    delete_derived_annotations,
+    load_media_index,
+    get_preset,
+    load_placements,
+    lookup_render,
+    proxy_scale,
+    render_cache_key,
+    render_preview,
+    validate_variants,
+    variant_output_key,
+)
+from backend.render.preview import PREVIEW_FORMATS
+from backend.render.geometry import scale_points
+from backend.storage import release_blob, store_stream
+from backend.utils import get_settings
 
-from .util import login_required, secure_filename
+from .util import login_required
 
 app = Blueprint("project", __name__, url_prefix="/api/projects")
 
@@ -85,16 +127,15 @@ def create_project():
         return jsonify({"error": "All fields are required"}), 400
     if (len(title) <= 0) or (len(description) <= 0):
         return {"error": "Title or description is empty"}, 400
-    # Handle file upload
+    # Handle file upload, deduplicated by content
     file_path = None
     if uploaded_file:
-        filename = secure_filename(uploaded_file.filename)
-        file_path = os.path.join("uploads", filename)
-        uploaded_file.save(file_path)
+        file_path = store_stream(uploaded_file.stream)
     project = Project(
         title=title, description=description, sub=user_cognito_sub, file_path=file_path
     )
     save_object(project)
+    queue_media_preparation(project.id, user_cognito_sub, file_path)
     return jsonify({"message": "Project created", "project_id": project.id}), 201
 
 
@@ -137,7 +178,8 @@ def delete_project(project_id: str):
     """Delete a project associated with the authenticated user.
 
     This function handles the deletion of a specified project from the database. It verifies
-    that the project belongs to the authenticated user before proceeding with the deletion.
+    that the project belongs to the authenticated user before proceeding with the deletion. The
+    project's videos are deleted as well, and stored files no longer referenced are removed.
 
     Args:
         project_id (str): The unique identifier of the project to be deleted.
@@ -160,21 +202,26 @@ def delete_project(project_id: str):
     project = Project.query.filter_by(id=project_id, sub=user_cognito_sub).first()
     if not project:
         return {"error": "Project not found"}, 404
+    for video in Video.query.filter_by(project_id=project.id).all():
+        delete_object(video)
+        release_blob(video.filename)
     delete_object(project)
+    release_blob(project.file_path)
     return {"message": "Project deleted"}, 200
 
 
-@app.route("/<int:project_id>/upload", methods=["POST"])
+@app.route("/<project_id>/upload", methods=["POST"])
 @login_required
-def upload_video(project_id: int):
+def upload_video(project_id: str):
     """Upload a video file associated with a specific project.
 
     This function handles the uploading of a video file to the server and associates
-    it with the specified project. It saves the video file to a designated directory
-    and creates a corresponding entry in the database.
+    it with the specified project. The file is hashed while it is written to content-addressed
+    storage, so footage already stored is kept only once, and a corresponding entry is created
+    in the database. The generation of the proxy and sprite sheet of new footage is queued.
 
     Args:
-        project_id (int): The unique identifier of the project to which the video is associated.
+        project_id (str): The unique identifier of the project to which the video is associated.
 
     Returns:
         Response: A JSON response indicating the success of the upload along with the
@@ -182,84 +229,408 @@ def upload_video(project_id: int):
 
     Raises:
         BadRequest: If the uploaded file is not valid or if the video file is missing.
+        NotFound: If the project does not exist or belongs to another user.
 
     Examples:
-        >>> response = upload_video(1)
+        >>> response = upload_video("1234")
         >>> response.status_code
         201
     """
 
+    user_cognito_sub = request.id_token["sub"]
+    project = Project.query.filter_by(id=project_id, sub=user_cognito_sub).first()
+    if not project:
+        return {"error": "Project not found"}, 404
+
     video = request.files["video"]
-    filename = secure_filename(video.filename)
-    path = os.path.join("uploads", filename)
-    video.save(path)
+    filename = store_stream(video.stream)
+
+    existing_video = Video.query.filter_by(project_id=project.id, filename=filename).first()
+    if existing_video:
+        # The project already has this exact footage; keep a single reference to it
+        release_blob(filename)
+        return jsonify({"message": "Video uploaded", "video_id": existing_video.id}), 201
 
-    video_entry = Video(project_id=project_id, filename=filename)
+    video_entry = Video(project_id=project.id, filename=filename)
     save_object(video_entry)
+    queue_media_preparation(project.id, user_cognito_sub, filename)
 
     return jsonify({"message": "Video uploaded", "video_id": video_entry.id}), 201
 
 
-@app.route("/<int:project_id>/annotations", methods=["POST"])
+@app.route("/<project_id>/annotations", methods=["POST"])
 @login_required
-def add_annotations(project_id: int):
+def add_annotations(project_id: str):
     """Add annotations to a specific project.
 
     This function processes a list of annotations provided in the request body and
     associates them with the specified project. It saves the annotations to the database
-    and returns a success message upon completion.
+    and returns a success message upon completion. Annotations derived by tracking were computed
+    from the previous keyframes, so they are dropped; queue a tracking job to derive them again.
+
+    When the request sets `"coordinates": "proxy"`, the points were drawn on the proxy video and
+    are scaled to the full-resolution frame before they are stored.
 
     Args:
-        project_id (int): The unique identifier of the project to which the annotations are added.
+        project_id (str): The unique identifier of the project to which the annotations are added.
 
     Returns:
         Response: A JSON response indicating the success of the operation.
 
     Raises:
         BadRequest: If the request does not contain valid JSON or if the annotations are missing.
+        NotFound: If the project does not exist or belongs to another user.
+        Conflict: If the points are in proxy coordinates but the proxy is not ready yet.
 
     Examples:
-        >>> response = add_annotations(1)
+        >>> response = add_annotations("1234")
         >>> response.status_code
         201
     """
 
+    user_cognito_sub = request.id_token["sub"]
+    project = Project.query.filter_by(id=project_id, sub=user_cognito_sub).first()
+    if not project:
+        return {"error": "Project not found"}, 404
+
     data = request.json
+    entries = data["annotations"]
+    if data.get("coordinates") == "proxy":
+        index = load_media_index(project.file_path) if project.file_path else None
+        if index is None:
+            return {"error": "The proxy of this project is not ready yet"}, 409
+        scale_x, scale_y = proxy_scale(index)
+        entries = [
+            {**entry, "points": scale_points(entry["points"], scale_x, scale_y)}
+            for entry in entries
+        ]
     annotations = [
         Annotation(
-            project_id=project_id,
+            project_id=project.id,
             timestamp=entry["timestamp"],
             points=entry["points"],
             image_url=entry["image_url"],
+            is_derived=False,
         )
-        for entry in data["annotations"]
+        for entry in entries
     ]
+    delete_derived_annotations(project.id)
     save_objects(annotations)
     return jsonify({"message": "Annotations added"}), 201
 
 
-@app.route("/<int:project_id>/apply", methods=["POST"])
+@app.route("/<project_id>/track", methods=["POST"])
 @login_required
-def apply_annotations(project_id: int):
-    """Apply annotations to a specific project.
+def track_annotations(project_id: str):
+    """Queue a tracking pass deriving annotations between the user-drawn keyframes.
+
+    The quads drawn by the user are followed through the intermediate frames with optical flow,
+    and the results replace the project's previously derived annotations once the job completes.
+
+    Args:
+        project_id (str): The unique identifier of the project to track.
+
+    Returns:
+        Response: A JSON response with the queued job, with status code 202.
+
+    Raises:
+        NotFound: If the project or associated video cannot be found.
+
+    Examples:
+        >>> response = track_annotations("1234")
+        >>> response.status_code
+        202
+    """
+
+    user_cognito_sub = request.id_token["sub"]
+    project = Project.query.filter_by(id=project_id, sub=user_cognito_sub).first()
+    if not project or not project.file_path:
+        return {"error": "Project not found"}, 404
+
+    data = request.get_json(silent=True) or {}
+    stride = data.get("stride", 1)
+    if not isinstance(stride, int) or isinstance(stride, bool) or stride < 1:
+        return {"error": "stride must be a positive integer"}, 400
+
+    job = submit_render_job(
+        project.id, user_cognito_sub, None, options={"stride": stride}, kind=JOB_TRACK
+    )
+    wake_render_queue()
+    return jsonify({"message": "Tracking queued", "job": job.to_dict()}), 202
+
 
-    This function processes the annotations associated with the specified project and
-    applies them to the corresponding video. It is intended to overlay images at specified
-    timestamps using OpenCV, enhancing the video with the provided annotations.
+@app.route("/<project_id>/apply", methods=["POST"])
+@login_required
+def apply_annotations(project_id: str):
+    """Queue a render of the annotations of a specific project.
+
+    This function queues a background job rendering the annotations associated with the
+    specified project into the project video, and returns immediately. Each annotation's ad
+    creative is warped into its quad and composited into the frames, and the result is written
+    to storage. Poll the job status route to follow the render. Unless `incremental` is false,
+    only the segments whose annotations changed since the previous render are rendered again.
+    With `smart`, the GOPs without visible placements are copied from the source instead of
+    being rendered. `kernel` selects the compositing backend, "opencv", "numpy" or "numba".
+    `preset` is "final" or "draft"; a draft renders at half resolution with the fastest
+    settings, optionally every `frame_step`-th frame only, to check placements quickly, and is
+    stored apart from the final render. A render identical to a cached one is answered at once
+    with a complete job pointing to the cached video, when the digests of its creatives are
+    already known; otherwise the worker finds it in the cache.
 
     Args:
-        project_id (int): The unique identifier of the project for which annotations are applied.
+        project_id (str): The unique identifier of the project for which annotations are applied.
 
     Returns:
-        None: This function does not return a value.
+        Response: A JSON response with the queued job, with status code 202, or with the
+        complete job of a cached render, with status code 200.
 
     Raises:
         NotFound: If the project or associated video cannot be found.
 
     Examples:
-        >>> apply_annotations(1)
+        >>> response = apply_annotations("1234")
+        >>> response.status_code
+        202
+    """
+
+    decoded_id_token = request.id_token
+    user_cognito_sub = decoded_id_token["sub"]
+    project = Project.query.filter_by(id=project_id, sub=user_cognito_sub).first()
+    if not project or not project.file_path:
+        return {"error": "Project not found"}, 404
+
+    data = request.get_json(silent=True) or {}
+    interpolation = data.get("interpolation", "linear")
+    if interpolation not in INTERPOLATION_METHODS:
+        return {"error": f"Unknown interpolation method: {interpolation}"}, 400
+    options = {"interpolation": interpolation}
+    if "segments" in data:
+        segments = data["segments"]
+        if not isinstance(segments, int) or isinstance(segments, bool) or segments < 1:
+            return {"error": "segments must be a positive integer"}, 400
+        options["segments"] = segments
+    if "incremental" in data:
+        if not isinstance(data["incremental"], bool):
+            return {"error": "incremental must be a boolean"}, 400
+        options["incremental"] = data["incremental"]
+    smart = data.get("smart", get_settings().render_smart)
+    if not isinstance(smart, bool):
+        return {"error": "smart must be a boolean"}, 400
+    # Recorded even when defaulted, since smart renders are encoded differently
+    options["smart"] = smart
+    kernel = data.get("kernel", get_settings().render_kernel)
+    if kernel not in KERNEL_BACKENDS:
+        return {"error": f"Unknown compositing kernel: {kernel}"}, 400
+    # Recorded even when defaulted, since kernels round a few pixels differently
+    options["kernel"] = kernel
+    preset = data.get("preset", "final")
+    if preset not in PRESETS:
+        return {"error": f"Unknown render preset: {preset}"}, 400
+    options["preset"] = preset
+    if "frame_step" in data:
+        frame_step = data["frame_step"]
+        if not isinstance(frame_step, int) or isinstance(frame_step, bool):
+            return {"error": "frame_step must be a positive integer"}, 400
+        try:
+            get_preset(preset, frame_step)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        options["frame_step"] = frame_step
+
+    if get_settings().render_cache_max_bytes > 0:
+        # Only from creative digests already cached: creatives are never fetched in a request,
+        # and a render whose key is unknown here is still looked up by the worker
+        try:
+            cache_key = render_cache_key(
+                project.file_path,
+                load_placements(project.id),
+                cache_settings(options),
+                fetch=False,
+            )
+        except ValueError as e:
+            # A creative that cannot be loaded fails the render itself, with a clearer error
+            print(f"Unable to compute render cache key: {e}")
+            cache_key = None
+        entry = lookup_render(cache_key) if cache_key else None
+        if entry is not None:
+            job = record_cached_job(
+                project.id,
+                user_cognito_sub,
+                entry.output_key,
+                {"cached": True, "cache_key": cache_key},
+            )
+            return jsonify({"message": "Render cached", "job": job.to_dict()}), 200
+
+    # Drafts keep their own output, so they never replace the final render
+    suffix = "" if preset == "final" else f".{preset}"
+    job = submit_render_job(
+        project.id,
+        user_cognito_sub,
+        f"renders/{project.id}{suffix}.mp4",
+        options=options,
+    )
+    wake_render_queue()
+    return jsonify({"message": "Render queued", "job": job.to_dict()}), 202
+
+
+@app.route("/<project_id>/apply/batch", methods=["POST"])
+@login_required
+def apply_batch(project_id: str):
+    """Queue a render of several creative variants of the annotations of a project.
+
+    The request body holds a `variants` list. Each variant has a `name` and maps the creatives
+    of the project to its own, by track in `tracks`, by original creative URL in `creatives`, or
+    for every other placement with `default`. The video is decoded once for all variants, and
+    each variant is written to `renders/<project_id>/<name>.mp4`.
+
+    Args:
+        project_id (str): The unique identifier of the project to render.
+
+    Returns:
+        Response: A JSON response with the queued job and the output key of every variant, with
+        status code 202.
+
+    Raises:
+        BadRequest: If the variants are invalid.
+        NotFound: If the project or associated video cannot be found.
+
+    Examples:
+        >>> response = apply_batch("1234")
+        >>> response.status_code
+        202
+    """
+
+    user_cognito_sub = request.id_token["sub"]
+    project = Project.query.filter_by(id=project_id, sub=user_cognito_sub).first()
+    if not project or not project.file_path:
+        return {"error": "Project not found"}, 404
+
+    data = request.get_json(silent=True) or {}
+    interpolation = data.get("interpolation", "linear")
+    if interpolation not in INTERPOLATION_METHODS:
+        return {"error": f"Unknown interpolation method: {interpolation}"}, 400
+    try:
+        variants = validate_variants(data.get("variants"))
+    except ValueError as e:
+        return {"error": str(e)}, 400
+
+    job = submit_render_job(
+        project.id,
+        user_cognito_sub,
+        None,
+        options={"interpolation": interpolation, "variants": variants},
+        kind=JOB_BATCH,
+    )
+    wake_render_queue()
+    outputs = {
+        variant["name"]: variant_output_key(project.id, variant["name"]) for variant in variants
+    }
+    return (
+        jsonify({"message": "Batch render queued", "job": job.to_dict(), "outputs": outputs}),
+        202,
+    )
+
+
+@app.route("/<project_id>/preview", methods=["GET"])
+@login_required
+def preview_frame(project_id: str):
+    """Return the frame of the project video at a timestamp, with its placements composited.
+
+    Query parameters:
+        - t (float): The time of the frame in seconds.
+        - format (str, optional): "jpeg" or "webp". Defaults to WebP when the client accepts it.
+        - width (int, optional): Downscale wider frames to this width.
+        - interpolation (str, optional): How quads are interpolated between keyframes.
+
+    Only the frames between the preceding keyframe and the requested one are decoded, and
+    decoded frames are cached, so scrubbing near a previous preview is fast.
+
+    Args:
+        project_id (str): The unique identifier of the project.
+
+    Returns:
+        Response: The encoded image, or an error message with the appropriate HTTP status. The
+        status is 409 while the media of the video is still being prepared.
+
+    Raises:
+        BadRequest: If a query parameter is missing or invalid.
+        NotFound: If the project or associated video cannot be found.
+
+    Examples:
+        >>> response = preview_frame("1234")
+        >>> response.mimetype
+        'image/jpeg'
+    """
+
+    user_cognito_sub = request.id_token["sub"]
+    project = Project.query.filter_by(id=project_id, sub=user_cognito_sub).first()
+    if not project or not project.file_path:
+        return {"error": "Project not found"}, 404
+
+    timestamp = request.args.get("t", type=float)
+    if timestamp is None or timestamp < 0:
+        return {"error": "t must be a non-negative number of seconds"}, 400
+    accepts_webp = "image/webp" in request.accept_mimetypes.values()
+    default_format = "webp" if accepts_webp else "jpeg"
+    image_format = request.args.get("format", default_format)
+    if image_format not in PREVIEW_FORMATS:
+        return {"error": f"Unknown preview format: {image_format}"}, 400
+    width = request.args.get("width", type=int)
+    if width is not None and width < 1:
+        return {"error": "width must be a positive integer"}, 400
+    interpolation = request.args.get("interpolation", "linear")
+    if interpolation not in INTERPOLATION_METHODS:
+        return {"error": f"Unknown interpolation method: {interpolation}"}, 400
+
+    annotations = (
+        Annotation.query.filter_by(project_id=project.id).order_by(Annotation.timestamp).all()
+    )
+    try:
+        image, mimetype = render_preview(
+            project.file_path,
+            annotations,
+            timestamp,
+            interpolation=interpolation,
+            image_format=image_format,
+            max_width=width,
+        )
+    except MediaNotReady:
+        return {"error": "Media is still being prepared"}, 409
+    except (RenderError, ValueError) as e:
+        return {"error": str(e)}, 422
+    response = Response(image, mimetype=mimetype)
+    response.headers["Cache-Control"] = "private, no-cache"
+    response.vary.add("Accept")
+    return response
+
+
+@app.route("/<project_id>/jobs/<job_id>", methods=["GET"])
+@login_required
+def get_render_job(project_id: str, job_id: str):
+    """Return the status of a render job.
+
+    Args:
+        project_id (str): The unique identifier of the project the job belongs to.
+        job_id (str): The unique identifier of the job.
+
+    Returns:
+        Response: A JSON response with the job status, progress, estimated remaining seconds,
+        error message and, once complete, the storage key of the output and the render
+        statistics.
+
+    Raises:
+        NotFound: If the job does not exist or belongs to another user.
+
+    Examples:
+        >>> response = get_render_job("1234", "5678")
+        >>> response.get_json()["job"]["status"]
+        'running'
     """
 
-    # Locate video, load annotations, and process frames
-    # Use OpenCV to overlay images at specified timestamps
-    print(f"Applying annotation to project id: {project_id}")
+    user_cognito_sub = request.id_token["sub"]
+    job = RenderJob.query.filter_by(
+        id=job_id, project_id=project_id, sub=user_cognito_sub
+    ).first()
+    if not job:
+        return {"error": "Render job not found"}, 404
+    return jsonify({"job": job.to_dict()})
@@ -0,0 +1,246 @@
+"""Chunked Upload Routes Module
+
+This module defines the routes for resumable, chunked video uploads. Large files are sent as a
+sequence of byte ranges, so an interrupted upload resumes from the last byte the server received
+instead of starting over, and request bodies are streamed to disk without being spooled first.
+
+Key Features:
+- Create an upload session for a project with the expected file size. Content the user already
+  stored completes immediately when the client sends its SHA-256 digest.
+- Send byte ranges at explicit offsets, streamed straight into the final file.
+- Query the current offset to resume an interrupted upload.
+- Finalize the upload, which verifies the SHA-256 digest, creates the `Video` entry and queues
+  the generation of its proxy and sprite sheet.
+
+Routes:
+- POST /api/projects/<project_id>/uploads: Creates an upload session.
+- PUT /api/projects/<project_id>/uploads/<upload_id>: Writes a chunk at the `Upload-Offset`.
+- GET /api/projects/<project_id>/uploads/<upload_id>: Returns the current offset of the upload.
+- POST /api/projects/<project_id>/uploads/<upload_id>/finalize: Completes the upload.
+
+Usage:
+This module is intended to be imported and used within the Flask application alongside the
+project routes.
+
+Example:
+    from backend.routes.upload import app as upload_app
+
+    # Register the upload blueprint in the main application
+    main_app.register_blueprint(upload_app)
+"""
+
+from http import HTTPStatus
+
+from flask import Blueprint, jsonify, request
+
+from backend.jobs import queue_media_preparation
+from backend.models import Project, UploadSession, Video, save_object
+from backend.models.upload_session import UPLOAD_COMPLETE
+from backend.storage import (
+    UploadDigestMismatch,
+    UploadError,
+    UploadOffsetMismatch,
+    append_chunk,
+    create_upload,
+    finalize_upload,
+    release_blob,
+)
+
+from .util import login_required
+
+app = Blueprint("upload", __name__, url_prefix="/api/projects")
+
+
+def get_user_upload(project_id: str, upload_id: str):
+    """Return the upload session owned by the authenticated user, or None."""
+    return UploadSession.query.filter_by(
+        id=upload_id, project_id=project_id, sub=request.id_token["sub"]
+    ).first()
+
+
+def create_upload_video(upload: UploadSession) -> None:
+    """Create the `Video` entry of a completed upload and queue its media, unless it exists.
+
+    When the project already has a video with the same content, the upload is linked to it and
+    the reference the upload took on the blob is released.
+    """
+    if upload.video_id:
+        return
+    existing_video = Video.query.filter_by(
+        project_id=upload.project_id, filename=upload.stored_filename
+    ).first()
+    if existing_video:
+        # The project already has this exact footage; keep a single reference to it
+        release_blob(upload.stored_filename)
+        upload.video_id = existing_video.id
+        save_object(upload)
+        return
+    video_entry = Video(project_id=upload.project_id, filename=upload.stored_filename)
+    save_object(video_entry)
+    upload.video_id = video_entry.id
+    save_object(upload)
+    queue_media_preparation(upload.project_id, upload.sub, upload.stored_filename)
+
+
+@app.route("/<project_id>/uploads", methods=["POST"])
+@login_required
+def create_upload_session(project_id: str):
+    """Create a resumable upload session for a video of the given project.
+
+    Expects JSON input with:
+        - filename (str): The original filename of the video.
+        - size (int): The total size of the file in bytes.
+        - sha256 (str, optional): The hex SHA-256 digest of the file. If the user already stored
+          this content, the upload completes immediately and the video is created.
+
+    Args:
+        project_id (str): The unique identifier of the project the video belongs to.
+
+    Returns:
+        Response: A JSON response with the upload ID and its starting offset, or an error
+        message with the appropriate HTTP status. Completed uploads also include the video ID.
+
+    Examples:
+        >>> response = create_upload_session("1234")
+        >>> response.status_code
+        201
+    """
+    data = request.get_json(silent=True) or {}
+    filename = data.get("filename")
+    size = data.get("size")
+    if not filename or not isinstance(size, int) or size <= 0:
+        return (
+            jsonify({"error": "filename and a positive size are required"}),
+            HTTPStatus.BAD_REQUEST,
+        )
+
+    user_cognito_sub = request.id_token["sub"]
+    project = Project.query.filter_by(id=project_id, sub=user_cognito_sub).first()
+    if not project:
+        return jsonify({"error": "Project not found"}), HTTPStatus.NOT_FOUND
+
+    upload = create_upload(
+        project.id, user_cognito_sub, filename, size, sha256=data.get("sha256")
+    )
+    if upload.status == UPLOAD_COMPLETE:
+        create_upload_video(upload)
+    return (
+        jsonify(
+            {
+                "upload_id": upload.id,
+                "offset": upload.offset,
+                "size": upload.total_size,
+                "status": upload.status,
+                "video_id": upload.video_id,
+            }
+        ),
+        HTTPStatus.CREATED,
+    )
+
+
+@app.route("/<project_id>/uploads/<upload_id>", methods=["PUT"])
+@login_required
+def upload_chunk(project_id: str, upload_id: str):
+    """Write the request body at the offset given by the `Upload-Offset` header.
+
+    The body is streamed to disk as it arrives. If the connection drops, the bytes received
+    so far are kept and the client resumes from the offset returned by the status route.
+
+    Args:
+        project_id (str): The unique identifier of the project.
+        upload_id (str): The unique identifier of the upload session.
+
+    Returns:
+        Response: A JSON response with the new offset, or a 409 response with the expected
+        offset if the chunk does not start where the upload currently ends.
+    """
+    upload = get_user_upload(project_id, upload_id)
+    if not upload:
+        return jsonify({"error": "Upload not found"}), HTTPStatus.NOT_FOUND
+
+    offset = request.headers.get("Upload-Offset", request.args.get("offset"))
+    if offset is None or not offset.isdigit():
+        return jsonify({"error": "Upload-Offset header is required"}), HTTPStatus.BAD_REQUEST
+
+    try:
+        new_offset = append_chunk(upload, request.stream, int(offset))
+    except UploadOffsetMismatch as e:
+        return (
+            jsonify({"error": str(e), "offset": e.expected}),
+            HTTPStatus.CONFLICT,
+        )
+    except UploadError as e:
+        return jsonify({"error": str(e), "offset": upload.offset}), HTTPStatus.BAD_REQUEST
+
+    response = jsonify({"offset": new_offset, "size": upload.total_size})
+    response.headers["Upload-Offset"] = str(new_offset)
+    return response, HTTPStatus.OK
+
+
+@app.route("/<project_id>/uploads/<upload_id>", methods=["GET"])
+@login_required
+def get_upload_status(project_id: str, upload_id: str):
+    """Return the number of bytes received so far for an upload.
+
+    Args:
+        project_id (str): The unique identifier of the project.
+        upload_id (str): The unique identifier of the upload session.
+
+    Returns:
+        Response: A JSON response with the offset, size and status of the upload.
+    """
+    upload = get_user_upload(project_id, upload_id)
+    if not upload:
+        return jsonify({"error": "Upload not found"}), HTTPStatus.NOT_FOUND
+
+    response = jsonify(
+        {
+            "upload_id": upload.id,
+            "offset": upload.offset,
+            "size": upload.total_size,
+            "status": upload.status,
+            "video_id": upload.video_id,
+        }
+    )
+    response.headers["Upload-Offset"] = str(upload.offset)
+    response.headers["Cache-Control"] = "no-store"
+    return response, HTTPStatus.OK
+
+
+@app.route("/<project_id>/uploads/<upload_id>/finalize", methods=["POST"])
+@login_required
+def finalize_upload_session(project_id: str, upload_id: str):
+    """Complete an upload and create the corresponding `Video` entry.
+
+    Optionally expects JSON input with:
+        - sha256 (str): The hex SHA-256 digest computed by the client, checked against the
+          digest computed by the server. On mismatch the upload restarts from offset zero.
+
+    Args:
+        project_id (str): The unique identifier of the project.
+        upload_id (str): The unique identifier of the upload session.
+
+    Returns:
+        Response: A JSON response with the video ID and SHA-256 digest, or an error message
+        with the appropriate HTTP status.
+    """
+    upload = get_user_upload(project_id, upload_id)
+    if not upload:
+        return jsonify({"error": "Upload not found"}), HTTPStatus.NOT_FOUND
+
+    expected_digest = (request.get_json(silent=True) or {}).get("sha256")
+    try:
+        digest = finalize_upload(upload, expected_sha256=expected_digest)
+    except UploadDigestMismatch as e:
+        return (
+            jsonify({"error": str(e), "offset": upload.offset}),
+            HTTPStatus.UNPROCESSABLE_ENTITY,
+        )
+    except UploadError as e:
+        return jsonify({"error": str(e), "offset": upload.offset}), HTTPStatus.CONFLICT
+
+    create_upload_video(upload)
+    return (
+        jsonify({"message": "Video uploaded", "video_id": upload.video_id, "sha256": digest}),
+        HTTPStatus.CREATED,
+    )
@@ -24,6 +24,10 @@ Functions:
     Decorator to validate the presence and format of `username` and `password` fields.
 - login_required(f): 
     Decorator to enforce authentication for specific routes.
+- build_session_record(auth_result, session_id=None, refresh_token=None): 
+    Verifies Cognito tokens once and builds a server-side session record from them.
+- refresh_session_record(record): 
+    Refreshes the tokens of a server-side session through Cognito.
 - generate_sha256_coded_string(input_string: str) -> str: 
     Generates a SHA-256 hash of the input string.
 - secure_filename(file_name: str) -> str: 
@@ -51,17 +55,30 @@ import re
 import uuid
 from functools import wraps
 from http import HTTPStatus
+from typing import Optional
 
 import jwt
 from flask import jsonify, request
 
-from backend.utils import get_environment_variable
+from backend.sessions import (
+    SESSION_COOKIE_NAME,
+    SessionRecord,
+    create_session_id,
+    get_session_store,
+)
+from backend.utils import get_settings
+from backend.utils.cognito import cognito_client, refresh_tokens
+from backend.utils.claims_cache import verified_claims_cache
+from backend.utils.jwks import get_jwks_cache
 
 
 def decode_and_verify_token(token, is_id_token=True):
     """
     Decodes and verifies the given token (ID or access) against the public keys from AWS Cognito.
 
+    Claims of successfully verified tokens are kept in the shared verified claims cache until the
+    token expires, so repeated calls with the same token skip signature verification.
+
     Args:
         token (str): The token to verify.
         is_id_token (bool): Flag indicating if the token is an ID token (True)
@@ -70,34 +87,34 @@ def decode_and_verify_token(token, is_id_token=True):
     Returns:
         dict: Decoded token if verification is successful.
     """
-    region = get_environment_variable("AWS_REGION")
-    user_pool_id = get_environment_variable("USER_POOL_ID")
-    cognito_client_id = get_environment_variable("COGNITO_CLIENT_ID")
+    cached_claims = verified_claims_cache.get(token, scope=is_id_token)
+    if cached_claims is not None:
+        return cached_claims
 
-    # URL for Cognito's JWKS (JSON Web Key Set)
-    cognito_keys_domain = f"https://cognito-idp.{region}.amazonaws.com"
-    cognito_keys_url = f"{cognito_keys_domain}/{user_pool_id}/.well-known/jwks.json"
-    jwks_client = jwt.PyJWKClient(cognito_keys_url)
+    settings = get_settings()
+    jwks_cache = get_jwks_cache(settings.jwks_url)
 
     try:
-        # Retrieve the signing key from Cognito based on the token's key ID
-        signing_key = jwks_client.get_signing_key_from_jwt(token)
+        # Retrieve the signing key based on the token's key ID from the shared key cache
+        signing_key = jwks_cache.get_signing_key_from_jwt(token)
 
         # Prepare verification options based on token type
         verification_options = {
             "algorithms": ["RS256"],
-            "issuer": f"{cognito_keys_domain}/{user_pool_id}",
+            "issuer": settings.cognito_issuer,
             "leeway": 60,  # Add a 60-second leeway to account for clock skew
         }
 
         if is_id_token:
             # Set audience for ID token
-            verification_options["audience"] = cognito_client_id
+            verification_options["audience"] = settings.cognito_client_id
         else:
             # Disable audience verification for access tokens, as they often lack the 'aud' claim
             verification_options["options"] = {"verify_aud": False}
 
-        return jwt.decode(token, signing_key.key, **verification_options)
+        decoded_token = jwt.decode(token, signing_key.key, **verification_options)
+        verified_claims_cache.put(token, decoded_token, scope=is_id_token)
+        return decoded_token
     except jwt.ExpiredSignatureError as err:
         print("Token has expired.")
         raise jwt.ExpiredSignatureError("Token has expired") from err
@@ -212,7 +229,9 @@ def login_required(f):
 
     This decorator checks for the presence of a valid authentication token in the request
     cookies before allowing access to the decorated route. If the token is missing or invalid,
-    it returns an unauthorized error response.
+    it returns an unauthorized error response. When server-side sessions are enabled and the
+    request carries a session cookie, the user is resolved with a single session store lookup
+    instead of verifying the ID token.
 
     Args:
         f (function): The function to be decorated, representing the route handler.
@@ -232,6 +251,16 @@ def login_required(f):
 
     @wraps(f)
     def decorated_function(*args, **kwargs):
+        session_store = get_session_store()
+        session_id = request.cookies.get(SESSION_COOKIE_NAME)
+        if session_store is not None and session_id:
+            record = session_store.get(session_id)
+            if record is None or record.is_expired(leeway=60):
+                return jsonify({"error": "Session expired"}), HTTPStatus.UNAUTHORIZED
+            request.id_token = record.id_claims
+            request.auth_session = record
+            return f(*args, **kwargs)
+
         token = request.cookies.get("id_token")  # Or use access_token if preferred
 
         if not token:
@@ -255,6 +284,65 @@ def login_required(f):
     return decorated_function
 
 
+def build_session_record(
+    auth_result: dict,
+    session_id: Optional[str] = None,
+    refresh_token: Optional[str] = None,
+) -> SessionRecord:
+    """Verify the tokens of a Cognito authentication result and build a session record.
+
+    The tokens are verified once here, so requests using the session never verify them again.
+
+    Args:
+        auth_result (dict): The `AuthenticationResult` returned by Cognito.
+        session_id (str, optional): ID of the session to update. A new ID is generated if omitted.
+        refresh_token (str, optional): Refresh token to keep when Cognito does not return one,
+        as is the case for the `REFRESH_TOKEN_AUTH` flow.
+
+    Returns:
+        SessionRecord: The session record holding the tokens and their verified claims.
+
+    Raises:
+        jwt.InvalidTokenError: If either token fails verification.
+    """
+    id_token = auth_result["IdToken"]
+    access_token = auth_result["AccessToken"]
+    id_claims = decode_and_verify_token(id_token, is_id_token=True)
+    access_claims = decode_and_verify_token(access_token, is_id_token=False)
+    return SessionRecord(
+        session_id=session_id or create_session_id(),
+        sub=id_claims["sub"],
+        id_token=id_token,
+        access_token=access_token,
+        refresh_token=auth_result.get("RefreshToken", refresh_token),
+        id_claims=id_claims,
+        access_claims=access_claims,
+        expires_at=min(id_claims["exp"], access_claims["exp"]),
+    )
+
+
+def refresh_session_record(record: SessionRecord) -> Optional[SessionRecord]:
+    """Refresh the tokens of a server-side session using the `REFRESH_TOKEN_AUTH` flow.
+
+    Args:
+        record (SessionRecord): The session to refresh.
+
+    Returns:
+        SessionRecord: The refreshed session, or None if the refresh token is no longer valid.
+    """
+    try:
+        response = refresh_tokens(record.refresh_token)
+    except cognito_client.exceptions.NotAuthorizedException:
+        print("Refresh token has expired or is invalid.")
+        return None
+    new_record = build_session_record(
+        response["AuthenticationResult"],
+        session_id=record.session_id,
+        refresh_token=record.refresh_token,
+    )
+    return new_record.updated(created_at=record.created_at)
+
+
 def generate_sha256_coded_string(input_string: str) -> str:
     """Generate a SHA-256 hash of the input string and encode it in a URL-safe format.
 
@@ -0,0 +1,90 @@
+"""Sessions Package Initialization Module
+
+This module provides opt-in server-side login sessions. When enabled, a successful login stores
+the Cognito tokens in a session store behind an opaque session ID, and the client only receives
+a short `session_id` cookie. Authenticated requests then resolve the user with a single store
+lookup instead of verifying JWT signatures.
+
+Key Features:
+- Pluggable session stores: an in-memory LRU and a SQLAlchemy-backed store.
+- Background token refresh through the Cognito `REFRESH_TOKEN_AUTH` flow.
+- Helpers to create session IDs and access the configured store.
+
+Configuration (read through `Settings`):
+- SESSION_MODE: Enables server-side sessions when set to a true value. Defaults to false.
+- SESSION_STORE: Either "memory" or "sqlalchemy". Defaults to "memory".
+- SESSION_MAX_ENTRIES: Capacity of the in-memory store. Defaults to 10000.
+- SESSION_REFRESH_INTERVAL: Seconds between background refresh scans. Defaults to 60.
+- SESSION_REFRESH_MARGIN: Refresh sessions expiring within this many seconds. Defaults to 300.
+
+Example:
+    from backend.sessions import initialize_session_store
+
+    initialize_session_store(app, refresh_fn=refresh_session_record)
+"""
+
+import secrets
+from typing import Callable, Optional
+
+from flask import Flask, current_app
+
+from backend.utils import get_settings
+
+from .refresher import SessionRefresher
+from .store import (
+    InMemorySessionStore,
+    SessionRecord,
+    SessionStore,
+    SQLAlchemySessionStore,
+)
+
+SESSION_COOKIE_NAME = "session_id"
+
+
+def initialize_session_store(
+    app: Flask,
+    refresh_fn: Optional[Callable[[SessionRecord], Optional[SessionRecord]]] = None,
+) -> Optional[SessionStore]:
+    """Configure server-side sessions for the application if they are enabled.
+
+    Args:
+        app (Flask): The Flask application to configure.
+        refresh_fn (Callable, optional): Function refreshing a session's tokens. When given, a
+        background refresher thread is started.
+
+    Returns:
+        SessionStore: The configured store, or None if session mode is disabled.
+    """
+    settings = get_settings()
+    if not settings.session_mode:
+        return None
+
+    if settings.session_store == "sqlalchemy":
+        store = SQLAlchemySessionStore()
+    else:
+        store = InMemorySessionStore(max_entries=settings.session_max_entries)
+    app.extensions["session_store"] = store
+
+    if refresh_fn is not None:
+        refresher = SessionRefresher(
+            app,
+            store,
+            refresh_fn,
+            interval=settings.session_refresh_interval,
+            margin=settings.session_refresh_margin,
+        )
+        refresher.start()
+        app.extensions["session_refresher"] = refresher
+
+    print(f"Server-side sessions enabled with the {settings.session_store} store")
+    return store
+
+
+def get_session_store() -> Optional[SessionStore]:
+    """Return the session store of the current application, or None if sessions are disabled."""
+    return current_app.extensions.get("session_store")
+
+
+def create_session_id() -> str:
+    """Generate a new opaque, URL-safe session ID with 256 bits of entropy."""
+    return secrets.token_urlsafe(32)
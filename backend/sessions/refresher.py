@@ -0,0 +1,123 @@
+"""Session Refresher Module
+
+This module provides a background thread that keeps server-side sessions alive by refreshing
+their Cognito tokens shortly before they expire. Refreshing happens off the request path, so
+authenticated requests never wait on Cognito.
+
+Key Features:
+- Periodically scans the session store for sessions that are about to expire.
+- Refreshes each one through a caller-provided refresh function.
+- Drops sessions whose refresh token has been revoked or has expired.
+- Claims each session before refreshing it, so refreshers of several processes sharing a store
+  never redeem the same refresh token at once.
+- Writes refreshed tokens back only while the claim still holds, so a session logged out during
+  its refresh stays closed.
+- Backs off exponentially after a failed refresh and drops sessions that keep failing, so they
+  cannot starve the other sessions of refreshes.
+
+Usage:
+The refresher is started by `initialize_session_store` and runs as a daemon thread for the
+lifetime of the process.
+
+Example:
+    from backend.sessions.refresher import SessionRefresher
+
+    refresher = SessionRefresher(app, store, refresh_fn, interval=60, margin=300)
+    refresher.start()
+"""
+
+import threading
+import time
+from typing import Callable, Optional
+
+from flask import Flask
+
+from .store import SessionRecord, SessionStore
+
+DEFAULT_REFRESH_INTERVAL = 60
+DEFAULT_REFRESH_MARGIN = 5 * 60
+# How long a claimed session is reserved for the refresher that claimed it
+REFRESH_LEASE = 60
+MAX_REFRESH_FAILURES = 5
+MAX_REFRESH_BACKOFF = 60 * 60
+
+
+class SessionRefresher(threading.Thread):
+    """A daemon thread refreshing sessions before their tokens expire.
+
+    The refresh function receives a `SessionRecord` and returns the refreshed record, or None if
+    the session can no longer be refreshed, in which case it is removed from the store. A session
+    whose refresh raises is retried after an exponential backoff, and removed after
+    `MAX_REFRESH_FAILURES` consecutive failures.
+
+    Attributes:
+        app (Flask): The application whose context is pushed while refreshing.
+        store (SessionStore): The store holding the sessions.
+        refresh_fn (Callable): Function refreshing a single session.
+        interval (float): Seconds between two scans of the store.
+        margin (float): Sessions expiring within this many seconds are refreshed.
+    """
+
+    def __init__(
+        self,
+        app: Flask,
+        store: SessionStore,
+        refresh_fn: Callable[[SessionRecord], Optional[SessionRecord]],
+        interval: float = DEFAULT_REFRESH_INTERVAL,
+        margin: float = DEFAULT_REFRESH_MARGIN,
+    ):
+        super().__init__(name="session-refresher", daemon=True)
+        self.app = app
+        self.store = store
+        self.refresh_fn = refresh_fn
+        self.interval = interval
+        self.margin = margin
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                with self.app.app_context():
+                    self.refresh_expiring()
+            except Exception as e:
+                print(f"Session refresh error: {e}")
+
+    def stop(self) -> None:
+        """Ask the thread to exit after the current scan."""
+        self._stop_event.set()
+
+    def refresh_expiring(self) -> int:
+        """Refresh every session expiring within the margin.
+
+        Returns:
+            int: The number of sessions successfully refreshed.
+        """
+        refreshed = 0
+        for record in self.store.expiring(before=time.time() + self.margin):
+            lease = time.time() + REFRESH_LEASE
+            if not self.store.claim(record.session_id, lease):
+                # Another process is refreshing the session
+                continue
+            try:
+                new_record = self.refresh_fn(record)
+            except Exception as e:
+                print(f"Failed to refresh session for {record.sub}: {e}")
+                self._postpone(record)
+                continue
+            if new_record is None:
+                self.store.delete(record.session_id)
+            elif self.store.replace_claimed(new_record, lease):
+                refreshed += 1
+            else:
+                # The session was logged out during the refresh; drop the new tokens
+                print(f"Discarding refreshed tokens of a closed session for {record.sub}")
+        return refreshed
+
+    def _postpone(self, record: SessionRecord) -> None:
+        failures = record.refresh_failures + 1
+        if failures >= MAX_REFRESH_FAILURES:
+            print(f"Dropping session for {record.sub} after {failures} failed refreshes")
+            self.store.delete(record.session_id)
+            return
+        backoff = min(self.interval * 2**failures, MAX_REFRESH_BACKOFF)
+        self.store.record_failure(record.session_id, failures, time.time() + backoff)
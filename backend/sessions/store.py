@@ -0,0 +1,293 @@
+"""Session Store Module
+
+This module defines the pluggable storage used by server-side login sessions. A session maps an
+opaque session ID to the Cognito tokens and their verified claims, so authenticated requests
+resolve the user with a single lookup and without any per-request signature verification.
+
+Key Features:
+- `SessionRecord`: the data kept for each session.
+- `SessionStore`: the interface every backend implements.
+- `InMemorySessionStore`: a bounded, thread-safe LRU for single-process deployments.
+- `SQLAlchemySessionStore`: a database-backed store shared by every API worker.
+
+Usage:
+Stores are created by `initialize_session_store` from the configuration and should not be
+instantiated by route handlers directly.
+
+Example:
+    from backend.sessions.store import InMemorySessionStore, SessionRecord
+
+    store = InMemorySessionStore(max_entries=1000)
+    store.save(record)
+    store.get(record.session_id)
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from typing import List, Optional
+
+from backend.models import AuthSession
+from backend.models.database import db, transactional
+
+DEFAULT_MAX_SESSIONS = 10000
+
+
+@dataclass(frozen=True)
+class SessionRecord:
+    """The tokens and verified claims of a server-side session.
+
+    Attributes:
+        session_id (str): The opaque session ID sent to the client.
+        sub (str): The sub of the user owning the session.
+        id_token (str): The Cognito ID token.
+        access_token (str): The Cognito access token.
+        refresh_token (str): The Cognito refresh token.
+        id_claims (dict): The verified claims of the ID token.
+        access_claims (dict): The verified claims of the access token.
+        expires_at (float): UNIX time at which the current tokens expire.
+        created_at (float): UNIX time at which the session was created.
+        refresh_failures (int): The number of consecutive failed background refreshes.
+        refresh_after (float): UNIX time before which the session is not refreshed in the
+        background, while a refresher holds it or after a failed refresh.
+    """
+
+    session_id: str
+    sub: str
+    id_token: str
+    access_token: str
+    refresh_token: str
+    id_claims: dict
+    access_claims: dict
+    expires_at: float
+    created_at: float = field(default_factory=time.time)
+    refresh_failures: int = 0
+    refresh_after: float = 0.0
+
+    def is_expired(self, leeway: float = 0) -> bool:
+        """Return True if the session tokens expired more than `leeway` seconds ago."""
+        return self.expires_at + leeway <= time.time()
+
+    def updated(self, **changes) -> "SessionRecord":
+        """Return a copy of the record with the given fields replaced."""
+        return replace(self, **changes)
+
+
+class SessionStore(ABC):
+    """Interface implemented by every session store backend."""
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[SessionRecord]:
+        """Return the session with the given ID, or None if it does not exist."""
+
+    @abstractmethod
+    def save(self, record: SessionRecord) -> None:
+        """Create or replace a session."""
+
+    @abstractmethod
+    def delete(self, session_id: str) -> None:
+        """Remove a session. Removing an unknown session is not an error."""
+
+    @abstractmethod
+    def expiring(self, before: float, limit: int = 100) -> List[SessionRecord]:
+        """Return up to `limit` sessions whose tokens expire before the given UNIX time.
+
+        Sessions whose `refresh_after` has not passed yet are left out.
+        """
+
+    @abstractmethod
+    def claim(self, session_id: str, until: float) -> bool:
+        """Reserve a session for a background refresh until the given UNIX time.
+
+        Every process runs its own refresher, so a session is only refreshed by the process
+        that claimed it and its refresh token is never redeemed twice at once.
+
+        Returns:
+            bool: Whether the session was claimed; False if it is unknown or already claimed.
+        """
+
+    @abstractmethod
+    def replace_claimed(self, record: SessionRecord, lease: float) -> bool:
+        """Replace a session only if it still exists and still holds the given claim.
+
+        A session deleted while its refresh was in flight, for example by a logout, is not
+        written back.
+
+        Args:
+            record (SessionRecord): The refreshed session.
+            lease (float): The `until` time the session was claimed with.
+
+        Returns:
+            bool: Whether the session was replaced.
+        """
+
+    @abstractmethod
+    def record_failure(self, session_id: str, failures: int, retry_at: float) -> None:
+        """Store the failed refresh count of a session and postpone its next refresh."""
+
+
+class InMemorySessionStore(SessionStore):
+    """A bounded LRU session store kept in process memory.
+
+    Sessions are lost on restart and are not shared between processes, which makes this store
+    suitable for development and single-worker deployments.
+
+    Attributes:
+        max_entries (int): Maximum number of sessions kept before the least recently used
+        session is evicted.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_SESSIONS):
+        self.max_entries = max_entries
+        self._records: "OrderedDict[str, SessionRecord]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[SessionRecord]:
+        with self._lock:
+            record = self._records.get(session_id)
+            if record is not None:
+                self._records.move_to_end(session_id)
+            return record
+
+    def save(self, record: SessionRecord) -> None:
+        with self._lock:
+            self._records[record.session_id] = record
+            self._records.move_to_end(record.session_id)
+            while len(self._records) > self.max_entries:
+                self._records.popitem(last=False)
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._records.pop(session_id, None)
+
+    def expiring(self, before: float, limit: int = 100) -> List[SessionRecord]:
+        now = time.time()
+        with self._lock:
+            records = [
+                r
+                for r in self._records.values()
+                if r.expires_at < before and r.refresh_after <= now
+            ]
+        return sorted(records, key=lambda r: r.expires_at)[:limit]
+
+    def claim(self, session_id: str, until: float) -> bool:
+        with self._lock:
+            record = self._records.get(session_id)
+            if record is None or record.refresh_after > time.time():
+                return False
+            self._records[session_id] = record.updated(refresh_after=until)
+            return True
+
+    def replace_claimed(self, record: SessionRecord, lease: float) -> bool:
+        with self._lock:
+            current = self._records.get(record.session_id)
+            if current is None or current.refresh_after != lease:
+                return False
+            self._records[record.session_id] = record
+            self._records.move_to_end(record.session_id)
+            return True
+
+    def record_failure(self, session_id: str, failures: int, retry_at: float) -> None:
+        with self._lock:
+            record = self._records.get(session_id)
+            if record is not None:
+                self._records[session_id] = record.updated(
+                    refresh_failures=failures, refresh_after=retry_at
+                )
+
+
+class SQLAlchemySessionStore(SessionStore):
+    """A session store persisted through the application's SQLAlchemy database.
+
+    Sessions survive restarts and are shared by every worker using the same database. Methods
+    must be called within an application context.
+    """
+
+    @staticmethod
+    def _to_record(row: AuthSession) -> SessionRecord:
+        return SessionRecord(
+            session_id=row.id,
+            sub=row.sub,
+            id_token=row.id_token,
+            access_token=row.access_token,
+            refresh_token=row.refresh_token,
+            id_claims=row.id_claims,
+            access_claims=row.access_claims or {},
+            expires_at=row.expires_at,
+            created_at=row.created_at,
+            refresh_failures=row.refresh_failures or 0,
+            refresh_after=row.refresh_after or 0.0,
+        )
+
+    def get(self, session_id: str) -> Optional[SessionRecord]:
+        row = db.session.get(AuthSession, session_id)
+        return self._to_record(row) if row is not None else None
+
+    @transactional
+    def save(self, record: SessionRecord) -> None:
+        db.session.merge(
+            AuthSession(
+                id=record.session_id,
+                sub=record.sub,
+                id_token=record.id_token,
+                access_token=record.access_token,
+                refresh_token=record.refresh_token,
+                id_claims=record.id_claims,
+                access_claims=record.access_claims,
+                expires_at=record.expires_at,
+                created_at=record.created_at,
+                refresh_failures=record.refresh_failures,
+                refresh_after=record.refresh_after,
+            )
+        )
+
+    @transactional
+    def delete(self, session_id: str) -> None:
+        AuthSession.query.filter_by(id=session_id).delete()
+
+    def expiring(self, before: float, limit: int = 100) -> List[SessionRecord]:
+        rows = (
+            AuthSession.query.filter(
+                AuthSession.expires_at < before, AuthSession.refresh_after <= time.time()
+            )
+            .order_by(AuthSession.expires_at)
+            .limit(limit)
+            .all()
+        )
+        return [self._to_record(row) for row in rows]
+
+    @transactional
+    def claim(self, session_id: str, until: float) -> bool:
+        # A conditional update, so only one process can win the claim
+        claimed = AuthSession.query.filter(
+            AuthSession.id == session_id, AuthSession.refresh_after <= time.time()
+        ).update({AuthSession.refresh_after: until}, synchronize_session=False)
+        return claimed == 1
+
+    @transactional
+    def replace_claimed(self, record: SessionRecord, lease: float) -> bool:
+        replaced = AuthSession.query.filter(
+            AuthSession.id == record.session_id, AuthSession.refresh_after == lease
+        ).update(
+            {
+                AuthSession.id_token: record.id_token,
+                AuthSession.access_token: record.access_token,
+                AuthSession.refresh_token: record.refresh_token,
+                AuthSession.id_claims: record.id_claims,
+                AuthSession.access_claims: record.access_claims,
+                AuthSession.expires_at: record.expires_at,
+                AuthSession.refresh_failures: record.refresh_failures,
+                AuthSession.refresh_after: record.refresh_after,
+            },
+            synchronize_session=False,
+        )
+        return replaced == 1
+
+    @transactional
+    def record_failure(self, session_id: str, failures: int, retry_at: float) -> None:
+        AuthSession.query.filter_by(id=session_id).update(
+            {AuthSession.refresh_failures: failures, AuthSession.refresh_after: retry_at},
+            synchronize_session=False,
+        )
@@ -0,0 +1,41 @@
+"""Storage Package Initialization Module
+
+This module serves as the initialization point for the storage package, which manages how video
+files and derived artifacts are stored. Everything goes through a pluggable storage backend,
+local disk or S3. Uploaded files are stored by the SHA-256 digest of their content and reference
+counted, and large files can be sent as resumable, chunked uploads.
+
+Key Features:
+- Local filesystem and S3-compatible storage backends.
+- Content-addressed, deduplicated blob storage with reference counting.
+- Chunked uploads hashed incrementally and moved into blob storage on completion.
+
+Example:
+    from backend.storage import append_chunk, create_upload, finalize_upload, store_stream
+"""
+
+from .backends import (
+    LocalStorageBackend,
+    S3StorageBackend,
+    StorageBackend,
+    get_storage_backend,
+)
+from .blobs import (
+    DERIVED_ARTIFACTS,
+    acquire_blob,
+    blob_key,
+    derived_key,
+    is_blob_key,
+    release_blob,
+    store_file,
+    store_stream,
+)
+from .uploads import (
+    UploadDigestMismatch,
+    UploadError,
+    UploadOffsetMismatch,
+    append_chunk,
+    create_upload,
+    finalize_upload,
+    upload_path,
+)
@@ -0,0 +1,248 @@
+"""Storage Backends Module
+
+This module defines the interface used to store and read files, together with a local
+filesystem backend and an S3-compatible backend. Uploads, renders and derived artifacts are all
+addressed by a storage key and go through the configured backend, so API workers do not need a
+shared disk when the S3 backend is used.
+
+Key Features:
+- `StorageBackend`: the interface every backend implements.
+- `LocalStorageBackend`: stores files under a root directory, moving them with a rename.
+- `S3StorageBackend`: stores files in a bucket with parallel multipart uploads and downloads,
+  ranged reads and a pooled connection set. Works with AWS S3, MinIO or moto through a custom
+  endpoint URL.
+
+Functions:
+- get_storage_backend() -> StorageBackend: Return the backend configured in the settings.
+
+Example:
+    from backend.storage.backends import get_storage_backend
+
+    storage = get_storage_backend()
+    storage.put_file("/tmp/render.mp4", "renders/1234.mp4", move=True)
+    with storage.local_copy("renders/1234.mp4") as path:
+        ...
+"""
+
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import BinaryIO, Iterator
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from backend.utils import get_settings
+
+MEGABYTE = 1024 * 1024
+
+
+class StorageBackend(ABC):
+    """Interface implemented by every storage backend. Keys use forward slashes."""
+
+    @abstractmethod
+    def put_file(self, local_path: str, key: str, move: bool = False) -> None:
+        """Store a local file under the given key, replacing any existing object.
+
+        Args:
+            local_path (str): The file to store.
+            key (str): The storage key.
+            move (bool, optional): Whether the local file may be consumed. Defaults to False.
+        """
+
+    @abstractmethod
+    def open_read(self, key: str) -> BinaryIO:
+        """Return a binary stream reading the object stored under the key."""
+
+    @abstractmethod
+    def read_range(self, key: str, start: int, end: int) -> bytes:
+        """Return the bytes of the object in the half-open range [start, end)."""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        """Return True if an object is stored under the key."""
+
+    @abstractmethod
+    def size(self, key: str) -> int:
+        """Return the size in bytes of the object stored under the key."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Delete the object stored under the key. Deleting a missing object is not an error."""
+
+    @abstractmethod
+    def local_copy(self, key: str):
+        """Return a context manager yielding a local path holding the object's content.
+
+        This is used by tools that need a file, such as video decoders. The path must be
+        treated as read-only and is only valid inside the context.
+        """
+
+
+class LocalStorageBackend(StorageBackend):
+    """A storage backend keeping objects as files under a root directory.
+
+    Attributes:
+        root (str): The directory holding every object.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        """Return the filesystem path of the object stored under the key."""
+        return os.path.join(self.root, *key.split("/"))
+
+    def put_file(self, local_path: str, key: str, move: bool = False) -> None:
+        destination = self.path(key)
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        if move:
+            os.replace(local_path, destination)
+        else:
+            shutil.copyfile(local_path, destination)
+
+    def open_read(self, key: str) -> BinaryIO:
+        return open(self.path(key), "rb")
+
+    def read_range(self, key: str, start: int, end: int) -> bytes:
+        with open(self.path(key), "rb") as file:
+            file.seek(start)
+            return file.read(max(0, end - start))
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    def size(self, key: str) -> int:
+        return os.path.getsize(self.path(key))
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    @contextmanager
+    def local_copy(self, key: str) -> Iterator[str]:
+        # Files are already local, so no copy is made
+        yield self.path(key)
+
+
+class S3StorageBackend(StorageBackend):
+    """A storage backend keeping objects in an S3-compatible bucket.
+
+    Large files are transferred as parallel multipart uploads and parallel ranged downloads,
+    and all requests share a pool of keep-alive connections.
+
+    Attributes:
+        bucket (str): The bucket holding every object.
+        prefix (str): A prefix prepended to every key.
+        transfer_config (TransferConfig): The multipart transfer settings.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        endpoint_url: str = None,
+        max_concurrency: int = 8,
+        multipart_chunksize: int = 16 * MEGABYTE,
+        multipart_threshold: int = 16 * MEGABYTE,
+    ):
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            config=Config(
+                max_pool_connections=max_concurrency * 2,
+                retries={"max_attempts": 5, "mode": "adaptive"},
+                tcp_keepalive=True,
+            ),
+        )
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_chunksize,
+            max_concurrency=max_concurrency,
+            use_threads=True,
+        )
+
+    def object_key(self, key: str) -> str:
+        """Return the bucket key of the object stored under the storage key."""
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def put_file(self, local_path: str, key: str, move: bool = False) -> None:
+        self.client.upload_file(
+            local_path, self.bucket, self.object_key(key), Config=self.transfer_config
+        )
+        if move:
+            os.remove(local_path)
+
+    def open_read(self, key: str) -> BinaryIO:
+        response = self.client.get_object(Bucket=self.bucket, Key=self.object_key(key))
+        return response["Body"]
+
+    def read_range(self, key: str, start: int, end: int) -> bytes:
+        if end <= start:
+            return b""
+        response = self.client.get_object(
+            Bucket=self.bucket,
+            Key=self.object_key(key),
+            Range=f"bytes={start}-{end - 1}",
+        )
+        return response["Body"].read()
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.object_key(key))
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise e
+
+    def size(self, key: str) -> int:
+        response = self.client.head_object(Bucket=self.bucket, Key=self.object_key(key))
+        return response["ContentLength"]
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self.object_key(key))
+
+    @contextmanager
+    def local_copy(self, key: str) -> Iterator[str]:
+        extension = os.path.splitext(key)[1]
+        file_descriptor, path = tempfile.mkstemp(suffix=extension)
+        os.close(file_descriptor)
+        try:
+            self.client.download_file(
+                self.bucket, self.object_key(key), path, Config=self.transfer_config
+            )
+            yield path
+        finally:
+            os.remove(path)
+
+
+@lru_cache(maxsize=1)
+def get_storage_backend() -> StorageBackend:
+    """Return the process-wide storage backend configured in the settings.
+
+    Returns:
+        StorageBackend: A `LocalStorageBackend` or an `S3StorageBackend`.
+
+    Examples:
+        >>> get_storage_backend().exists("blobs/9f/86/9f86d0...")
+        True
+    """
+    settings = get_settings()
+    if settings.storage_backend == "s3":
+        return S3StorageBackend(
+            bucket=settings.s3_bucket,
+            prefix=settings.s3_prefix,
+            endpoint_url=settings.s3_endpoint_url,
+            max_concurrency=settings.s3_max_concurrency,
+        )
+    return LocalStorageBackend(settings.storage_root)
@@ -0,0 +1,279 @@
+"""Content-Addressed Blob Storage Module
+
+This module stores uploaded files by the SHA-256 digest of their content. Identical files are
+kept once, whatever project they were uploaded to, and every reference from `Project.file_path`
+or `Video.filename` is counted so a file is deleted only when its last reference goes away.
+
+Key Features:
+- Hashes uploads while streaming them to disk, without a second pass over the file.
+- Fans blobs out into two levels of hashed prefixes, `blobs/ab/cd/abcd...`, so no single
+  directory grows to millions of entries.
+- Reads and writes blobs through the configured storage backend, local disk or S3.
+- Reference counts blobs in the database with atomic increments and decrements.
+- Keeps the row of a blob being deleted as a tombstone until its files are gone, so a
+  concurrent upload of the same content waits and stores it again instead of referencing a
+  file that is about to be deleted.
+- Resolves keys of files stored before content addressing was introduced, including the
+  `uploads/` paths projects used to store.
+
+Functions:
+- store_stream(stream) -> str: Store a stream and add a reference to its blob.
+- store_file(path, digest) -> str: Move an already hashed file into storage and reference it.
+- acquire_blob(digest, sub) -> bool: Add a reference to an existing blob the user already
+  holds, without any upload.
+- release_blob(key) -> None: Drop a reference and delete the blob once it is unreferenced.
+- blob_key(key) -> str: Return the storage backend key of a stored file.
+- derived_key(digest, name) -> str: Return the storage key of a file generated from a blob.
+
+Example:
+    from backend.storage.blobs import blob_key, release_blob, store_stream
+
+    digest = store_stream(request.files["video"].stream)
+    with get_storage_backend().local_copy(blob_key(digest)) as path:
+        ...
+    release_blob(digest)
+"""
+
+import hashlib
+import os
+import re
+import time
+import uuid
+from typing import BinaryIO, Optional
+
+from sqlalchemy.exc import IntegrityError
+
+from backend.models import Blob, Project, Video
+from backend.models.database import db, transactional
+from backend.utils import get_settings
+
+from .backends import get_storage_backend
+
+BLOCK_SIZE = 1024 * 1024
+BLOB_PREFIX = "blobs"
+DERIVED_PREFIX = "derived"
+# Files generated from a blob, such as proxies, deleted together with the blob
+DERIVED_ARTIFACTS = ["proxy.mp4", "sprite.jpg", "sprite.json", "keyframes.bin"]
+
+# The directory files were uploaded to before content addressing, which projects stored as
+# part of their path; it is the default root of the local storage backend
+LEGACY_UPLOAD_PREFIX = "uploads/"
+
+# Tombstones older than this were left by a release that did not finish, and are reused
+BLOB_DELETE_TIMEOUT = 10 * 60
+BLOB_DELETE_POLL = 0.5
+
+_DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+def is_blob_key(key: str) -> bool:
+    """Return True if the key is a content digest rather than a legacy filename."""
+    return bool(key) and _DIGEST_PATTERN.match(key) is not None
+
+
+def blob_key(key: str) -> str:
+    """Return the storage backend key of a stored file.
+
+    Args:
+        key (str): A hex SHA-256 digest, or the filename or `uploads/` path of a file stored
+        before content addressing.
+
+    Returns:
+        str: The key under which the storage backend holds the file.
+    """
+    if not is_blob_key(key):
+        if key.startswith(LEGACY_UPLOAD_PREFIX):
+            return key[len(LEGACY_UPLOAD_PREFIX) :]
+        return key
+    return f"{BLOB_PREFIX}/{key[:2]}/{key[2:4]}/{key}"
+
+
+def derived_key(digest: str, name: str) -> str:
+    """Return the storage key of a file generated from a blob, such as its proxy video.
+
+    Args:
+        digest (str): The hex SHA-256 digest of the blob.
+        name (str): The name of the generated file, one of `DERIVED_ARTIFACTS`.
+
+    Returns:
+        str: The key under which the storage backend holds the generated file.
+    """
+    return f"{DERIVED_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}/{name}"
+
+
+def staging_directory() -> str:
+    """Return the local directory holding files while they are being received."""
+    directory = os.path.join(get_settings().storage_root, "staging")
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def staging_path() -> str:
+    """Return a new, unique path in the staging directory for a file being received."""
+    return os.path.join(staging_directory(), uuid.uuid4().hex)
+
+
+def store_stream(stream: BinaryIO) -> str:
+    """Store the content of a stream and add a reference to its blob.
+
+    The stream is written to a staging file and hashed in the same pass. If a blob with the
+    same digest already exists the staging file is discarded.
+
+    Args:
+        stream (BinaryIO): The stream to store, such as an uploaded file's stream.
+
+    Returns:
+        str: The hex SHA-256 digest of the content, used as the storage key.
+    """
+    path = staging_path()
+    hasher = hashlib.sha256()
+    try:
+        with open(path, "wb") as file:
+            while True:
+                block = stream.read(BLOCK_SIZE)
+                if not block:
+                    break
+                hasher.update(block)
+                file.write(block)
+        return store_file(path, hasher.hexdigest())
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def store_file(path: str, digest: str) -> str:
+    """Move a file whose digest is already known into storage and add a reference to it.
+
+    If the blob is being deleted, this waits for the deletion to finish and stores the file
+    again.
+
+    Args:
+        path (str): The file to store. It is moved, or removed if the blob already exists.
+        digest (str): The hex SHA-256 digest of the file's content.
+
+    Returns:
+        str: The digest, used as the storage key.
+    """
+    created = _increment(digest, os.path.getsize(path))
+    storage = get_storage_backend()
+    if not created and storage.exists(blob_key(digest)):
+        os.remove(path)
+    else:
+        storage.put_file(path, blob_key(digest), move=True)
+    return digest
+
+
+def acquire_blob(digest: str, sub: str) -> bool:
+    """Add a reference to an already stored blob that the user already holds.
+
+    This lets a client that knows the digest of its file skip the upload entirely. Knowing a
+    digest proves nothing about holding the content, so only blobs referenced by one of the
+    user's own projects or videos can be acquired; anything else must be uploaded in full.
+
+    Args:
+        digest (str): The hex SHA-256 digest of the content.
+        sub (str): The sub of the user acquiring the blob.
+
+    Returns:
+        bool: True if the blob exists, belongs to the user and was referenced, False otherwise.
+    """
+    if not is_blob_key(digest) or not owns_blob(digest, sub):
+        return False
+    if not get_storage_backend().exists(blob_key(digest)):
+        return False
+    return _reference_existing(digest) == 1
+
+
+def owns_blob(digest: str, sub: str) -> bool:
+    """Return True if a project of the user, or a video of one, references the blob."""
+    if Project.query.filter_by(sub=sub, file_path=digest).first() is not None:
+        return True
+    video = (
+        Video.query.join(Project, Video.project_id == Project.id)
+        .filter(Project.sub == sub, Video.filename == digest)
+        .first()
+    )
+    return video is not None
+
+
+def release_blob(key: str) -> None:
+    """Drop a reference to a blob and delete it once nothing references it.
+
+    Files generated from the blob are deleted with it. The blob's row is kept as a tombstone
+    while its files are deleted. Keys of files stored before content addressing are not
+    reference counted and are ignored.
+
+    Args:
+        key (str): The storage key held by a project or video.
+    """
+    if not is_blob_key(key):
+        return
+    if _drop_reference(key):
+        storage = get_storage_backend()
+        storage.delete(blob_key(key))
+        for name in DERIVED_ARTIFACTS:
+            storage.delete(derived_key(key, name))
+        _drop_tombstone(key)
+
+
+def _increment(digest: str, size: int) -> bool:
+    # Returns whether the blob's row was created, in which case its content must be stored
+    conflicts = 0
+    while True:
+        try:
+            created = _add_reference(digest, size)
+        except IntegrityError:
+            # Another request inserted the same blob concurrently; count on its row instead
+            conflicts += 1
+            if conflicts > 1:
+                raise RuntimeError(f"Failed to reference blob {digest}")
+            continue
+        if created is not None:
+            return created
+        # The blob is being deleted; wait until its tombstone is gone
+        time.sleep(BLOB_DELETE_POLL)
+
+
+@transactional
+def _add_reference(digest: str, size: int) -> Optional[bool]:
+    updated = Blob.query.filter(Blob.sha256 == digest, Blob.deleting_at.is_(None)).update(
+        {Blob.ref_count: Blob.ref_count + 1}, synchronize_session=False
+    )
+    if updated:
+        return False
+    revived = Blob.query.filter(
+        Blob.sha256 == digest, Blob.deleting_at < time.time() - BLOB_DELETE_TIMEOUT
+    ).update(
+        {Blob.ref_count: 1, Blob.size: size, Blob.deleting_at: None}, synchronize_session=False
+    )
+    if revived:
+        return True
+    if Blob.query.filter_by(sha256=digest).count():
+        return None
+    db.session.add(Blob(sha256=digest, size=size, ref_count=1))
+    return True
+
+
+@transactional
+def _reference_existing(digest: str) -> int:
+    return Blob.query.filter(
+        Blob.sha256 == digest, Blob.ref_count > 0, Blob.deleting_at.is_(None)
+    ).update({Blob.ref_count: Blob.ref_count + 1}, synchronize_session=False)
+
+
+@transactional
+def _drop_reference(key: str) -> int:
+    Blob.query.filter(Blob.sha256 == key, Blob.deleting_at.is_(None)).update(
+        {Blob.ref_count: Blob.ref_count - 1}, synchronize_session=False
+    )
+    # The row stays as a tombstone until the release has deleted the stored files
+    return Blob.query.filter(
+        Blob.sha256 == key, Blob.ref_count <= 0, Blob.deleting_at.is_(None)
+    ).update({Blob.deleting_at: time.time()}, synchronize_session=False)
+
+
+@transactional
+def _drop_tombstone(key: str) -> None:
+    Blob.query.filter(Blob.sha256 == key, Blob.deleting_at.isnot(None)).delete(
+        synchronize_session=False
+    )
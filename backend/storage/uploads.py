@@ -0,0 +1,290 @@
+"""Chunked Upload Storage Module
+
+This module implements the storage side of resumable, chunked video uploads. Chunks are written
+into a staging file at the offset recorded in the `UploadSession`, and the SHA-256 digest is
+computed incrementally as the bytes arrive. Finalizing an upload moves the staging file into
+content-addressed storage with a single rename and never re-reads it.
+
+Key Features:
+- Appends request bodies to the upload file in fixed-size blocks without buffering them.
+- Keeps an incremental SHA-256 per upload, rebuilt from the bytes on disk after a restart.
+- Persists the acknowledged offset after every chunk, including partially received ones.
+- Serializes the chunks of an upload across threads and processes, and advances the offset
+  with a conditional update so two requests can never both apply a chunk at the same offset.
+- Completes uploads of content the user already stored immediately when the client sends its
+  digest.
+
+Functions:
+- create_upload(project_id, sub, filename, total_size, sha256=None) -> UploadSession: Start an
+  upload.
+- append_chunk(upload, stream, offset) -> int: Write a chunk and return the new offset.
+- finalize_upload(upload, expected_sha256=None) -> str: Complete an upload and return its hex
+  SHA-256 digest.
+
+Usage:
+This module is used by the chunked upload routes. Callers are responsible for checking that the
+user owns the project and the upload.
+
+Example:
+    from backend.storage.uploads import append_chunk, create_upload, finalize_upload
+
+    upload = create_upload(project.id, sub, "clip.mp4", 1048576)
+    append_chunk(upload, request.stream, offset=0)
+    digest = finalize_upload(upload)
+"""
+
+import fcntl
+import hashlib
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple
+
+from backend.models import UploadSession, save_object
+from backend.models.database import db, transactional
+from backend.models.upload_session import UPLOAD_COMPLETE
+
+from .blobs import BLOCK_SIZE, acquire_blob, staging_directory, store_file
+
+
+class UploadError(Exception):
+    """Raised when a chunk cannot be applied to an upload."""
+
+
+class UploadOffsetMismatch(UploadError):
+    """Raised when a chunk does not start at the upload's current offset."""
+
+    def __init__(self, expected: int, received: int):
+        super().__init__(f"Expected offset {expected}, received {received}")
+        self.expected = expected
+        self.received = received
+
+
+class UploadDigestMismatch(UploadError):
+    """Raised when the received bytes do not match the digest announced by the client."""
+
+
+# Incremental hashers per upload, with the offset they have consumed up to
+_hashers: Dict[str, Tuple[int, "hashlib._Hash"]] = {}
+_upload_locks: Dict[str, threading.Lock] = {}
+_registry_lock = threading.Lock()
+
+
+def upload_path(upload: UploadSession) -> str:
+    """Return the staging path the upload is written to."""
+    return os.path.join(staging_directory(), upload.stored_filename)
+
+
+def create_upload(
+    project_id: str,
+    sub: str,
+    filename: str,
+    total_size: int,
+    sha256: Optional[str] = None,
+) -> UploadSession:
+    """Create an upload session and its empty staging file.
+
+    If the client sends the digest of its file and that content is already stored for the same
+    user, the upload is completed immediately and no bytes need to be sent. Content stored by
+    other users is uploaded again and deduplicated once its bytes have been hashed.
+
+    Args:
+        project_id (str): The project the video belongs to.
+        sub (str): The sub of the uploading user.
+        filename (str): The filename provided by the client.
+        total_size (int): The expected size of the file in bytes.
+        sha256 (str, optional): The hex SHA-256 digest of the file, if known by the client.
+
+    Returns:
+        UploadSession: The new upload session, either complete or with an offset of zero.
+    """
+    if sha256 and acquire_blob(sha256.lower(), sub):
+        upload = UploadSession(
+            project_id=project_id,
+            sub=sub,
+            original_filename=filename,
+            stored_filename=sha256.lower(),
+            total_size=total_size,
+            offset=total_size,
+            sha256=sha256.lower(),
+            status=UPLOAD_COMPLETE,
+        )
+        save_object(upload)
+        return upload
+
+    upload = UploadSession(
+        project_id=project_id,
+        sub=sub,
+        original_filename=filename,
+        stored_filename=f"{uuid.uuid4().hex}{os.path.splitext(filename)[1]}",
+        total_size=total_size,
+        offset=0,
+    )
+    with open(upload_path(upload), "wb"):
+        pass
+    save_object(upload)
+    return upload
+
+
+def append_chunk(upload: UploadSession, stream: BinaryIO, offset: int) -> int:
+    """Write a chunk read from `stream` at the given offset of the upload.
+
+    The chunk must start exactly at the upload's current offset. Bytes are written and hashed
+    as they are read, and the offset reached is persisted even if the stream ends early, so a
+    client can resume from whatever the server actually received.
+
+    Args:
+        upload (UploadSession): The upload to extend.
+        stream (BinaryIO): The request body stream.
+        offset (int): The offset the client claims the chunk starts at.
+
+    Returns:
+        int: The new offset of the upload.
+
+    Raises:
+        UploadOffsetMismatch: If `offset` differs from the upload's current offset.
+        UploadError: If the chunk would exceed the declared size or the upload is complete.
+    """
+    with _locked(upload) as file:
+        if file is None:
+            raise UploadError("Upload is already complete")
+        if offset != upload.offset:
+            raise UploadOffsetMismatch(upload.offset, offset)
+
+        hasher = _hasher_for(upload)
+        expected = position = upload.offset
+        advanced = False
+        try:
+            file.seek(position)
+            # Drop anything written past the acknowledged offset by an interrupted request
+            file.truncate()
+            while True:
+                block = stream.read(BLOCK_SIZE)
+                if not block:
+                    break
+                if position + len(block) > upload.total_size:
+                    raise UploadError("Chunk exceeds the declared upload size")
+                file.write(block)
+                hasher.update(block)
+                position += len(block)
+        finally:
+            file.flush()
+            advanced = _advance_offset(upload.id, expected, position)
+            if advanced:
+                _hashers[upload.id] = (position, hasher)
+            else:
+                _hashers.pop(upload.id, None)
+            db.session.refresh(upload)
+        if not advanced:
+            raise UploadOffsetMismatch(upload.offset, offset)
+        return position
+
+
+def finalize_upload(upload: UploadSession, expected_sha256: Optional[str] = None) -> str:
+    """Move a fully received upload into blob storage and return its SHA-256 digest.
+
+    If the client announced a digest and it does not match, the received bytes are discarded
+    and the upload is reset to offset zero so it can be sent again.
+
+    Args:
+        upload (UploadSession): The upload to finalize.
+        expected_sha256 (str, optional): The hex SHA-256 digest computed by the client.
+
+    Returns:
+        str: The hex SHA-256 digest of the uploaded file.
+
+    Raises:
+        UploadDigestMismatch: If the digest differs from `expected_sha256`.
+        UploadError: If not all bytes have been received yet.
+    """
+    with _locked(upload) as file:
+        if file is None:
+            return upload.sha256
+        if upload.offset != upload.total_size:
+            raise UploadError(
+                f"Upload is incomplete: received {upload.offset} of {upload.total_size} bytes"
+            )
+        digest = _hasher_for(upload).hexdigest()
+        if expected_sha256 and expected_sha256.lower() != digest:
+            file.truncate(0)
+            upload.offset = 0
+            save_object(upload)
+            _hashers.pop(upload.id, None)
+            raise UploadDigestMismatch(f"SHA-256 mismatch: received content hashes to {digest}")
+        store_file(upload_path(upload), digest)
+        upload.sha256 = digest
+        upload.stored_filename = digest
+        upload.status = UPLOAD_COMPLETE
+        save_object(upload)
+    # Only once the lock is released: a request still waiting on it re-reads the upload,
+    # finds it complete and never touches the staging file
+    _forget(upload.id)
+    return digest
+
+
+@contextmanager
+def _locked(upload: UploadSession) -> Iterator[Optional[BinaryIO]]:
+    """Hold an upload exclusively and yield its staging file, or None once it is complete.
+
+    The thread lock serializes the requests of this process and the file lock those of other
+    processes sharing the staging directory. The upload row is re-read under both, since it
+    was loaded before they were taken.
+    """
+    with _lock_for(upload.id):
+        db.session.refresh(upload)
+        if upload.status == UPLOAD_COMPLETE:
+            yield None
+            return
+        try:
+            file = open(upload_path(upload), "r+b")
+        except FileNotFoundError:
+            # Another process finalized the upload since the row was read
+            db.session.refresh(upload)
+            if upload.status != UPLOAD_COMPLETE:
+                raise
+            yield None
+            return
+        with file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            db.session.refresh(upload)
+            yield file if upload.status != UPLOAD_COMPLETE else None
+
+
+@transactional
+def _advance_offset(upload_id: str, expected: int, offset: int) -> bool:
+    # Conditional, so a chunk applied concurrently by another process is never overwritten
+    advanced = UploadSession.query.filter_by(id=upload_id, offset=expected).update(
+        {UploadSession.offset: offset}, synchronize_session=False
+    )
+    return advanced == 1
+
+
+def _lock_for(upload_id: str) -> threading.Lock:
+    with _registry_lock:
+        return _upload_locks.setdefault(upload_id, threading.Lock())
+
+
+def _forget(upload_id: str) -> None:
+    with _registry_lock:
+        _hashers.pop(upload_id, None)
+        _upload_locks.pop(upload_id, None)
+
+
+def _hasher_for(upload: UploadSession) -> "hashlib._Hash":
+    hashed_offset, hasher = _hashers.get(upload.id, (None, None))
+    if hasher is not None and hashed_offset == upload.offset:
+        return hasher
+
+    # The process restarted or another worker received earlier chunks: rehash the prefix once
+    hasher = hashlib.sha256()
+    remaining = upload.offset
+    with open(upload_path(upload), "rb") as file:
+        while remaining > 0:
+            block = file.read(min(BLOCK_SIZE, remaining))
+            if not block:
+                raise UploadError("Upload file is shorter than the recorded offset")
+            hasher.update(block)
+            remaining -= len(block)
+    _hashers[upload.id] = (upload.offset, hasher)
+    return hasher
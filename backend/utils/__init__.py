@@ -12,12 +12,17 @@ Key Features:
 Functions:
 - get_environment_variable(variable_name: str) -> str: Retrieve the value of environment variable.
 - parse_bool(value: str) -> bool: Convert a string to its boolean representation.
+- get_settings() -> Settings: Return the immutable, validated application settings.
+- get_jwks_cache(jwks_url: str) -> JWKSCache: Return the shared signing key cache for a JWKS URL.
+- verified_claims_cache: Shared LRU cache of verified token claims with hit/miss counters.
 - sign_up(username: str, password: str, email: str, user_attributes: dict, *args, **kwargs) -> dict: 
   Registers a new user with AWS Cognito.
 - verify_sign_up(username: str, code: str) -> dict: 
   Confirms a new user's registration with a verification code.
 - login_user(username: str, password: str) -> dict: 
   Authenticates a user with AWS Cognito and returns JWT tokens.
+- refresh_tokens(refresh_token: str) -> dict: 
+  Obtains new ID and access tokens from AWS Cognito using a refresh token.
 
 Usage:
 This module is intended to be imported as part of the utilities package. It allows for seamless
@@ -40,5 +45,7 @@ Example:
     )
 """
 
-from .cognito import login_user, sign_up, verify_sign_up
-from .environ import get_environment_variable, parse_bool
+from .claims_cache import VerifiedClaimsCache, verified_claims_cache
+from .cognito import login_user, refresh_tokens, sign_up, verify_sign_up
+from .environ import Settings, get_environment_variable, get_settings, parse_bool
+from .jwks import JWKSCache, get_jwks_cache
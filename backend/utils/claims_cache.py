@@ -0,0 +1,136 @@
+"""Verified Claims Cache Module
+
+This module provides a bounded, thread-safe LRU cache of token claims that have already passed
+signature verification. Browsers send the same ID token on every request until it expires, so
+remembering the verified claims lets repeated requests skip the RS256 check entirely.
+
+Key Features:
+- Keys entries by a SHA-256 digest of the token, so raw tokens are never kept in memory.
+- Drops each entry at the token's `exp` claim minus the verification leeway.
+- Evicts the least recently used entry once the cache is full.
+- Exposes hit and miss counters for monitoring.
+
+Usage:
+This module is intended to be used by the token verification helpers. A single shared instance,
+`verified_claims_cache`, is used by the whole process.
+
+Example:
+    from backend.utils.claims_cache import verified_claims_cache
+
+    claims = verified_claims_cache.get(token)
+    if claims is None:
+        claims = verify(token)
+        verified_claims_cache.put(token, claims)
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+DEFAULT_MAX_ENTRIES = 4096
+DEFAULT_LEEWAY = 60
+
+
+class VerifiedClaimsCache:
+    """A bounded LRU cache of verified token claims.
+
+    Attributes:
+        max_entries (int): Maximum number of cached tokens.
+        leeway (int): Seconds subtracted from the `exp` claim to compute the entry expiry.
+        hits (int): Number of lookups served from the cache.
+        misses (int): Number of lookups that required a full verification.
+
+    Example:
+        >>> cache = VerifiedClaimsCache(max_entries=2)
+        >>> cache.put(token, {"sub": "user", "exp": time.time() + 3600})
+        >>> cache.get(token)["sub"]
+        'user'
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, leeway: int = DEFAULT_LEEWAY):
+        self.max_entries = max_entries
+        self.leeway = leeway
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[Hashable, bytes], Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str, scope: Hashable) -> Tuple[Hashable, bytes]:
+        return scope, hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str, scope: Hashable = None) -> Optional[dict]:
+        """Return the cached claims for a token, or None if absent or expired.
+
+        Args:
+            token (str): The encoded JWT.
+            scope (Hashable, optional): Distinguishes verifications with different options,
+            such as ID and access tokens. Defaults to None.
+
+        Returns:
+            dict: A copy of the verified claims, or None on a cache miss.
+        """
+        if not isinstance(token, str):
+            return None
+        key = self._key(token, scope)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.time():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+
+    def put(self, token: str, claims: dict, scope: Hashable = None) -> None:
+        """Store the verified claims of a token until its expiry.
+
+        Tokens without a numeric `exp` claim, or that expire within the leeway, are not cached.
+
+        Args:
+            token (str): The encoded JWT.
+            claims (dict): The claims returned by a successful verification.
+            scope (Hashable, optional): Same scope as used with `get`. Defaults to None.
+        """
+        exp = claims.get("exp")
+        if not isinstance(exp, (int, float)):
+            return
+        expires_at = exp - self.leeway
+        if expires_at <= time.time():
+            return
+
+        key = self._key(token, scope)
+        with self._lock:
+            self._entries[key] = (expires_at, dict(claims))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Return the hit and miss counters along with the current size.
+
+        Returns:
+            dict: A dictionary with `hits`, `misses`, `size` and `max_entries` keys.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+
+verified_claims_cache = VerifiedClaimsCache()
@@ -19,6 +19,9 @@ Functions:
 - login_user(username: str, password: str) -> dict: 
   Authenticates a user with AWS Cognito and returns JWT tokens for session management.
 
+- refresh_tokens(refresh_token: str) -> dict: 
+  Obtains new ID and access tokens from AWS Cognito using a refresh token.
+
 Usage:
 This module is intended for use within the application to manage user accounts through AWS Cognito.
 It should be imported and utilized to handle user registration, verification, and authentication.
@@ -46,7 +49,7 @@ from typing import List
 
 import boto3
 
-from backend.utils.environ import get_environment_variable
+from backend.utils.environ import get_settings
 
 # Initialize the Cognito client to interact with AWS Cognito
 cognito_client = boto3.client("cognito-idp")
@@ -89,7 +92,7 @@ def sign_up(
         )
     """
     return cognito_client.sign_up(
-        ClientId=get_environment_variable("COGNITO_CLIENT_ID"),
+        ClientId=get_settings().cognito_client_id,
         Username=username,
         Password=password,
         UserAttributes=[*user_attributes, {"Name": "email", "Value": email}],
@@ -118,7 +121,7 @@ def verify_sign_up(username: str, code: str):
         >>> verify_sign_up("testuser", "123456")
     """
     return cognito_client.confirm_sign_up(
-        ClientId=get_environment_variable("COGNITO_CLIENT_ID"),
+        ClientId=get_settings().cognito_client_id,
         Username=username,
         ConfirmationCode=code,
     )
@@ -147,7 +150,33 @@ def login_user(username: str, password: str):
         >>> login_user("testuser", "SecurePassword123")
     """
     return cognito_client.initiate_auth(
-        ClientId=get_environment_variable("COGNITO_CLIENT_ID"),
+        ClientId=get_settings().cognito_client_id,
         AuthFlow="USER_PASSWORD_AUTH",
         AuthParameters={"USERNAME": username, "PASSWORD": password},
     )
+
+
+def refresh_tokens(refresh_token: str):
+    """
+    Obtains new ID and access tokens from AWS Cognito using a refresh token.
+
+    This function uses the AWS Cognito "REFRESH_TOKEN_AUTH" authentication flow. The response
+    contains new ID and access tokens; the refresh token itself is not rotated.
+
+    Args:
+        refresh_token (str): The refresh token issued at login.
+
+    Returns:
+        dict: A dictionary containing the authentication result, including JWT tokens.
+
+    Raises:
+        botocore.exceptions.ClientError: If the refresh token is invalid, revoked or expired.
+
+    Example:
+        >>> refresh_tokens("eyJjdHkiOiJKV1QiLCJlbmMiOiJBMjU2R0NNIiwiYWxnIjoiUlNBLU9BRVAifQ...")
+    """
+    return cognito_client.initiate_auth(
+        ClientId=get_settings().cognito_client_id,
+        AuthFlow="REFRESH_TOKEN_AUTH",
+        AuthParameters={"REFRESH_TOKEN": refresh_token},
+    )
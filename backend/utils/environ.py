@@ -8,6 +8,7 @@ representations. The module leverages the `dotenv` package to load environment v
 Key Features:
 - Retrieve the value of an environment variable with error handling.
 - Convert string representations of boolean values to actual boolean types.
+- Load an immutable, validated `Settings` object once per process.
 
 Usage:
 This module is intended for use within the application to manage configuration settings stored as 
@@ -17,29 +18,36 @@ are correctly interpreted.
 Functions:
 - get_environment_variable(variable_name: str) -> str: Retrieve the value of environment variable.
 - parse_bool(value: str) -> bool: Convert a string to its boolean representation.
+- get_settings() -> Settings: Return the process-wide settings, loading them on first use.
 
 Example:
-    from backend.utils.environ import get_environment_variable, parse_bool
+    from backend.utils.environ import get_environment_variable, get_settings, parse_bool
 
     db_uri = get_environment_variable("DATABASE_URI")
     is_debug = parse_bool(get_environment_variable("DEBUG"))
+    issuer = get_settings().cognito_issuer
 """
 
 import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Tuple
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
-def get_environment_variable(variable_name: str) -> str:
+def get_environment_variable(variable_name: str, default: Optional[str] = None) -> str:
     """Retrieve the value of an environment variable.
 
     This function attempts to access the specified environment variable by its name. If the variable
-    does not exist, it raises a KeyError with a descriptive message.
+    does not exist and no default is given, it raises a KeyError with a descriptive message.
 
     Args:
         variable_name (str): The name of the environment variable to retrieve.
+        default (str, optional): Value returned when the variable is not set. Defaults to None,
+        which makes the variable required.
 
     Returns:
         str: The value of the environment variable.
@@ -51,6 +59,8 @@ def get_environment_variable(variable_name: str) -> str:
         >>> os.environ["TEST_VAR"] = "test_value"
         >>> get_environment_variable("TEST_VAR")
         "test_value"
+        >>> get_environment_variable("NON_EXISTENT_VAR", default="fallback")
+        "fallback"
         >>> get_environment_variable("NON_EXISTENT_VAR")
         KeyError: "Environment variable NON_EXISTENT_VAR does not exist. Please set it in your .env
         file or system environment variables"
@@ -58,6 +68,8 @@ def get_environment_variable(variable_name: str) -> str:
     try:
         return os.environ[variable_name]
     except KeyError as e:
+        if default is not None:
+            return default
         raise KeyError(
             f"Environment variable {variable_name} does not exist. \
                 Please set it in your .env file or system environment variables"
@@ -83,3 +95,239 @@ def parse_bool(value: str) -> bool:
         False
     """
     return value.lower() in {"true", "1", "yes", "on"}
+
+
+DEFAULT_ALLOWED_ORIGINS = "http://localhost:3000,http://localhost:5000"
+SESSION_STORES = {"memory", "sqlalchemy"}
+STORAGE_BACKENDS = {"local", "s3"}
+RENDER_KERNELS = {"opencv", "numpy", "numba"}
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Immutable application settings loaded once from the environment.
+
+    Derived values such as the Cognito issuer and JWKS URL are computed when the settings are
+    loaded, so request handlers only read attributes.
+
+    Attributes:
+        aws_region (str): The AWS region hosting the Cognito user pool.
+        user_pool_id (str): The Cognito user pool ID.
+        cognito_client_id (str): The Cognito app client ID.
+        database_uri (str): The SQLAlchemy database URI.
+        static_folder (str): Folder holding the React static assets.
+        template_folder (str): Folder holding the React `index.html`.
+        debug (bool): Whether the server runs in debug mode.
+        allowed_origins (Tuple[str, ...]): Origins allowed to call the API with credentials.
+        cognito_issuer (str): Expected `iss` claim of Cognito tokens.
+        jwks_url (str): URL or local path of the Cognito JWKS document.
+        session_mode (bool): Whether server-side sessions are enabled.
+        session_store (str): Name of the session store, "memory" or "sqlalchemy".
+        session_max_entries (int): Capacity of the in-memory session store.
+        session_refresh_interval (float): Seconds between background session refresh scans.
+        session_refresh_margin (float): Sessions expiring within this many seconds are refreshed.
+        storage_backend (str): Name of the storage backend, "local" or "s3".
+        storage_root (str): Root directory of the local storage backend.
+        s3_bucket (str): Bucket used by the S3 storage backend.
+        s3_prefix (str): Key prefix used by the S3 storage backend.
+        s3_endpoint_url (str): Custom endpoint for S3-compatible services such as MinIO.
+        s3_max_concurrency (int): Parallel parts per multipart transfer.
+        render_workers (int): Number of render worker processes.
+        render_poll_interval (float): Seconds between two scans of the render queue.
+        render_stale_timeout (float): Running renders without a heartbeat for this long are
+        requeued.
+        render_segments (int): Number of segments a video is split into for parallel rendering.
+        render_segment_workers (int): Number of processes rendering segments at once.
+        render_incremental (bool): Whether renders reuse the unchanged segments of the previous
+        output of the same project.
+        render_segment_seconds (float): Approximate length of the segments of incremental
+        renders.
+        render_cache_max_bytes (int): Budget of the render output cache, 0 to disable it.
+        render_smart (bool): Whether renders copy the GOPs without placements from the source.
+        render_kernel (str): The default compositing backend of renders.
+        creative_cache_dir (str): Directory of the on-disk cache of decoded creatives.
+        creative_cache_max_bytes (int): Memory budget of the in-memory creative cache.
+        creative_url_ttl (float): Seconds a remote creative URL is trusted to keep its content.
+        creative_allow_local (bool): Whether creatives may be `file://` URLs or local paths.
+        creative_max_bytes (int): Largest accepted encoded creative, in bytes.
+        preview_cache_max_bytes (int): Memory budget of the decoded frames kept for previews.
+        preview_cache_sources (int): Number of source videos kept open for previews.
+    """
+
+    aws_region: str
+    user_pool_id: str
+    cognito_client_id: str
+    database_uri: str
+    static_folder: Optional[str]
+    template_folder: Optional[str]
+    debug: bool
+    allowed_origins: Tuple[str, ...]
+    cognito_issuer: str
+    jwks_url: str
+    session_mode: bool
+    session_store: str
+    session_max_entries: int
+    session_refresh_interval: float
+    session_refresh_margin: float
+    storage_backend: str
+    storage_root: str
+    s3_bucket: Optional[str]
+    s3_prefix: str
+    s3_endpoint_url: Optional[str]
+    s3_max_concurrency: int
+    render_workers: int
+    render_poll_interval: float
+    render_stale_timeout: float
+    render_segments: int
+    render_segment_workers: int
+    render_incremental: bool
+    render_segment_seconds: float
+    render_cache_max_bytes: int
+    render_smart: bool
+    render_kernel: str
+    creative_cache_dir: str
+    creative_cache_max_bytes: int
+    creative_url_ttl: float
+    creative_allow_local: bool
+    creative_max_bytes: int
+    preview_cache_max_bytes: int
+    preview_cache_sources: int
+
+    @classmethod
+    def from_environment(cls) -> "Settings":
+        """Build and validate the settings from the environment variables.
+
+        Returns:
+            Settings: The validated settings.
+
+        Raises:
+            KeyError: If a required environment variable is missing.
+            ValueError: If a variable has an invalid value.
+        """
+        aws_region = _require("AWS_REGION")
+        user_pool_id = _require("USER_POOL_ID")
+        cognito_issuer = f"https://cognito-idp.{aws_region}.amazonaws.com/{user_pool_id}"
+        allowed_origins = tuple(
+            origin.strip().rstrip("/")
+            for origin in get_environment_variable(
+                "ALLOWED_ORIGINS", default=DEFAULT_ALLOWED_ORIGINS
+            ).split(",")
+            if origin.strip()
+        )
+        for origin in allowed_origins:
+            if not origin.startswith(("http://", "https://")):
+                raise ValueError(f"Invalid origin in ALLOWED_ORIGINS: {origin}")
+
+        session_store = get_environment_variable("SESSION_STORE", default="memory").lower()
+        if session_store not in SESSION_STORES:
+            raise ValueError(f"Unknown session store: {session_store}")
+
+        storage_backend = get_environment_variable("STORAGE_BACKEND", default="local").lower()
+        if storage_backend not in STORAGE_BACKENDS:
+            raise ValueError(f"Unknown storage backend: {storage_backend}")
+        s3_bucket = os.environ.get("S3_BUCKET")
+        if storage_backend == "s3" and not s3_bucket:
+            raise ValueError("S3_BUCKET must be set when STORAGE_BACKEND is s3")
+
+        render_kernel = get_environment_variable("RENDER_KERNEL", default="opencv").lower()
+        if render_kernel not in RENDER_KERNELS:
+            raise ValueError(f"Unknown render kernel: {render_kernel}")
+
+        return cls(
+            aws_region=aws_region,
+            user_pool_id=user_pool_id,
+            cognito_client_id=_require("COGNITO_CLIENT_ID"),
+            database_uri=_require("SQLALCHEMY_DATABASE_URI"),
+            static_folder=os.environ.get("STATIC_FOLDER"),
+            template_folder=os.environ.get("TEMPLATE_FOLDER"),
+            debug=parse_bool(get_environment_variable("DEBUG", default="false")),
+            allowed_origins=allowed_origins,
+            cognito_issuer=cognito_issuer,
+            jwks_url=get_environment_variable(
+                "COGNITO_JWKS_URL", default=f"{cognito_issuer}/.well-known/jwks.json"
+            ),
+            session_mode=parse_bool(get_environment_variable("SESSION_MODE", default="false")),
+            session_store=session_store,
+            session_max_entries=_parse_number("SESSION_MAX_ENTRIES", "10000", int),
+            session_refresh_interval=_parse_number("SESSION_REFRESH_INTERVAL", "60", float),
+            session_refresh_margin=_parse_number("SESSION_REFRESH_MARGIN", "300", float),
+            storage_backend=storage_backend,
+            storage_root=get_environment_variable("STORAGE_ROOT", default="uploads"),
+            s3_bucket=s3_bucket,
+            s3_prefix=get_environment_variable("S3_PREFIX", default=""),
+            s3_endpoint_url=os.environ.get("S3_ENDPOINT_URL") or None,
+            s3_max_concurrency=_parse_number("S3_MAX_CONCURRENCY", "8", int),
+            render_workers=_parse_number("RENDER_WORKERS", str(os.cpu_count() or 1), int),
+            render_poll_interval=_parse_number("RENDER_POLL_INTERVAL", "1", float),
+            render_stale_timeout=_parse_number("RENDER_STALE_TIMEOUT", "600", float),
+            render_segments=_parse_number("RENDER_SEGMENTS", "1", int),
+            render_segment_workers=_parse_number(
+                "RENDER_SEGMENT_WORKERS", str(os.cpu_count() or 1), int
+            ),
+            render_incremental=parse_bool(
+                get_environment_variable("RENDER_INCREMENTAL", default="true")
+            ),
+            render_segment_seconds=_parse_number("RENDER_SEGMENT_SECONDS", "10", float),
+            render_cache_max_bytes=_parse_number(
+                "RENDER_CACHE_MAX_BYTES", str(20 * 1024 * 1024 * 1024), int, minimum=0
+            ),
+            render_smart=parse_bool(get_environment_variable("RENDER_SMART", default="false")),
+            render_kernel=render_kernel,
+            creative_cache_dir=get_environment_variable(
+                "CREATIVE_CACHE_DIR", default=os.path.join("cache", "creatives")
+            ),
+            creative_cache_max_bytes=_parse_number(
+                "CREATIVE_CACHE_MAX_BYTES", str(256 * 1024 * 1024), int
+            ),
+            creative_url_ttl=_parse_number("CREATIVE_URL_TTL", "3600", float),
+            creative_allow_local=parse_bool(
+                get_environment_variable("CREATIVE_ALLOW_LOCAL", default="false")
+            ),
+            creative_max_bytes=_parse_number("CREATIVE_MAX_BYTES", str(20 * 1024 * 1024), int),
+            preview_cache_max_bytes=_parse_number(
+                "PREVIEW_CACHE_MAX_BYTES", str(512 * 1024 * 1024), int
+            ),
+            preview_cache_sources=_parse_number("PREVIEW_CACHE_SOURCES", "4", int),
+        )
+
+
+def _require(variable_name: str) -> str:
+    value = get_environment_variable(variable_name).strip()
+    if not value:
+        raise ValueError(f"Environment variable {variable_name} must not be empty")
+    return value
+
+
+def _parse_number(
+    variable_name: str, default: str, number_type: type, minimum: Optional[float] = None
+):
+    value = get_environment_variable(variable_name, default=default)
+    try:
+        number = number_type(value)
+    except ValueError as e:
+        raise ValueError(f"Environment variable {variable_name} must be a number: {value}") from e
+    if minimum is None and number <= 0:
+        raise ValueError(f"Environment variable {variable_name} must be positive: {value}")
+    if minimum is not None and number < minimum:
+        raise ValueError(
+            f"Environment variable {variable_name} must be at least {minimum}: {value}"
+        )
+    return number
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the process-wide settings, loading and validating them on first use.
+
+    Returns:
+        Settings: The application settings.
+
+    Raises:
+        KeyError: If a required environment variable is missing.
+        ValueError: If a variable has an invalid value.
+
+    Examples:
+        >>> get_settings().cognito_issuer
+        "https://cognito-idp.us-east-1.amazonaws.com/us-east-1_example"
+    """
+    return Settings.from_environment()
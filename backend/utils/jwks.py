@@ -0,0 +1,194 @@
+"""JWKS Key Cache Module
+
+This module provides a process-wide, thread-safe cache of the JSON Web Keys used to verify
+tokens issued by AWS Cognito. Keys are fetched once, indexed by their key ID (`kid`) and reused
+across requests until their time-to-live expires, so token verification no longer pays for a
+network round trip on every call.
+
+Key Features:
+- Caches signing keys by `kid` with a configurable time-to-live.
+- Refetches the key set only when an unknown `kid` is seen or the cached set has expired.
+- Limits how often refetches can happen so a stream of forged tokens cannot cause a fetch storm.
+- Loads key sets from HTTP(S) URLs, `file://` URLs or local file paths for offline testing.
+
+Functions:
+- get_jwks_cache(jwks_url: str) -> JWKSCache: Return the shared cache for the given key set URL.
+
+Usage:
+This module is intended to be used by the token verification helpers. Caches are shared per key
+set URL, so every request handled by the process reuses the same keys.
+
+Example:
+    from backend.utils.jwks import get_jwks_cache
+
+    cache = get_jwks_cache("https://cognito-idp.us-east-1.amazonaws.com/pool/.well-known/jwks.json")
+    signing_key = cache.get_signing_key_from_jwt(token)
+"""
+
+import json
+import os
+import threading
+import time
+import urllib.request
+from typing import Dict, Optional
+
+import jwt
+
+DEFAULT_KEYS_TTL = 6 * 60 * 60
+DEFAULT_MIN_REFETCH_INTERVAL = 30
+DEFAULT_FETCH_TIMEOUT = 5
+
+
+class JWKSCache:
+    """A thread-safe cache of signing keys loaded from a JWKS document.
+
+    Keys are indexed by their `kid`. A lookup for a known `kid` never touches the network while
+    the cached key set is younger than `ttl`. A lookup for an unknown `kid` triggers a refetch,
+    but refetches are rate limited to one per `min_refetch_interval` seconds; lookups in between
+    fail fast with `jwt.PyJWKClientError`.
+
+    Attributes:
+        jwks_url (str): HTTP(S) URL, `file://` URL or local path of the JWKS document.
+        ttl (float): Seconds a fetched key set stays valid.
+        min_refetch_interval (float): Minimum number of seconds between two fetches.
+        fetch_count (int): Number of times the key set has been fetched.
+
+    Example:
+        >>> cache = JWKSCache("file:///tmp/jwks.json", ttl=300)
+        >>> key = cache.get_signing_key("my-key-id")
+    """
+
+    def __init__(
+        self,
+        jwks_url: str,
+        ttl: float = DEFAULT_KEYS_TTL,
+        min_refetch_interval: float = DEFAULT_MIN_REFETCH_INTERVAL,
+        timeout: float = DEFAULT_FETCH_TIMEOUT,
+    ):
+        self.jwks_url = jwks_url
+        self.ttl = ttl
+        self.min_refetch_interval = min_refetch_interval
+        self.timeout = timeout
+        self.fetch_count = 0
+        self._keys: Dict[str, jwt.PyJWK] = {}
+        self._fetched_at: Optional[float] = None
+        self._last_attempt_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def get_signing_key_from_jwt(self, token: str) -> jwt.PyJWK:
+        """Return the signing key matching the `kid` header of an unverified token.
+
+        Args:
+            token (str): The encoded JWT.
+
+        Returns:
+            jwt.PyJWK: The key that signed the token.
+
+        Raises:
+            jwt.DecodeError: If the token header cannot be decoded.
+            jwt.PyJWKClientError: If no key with the token's `kid` is available.
+        """
+        header = jwt.get_unverified_header(token)
+        return self.get_signing_key(header.get("kid"))
+
+    def get_signing_key(self, kid: Optional[str]) -> jwt.PyJWK:
+        """Return the signing key with the given key ID.
+
+        Args:
+            kid (str): The key ID from the token header.
+
+        Returns:
+            jwt.PyJWK: The matching signing key.
+
+        Raises:
+            jwt.PyJWKClientError: If the key is unknown, even after an allowed refetch.
+        """
+        if not kid:
+            raise jwt.PyJWKClientError("Token header does not contain a 'kid'")
+
+        key = self._lookup(kid)
+        if key is not None:
+            return key
+
+        with self._lock:
+            # Another thread may have refreshed the keys while we waited for the lock
+            key = self._lookup(kid)
+            if key is not None:
+                return key
+            if self._can_refetch():
+                self._refresh()
+                key = self._keys.get(kid)
+            if key is None:
+                raise jwt.PyJWKClientError(f"Unable to find a signing key that matches: {kid}")
+            return key
+
+    def clear(self) -> None:
+        """Drop all cached keys and refetch limits."""
+        with self._lock:
+            self._keys = {}
+            self._fetched_at = None
+            self._last_attempt_at = None
+
+    def _lookup(self, kid: str) -> Optional[jwt.PyJWK]:
+        if self._fetched_at is None or time.monotonic() - self._fetched_at > self.ttl:
+            return None
+        return self._keys.get(kid)
+
+    def _can_refetch(self) -> bool:
+        if self._fetched_at is not None and time.monotonic() - self._fetched_at > self.ttl:
+            # Expired key sets are always refetched, regardless of the rate limit
+            return True
+        if self._last_attempt_at is None:
+            return True
+        return time.monotonic() - self._last_attempt_at >= self.min_refetch_interval
+
+    def _refresh(self) -> None:
+        self._last_attempt_at = time.monotonic()
+        try:
+            document = self._load_document()
+            key_set = jwt.PyJWKSet.from_dict(document)
+        except (OSError, ValueError, jwt.PyJWTError) as e:
+            print(f"Failed to fetch JWKS from {self.jwks_url}: {e}")
+            if self._fetched_at is not None:
+                # Keep serving the last known keys rather than failing every request, but let
+                # them expire again after the refetch interval so a rotated key is picked up
+                # as soon as the key set can be fetched
+                self._fetched_at = time.monotonic() - self.ttl + self.min_refetch_interval
+                return
+            raise jwt.PyJWKClientError(f"Failed to fetch JWKS: {e}") from e
+
+        self._keys = {key.key_id: key for key in key_set.keys if key.key_id}
+        self._fetched_at = time.monotonic()
+        self.fetch_count += 1
+
+    def _load_document(self) -> dict:
+        if "://" not in self.jwks_url:
+            with open(os.path.expanduser(self.jwks_url), "r", encoding="utf-8") as file:
+                return json.load(file)
+        with urllib.request.urlopen(self.jwks_url, timeout=self.timeout) as response:
+            return json.loads(response.read().decode("utf-8"))
+
+
+_caches: Dict[str, JWKSCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_jwks_cache(jwks_url: str) -> JWKSCache:
+    """Return the process-wide key cache for the given JWKS URL, creating it on first use.
+
+    Args:
+        jwks_url (str): HTTP(S) URL, `file://` URL or local path of the JWKS document.
+
+    Returns:
+        JWKSCache: The shared cache for the URL.
+
+    Example:
+        >>> cache = get_jwks_cache("/tmp/jwks.json")
+        >>> cache is get_jwks_cache("/tmp/jwks.json")
+        True
+    """
+    cache = _caches.get(jwks_url)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.setdefault(jwks_url, JWKSCache(jwks_url))
+    return cache
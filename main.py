@@ -8,6 +8,8 @@ functions correctly.
 Key Features:
 - Creates and configures the Flask application instance.
 - Initializes the database and creates necessary models.
+- Enables server-side sessions when SESSION_MODE is set.
+- Starts the background render queue and its worker processes.
 - Registers API endpoints for authentication and project management.
 - Configures CORS to allow specific origins for API requests.
 
@@ -27,41 +29,55 @@ from backend import (
     auth_blueprint,
     create_app,
     create_db_models,
-    get_environment_variable,
+    get_settings,
     initialize_db,
+    initialize_render_queue,
+    initialize_session_store,
+    media_blueprint,
     project_blueprint,
     react_blueprint,
+    refresh_session_record,
     register_blueprint,
     run_application,
+    upload_blueprint,
 )
 
-app = create_app(
-    static_folder=get_environment_variable("STATIC_FOLDER"),
-    template_folder=get_environment_variable("TEMPLATE_FOLDER"),
-    root_path=os.path.dirname(__file__),
-)
-initialize_db(app)
-with app.app_context():
-    create_db_models()
-    register_blueprint(app, react_blueprint, auth_blueprint, project_blueprint)
+# Render workers are spawned and import this module again as `__mp_main__`; they build their
+# own application in `backend.jobs.worker.initialize_worker` and must not start another server,
+# session refresher or render queue
+if __name__ != "__mp_main__":
+    settings = get_settings()
+    app = create_app(
+        static_folder=settings.static_folder,
+        template_folder=settings.template_folder,
+        root_path=os.path.dirname(__file__),
+    )
+    initialize_db(app)
+    initialize_session_store(app, refresh_fn=refresh_session_record)
+    with app.app_context():
+        create_db_models()
+        register_blueprint(
+            app,
+            react_blueprint,
+            auth_blueprint,
+            project_blueprint,
+            upload_blueprint,
+            media_blueprint,
+        )
+    initialize_render_queue(app)
 
 if __name__ == "__main__":
     CORS(
         app,
         resources={
             r"/auth/*": {
-                "origins": [
-                    "http://localhost:3000",
-                    "http://localhost:5000",
-                ],  # Specify allowed origins
+                "origins": list(settings.allowed_origins),  # Set through ALLOWED_ORIGINS
                 "methods": ["GET", "POST"],
             },
             r"/api/*": {
-                "origins": [
-                    "http://localhost:3000",
-                    "http://localhost:5000",
-                ],  # Specify allowed origins
-                "methods": ["GET", "POST"],
+                "origins": list(settings.allowed_origins),  # Set through ALLOWED_ORIGINS
+                "methods": ["GET", "POST", "PUT"],
+                "expose_headers": ["Upload-Offset"],
             },
         },
         supports_credentials=True,
@@ -0,0 +1,75 @@
+"""Tests of the reference counting of content-addressed blobs."""
+
+import hashlib
+import time
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+
+from backend.models import Blob
+from backend.models.database import db
+from backend.storage import blobs
+from backend.storage.backends import LocalStorageBackend
+
+CONTENT = b"video content"
+DIGEST = hashlib.sha256(CONTENT).hexdigest()
+
+
+@pytest.fixture
+def storage(monkeypatch, tmp_path):
+    storage = LocalStorageBackend(str(tmp_path / "storage"))
+    monkeypatch.setattr(blobs, "get_storage_backend", lambda: storage)
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'app.db'}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield storage
+
+
+def staged_file(tmp_path) -> str:
+    path = tmp_path / f"staged-{time.monotonic_ns()}"
+    path.write_bytes(CONTENT)
+    return str(path)
+
+
+def test_release_deletes_the_last_reference(storage, tmp_path):
+    blobs.store_file(staged_file(tmp_path), DIGEST)
+    blobs.store_file(staged_file(tmp_path), DIGEST)
+    assert db.session.get(Blob, DIGEST).ref_count == 2
+
+    blobs.release_blob(DIGEST)
+    assert storage.exists(blobs.blob_key(DIGEST))
+    blobs.release_blob(DIGEST)
+    assert not storage.exists(blobs.blob_key(DIGEST))
+    assert db.session.get(Blob, DIGEST) is None
+
+
+def test_store_during_release_stores_the_content_again(storage, monkeypatch, tmp_path):
+    blobs.store_file(staged_file(tmp_path), DIGEST)
+    # The release has marked the blob as deleted but not deleted its file yet
+    assert blobs._drop_reference(DIGEST) == 1
+
+    def finish_release(seconds):
+        storage.delete(blobs.blob_key(DIGEST))
+        blobs._drop_tombstone(DIGEST)
+
+    monkeypatch.setattr(blobs, "time", SimpleNamespace(time=time.time, sleep=finish_release))
+    blobs.store_file(staged_file(tmp_path), DIGEST)
+
+    assert storage.exists(blobs.blob_key(DIGEST))
+    assert db.session.get(Blob, DIGEST).ref_count == 1
+    assert not blobs.acquire_blob(DIGEST, "someone-else")
+
+
+def test_stale_tombstone_is_reused(storage, tmp_path):
+    blobs.store_file(staged_file(tmp_path), DIGEST)
+    blobs._drop_reference(DIGEST)
+    storage.delete(blobs.blob_key(DIGEST))
+    Blob.query.filter_by(sha256=DIGEST).update({Blob.deleting_at: 0.0})
+    db.session.commit()
+
+    blobs.store_file(staged_file(tmp_path), DIGEST)
+    assert storage.exists(blobs.blob_key(DIGEST))
+    assert db.session.get(Blob, DIGEST).deleting_at is None
@@ -0,0 +1,97 @@
+"""Tests of job claims and heartbeats in the render job queue."""
+
+import time
+
+import pytest
+from flask import Flask
+
+from backend.jobs import queue
+from backend.jobs.worker import JobHeartbeat
+from backend.models import RenderJob
+from backend.models.database import db
+from backend.models.render_job import JOB_COMPLETE, JOB_FAILED, JOB_RUNNING
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'app.db'}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+
+
+def submitted_job() -> str:
+    return queue.submit_render_job("project", "user", "renders/project.mp4").id
+
+
+def make_stale(job_id: str) -> None:
+    RenderJob.query.filter_by(id=job_id).update({RenderJob.heartbeat_at: 0.0})
+    db.session.commit()
+
+
+def test_requeued_job_ignores_its_previous_worker(app):
+    job_id = submitted_job()
+    first = queue.claim_job(job_id)
+    make_stale(job_id)
+    assert queue.requeue_stale_jobs(timeout=60) == 1
+    second = queue.claim_job(job_id)
+    assert first is not None and second is not None and first != second
+
+    assert not queue.send_heartbeat(job_id, first)
+    assert not queue.complete_job(job_id, first, {"frames": 1})
+    assert not queue.fail_job(job_id, "late failure", first)
+    assert db.session.get(RenderJob, job_id).status == JOB_RUNNING
+
+    assert queue.complete_job(job_id, second, {"frames": 1})
+    assert db.session.get(RenderJob, job_id).status == JOB_COMPLETE
+
+
+def test_job_claimed_twice_only_once(app):
+    job_id = submitted_job()
+    assert queue.claim_job(job_id) is not None
+    assert queue.claim_job(job_id) is None
+
+
+def test_unclaimed_failure_fails_any_claim(app):
+    job_id = submitted_job()
+    queue.claim_job(job_id)
+    assert queue.fail_job(job_id, "worker crashed")
+    assert db.session.get(RenderJob, job_id).status == JOB_FAILED
+
+
+def test_heartbeat_thread_keeps_a_silent_job_alive(app):
+    job_id = submitted_job()
+    claim = queue.claim_job(job_id)
+    make_stale(job_id)
+
+    heartbeat = JobHeartbeat(app, job_id, claim, interval=0.01)
+    heartbeat.start()
+    time.sleep(0.2)
+    heartbeat.stop()
+
+    assert queue.requeue_stale_jobs(timeout=60) == 0
+    assert db.session.get(RenderJob, job_id).heartbeat_at > time.time() - 60
+
+
+def test_identical_queued_render_is_reused(app):
+    job_id = submitted_job()
+    assert submitted_job() == job_id
+    other = queue.submit_render_job("project", "user", "renders/project.mp4", {"frame_step": 2})
+    assert other.id != job_id
+
+
+def test_renders_of_the_same_output_run_one_at_a_time(app):
+    first = submitted_job()
+    claim = queue.claim_job(first)
+    second = submitted_job()
+    draft = queue.submit_render_job("project", "user", "renders/project.draft.mp4").id
+
+    assert second != first
+    assert queue.next_queued_job_ids(limit=4) == [draft]
+    assert queue.claim_job(second) is None
+
+    queue.complete_job(first, claim, {})
+    assert queue.next_queued_job_ids(limit=4) == [second, draft]
+    assert queue.claim_job(second) is not None
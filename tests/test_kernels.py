@@ -0,0 +1,73 @@
+"""Parity tests of the compositing kernels.
+
+The fused NumPy and Numba kernels must agree to within `PARITY_TOLERANCE` levels, and both must
+agree with the OpenCV compositor up to its fixed-point bilinear sampling.
+"""
+
+import numpy as np
+import pytest
+
+from backend.render import kernels
+from backend.render.compositor import composite_creative
+from backend.render.geometry import creative_homography
+from backend.render.kernels import (
+    PARITY_TOLERANCE,
+    KernelParityError,
+    kernel_parity,
+    numba_available,
+    warp_blend_numba,
+    warp_blend_numpy,
+)
+
+FRAME_SIZE = 96
+SEEDS = range(12)
+# OpenCV samples with fixed-point weights, so it may round one level further than the fused
+# float64 kernels
+OPENCV_TOLERANCE = PARITY_TOLERANCE + 1
+
+
+def random_case(seed: int):
+    """Return a random frame, premultiplied creative and convex quad homography."""
+    rng = np.random.default_rng(seed)
+    height, width = int(rng.integers(8, 64)), int(rng.integers(8, 64))
+    creative = rng.integers(0, 256, (height, width, 4)).astype(np.uint8)
+    creative[..., :3] = creative[..., :3].astype(np.uint16) * creative[..., 3:4] // 255
+    frame = rng.integers(0, 256, (FRAME_SIZE, FRAME_SIZE, 3)).astype(np.uint8)
+    # A jittered rectangle keeps the quad convex while reaching past the frame edges
+    x0, y0 = rng.uniform(-0.2 * FRAME_SIZE, 0.4 * FRAME_SIZE, 2)
+    x1, y1 = rng.uniform(0.6 * FRAME_SIZE, 1.2 * FRAME_SIZE, 2)
+    quad = np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1]])
+    quad += rng.uniform(-0.1 * FRAME_SIZE, 0.1 * FRAME_SIZE, (4, 2))
+    return frame, creative, creative_homography(width, height, quad)
+
+
+def test_kernel_parity_within_tolerance():
+    assert kernel_parity(cases=5, size=48) <= PARITY_TOLERANCE
+
+
+def test_kernel_parity_raises_on_mismatch(monkeypatch):
+    monkeypatch.setattr(kernels, "warp_blend_numpy", lambda region, *_: region.fill(0))
+    with pytest.raises(KernelParityError):
+        kernel_parity(cases=5, size=48)
+
+
+@pytest.mark.skipif(not numba_available(), reason="Numba is not installed")
+@pytest.mark.parametrize("seed", SEEDS)
+def test_numba_matches_numpy(seed):
+    frame, creative, homography = random_case(seed)
+    expected = frame.copy()
+    warp_blend_numpy(expected, creative, homography)
+    actual = frame.copy()
+    warp_blend_numba(actual, creative, homography)
+    assert np.abs(expected.astype(np.int16) - actual.astype(np.int16)).max() <= PARITY_TOLERANCE
+
+
+@pytest.mark.parametrize("kernel", ["numpy", "numba"])
+@pytest.mark.parametrize("seed", SEEDS)
+def test_fused_kernels_match_opencv(seed, kernel):
+    frame, creative, homography = random_case(seed)
+    expected = frame.copy()
+    composite_creative(expected, creative, homography, kernel="opencv")
+    actual = frame.copy()
+    composite_creative(actual, creative, homography, kernel=kernel)
+    assert np.abs(expected.astype(np.int16) - actual.astype(np.int16)).max() <= OPENCV_TOLERANCE
@@ -0,0 +1,74 @@
+"""Tests of placement timelines, including tracks ended by hidden keyframes."""
+
+from types import SimpleNamespace
+
+import numpy as np
+
+from backend.render.interpolation import build_timeline
+from backend.render.placements import placements_from_annotations
+from backend.render.probe import KeyframeIndex
+from backend.render.smart import plan_smart_ranges
+
+FPS = 10.0
+FRAME_COUNT = 100
+QUAD = [[10, 10], [60, 10], [60, 40], [10, 40]]
+
+
+def annotation(timestamp: float, points, image_url="https://example.com/ad.png"):
+    return SimpleNamespace(timestamp=timestamp, points=points, image_url=image_url)
+
+
+def timeline_of(annotations):
+    placements = placements_from_annotations(annotations)
+    return build_timeline(placements, FRAME_COUNT, FPS, lambda url: (100, 50))
+
+
+def test_track_holds_its_last_keyframe():
+    visible = timeline_of([annotation(2.0, QUAD)]).visible_frames(640, 360)
+    assert not visible[:20].any()
+    assert visible[20:].all()
+
+
+def test_hidden_keyframe_confines_a_placement_to_the_middle():
+    annotations = [
+        annotation(3.0, {"corners": QUAD, "track": "billboard"}),
+        annotation(5.0, {"hidden": True, "track": "billboard"}, image_url=None),
+    ]
+    timeline = timeline_of(annotations)
+    visible = timeline.visible_frames(640, 360)
+    assert not visible[:30].any()
+    assert visible[30:50].all()
+    assert not visible[50:].any()
+    assert timeline.placements_at(60) == []
+    np.testing.assert_allclose(timeline.quads_at(49)["billboard"], QUAD)
+
+    index = KeyframeIndex(
+        width=640,
+        height=360,
+        fps=FPS,
+        frame_count=FRAME_COUNT,
+        duration=FRAME_COUNT / FPS,
+        codec="h264",
+        frames=np.arange(0, FRAME_COUNT, 20, dtype=np.uint32),
+        pts=np.arange(0, FRAME_COUNT, 20, dtype=np.float64) / FPS,
+        offsets=np.full(5, -1, dtype=np.int64),
+    )
+    ranges = plan_smart_ranges(index, visible, max_frames=FRAME_COUNT)
+    assert ranges == [(0, 20, False), (20, 60, True), (60, 100, False)]
+
+
+def test_track_reappears_after_a_hidden_keyframe():
+    annotations = [
+        annotation(1.0, {"corners": QUAD, "track": "billboard"}),
+        annotation(2.0, {"hidden": True, "track": "billboard"}),
+        annotation(7.0, {"corners": QUAD, "track": "billboard"}),
+    ]
+    visible = timeline_of(annotations).visible_frames(640, 360)
+    assert visible[10:20].all()
+    assert not visible[20:70].any()
+    assert visible[70:].all()
+
+
+def test_leading_hidden_keyframe_is_dropped():
+    placements = placements_from_annotations([annotation(1.0, {"hidden": True, "track": "t"})])
+    assert placements == []
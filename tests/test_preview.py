@@ -0,0 +1,11 @@
+"""Tests of single-frame previews."""
+
+import pytest
+
+from backend.render import preview
+
+
+def test_unprobed_video_is_not_probed_in_the_request(monkeypatch):
+    monkeypatch.setattr(preview, "load_keyframe_index", lambda source_key: None)
+    with pytest.raises(preview.MediaNotReady):
+        preview.render_preview("source", [], 1.0)
@@ -0,0 +1,60 @@
+"""Tests of the render output cache budget.
+
+A `RENDER_CACHE_MAX_BYTES` of 0 is a valid setting that disables the cache: renders neither look
+up nor record cache entries and write to the job's own output key.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from backend.jobs import worker
+from backend.utils.environ import Settings
+
+
+@pytest.fixture
+def environment(monkeypatch):
+    monkeypatch.setenv("AWS_REGION", "us-east-1")
+    monkeypatch.setenv("USER_POOL_ID", "us-east-1_example")
+    monkeypatch.setenv("COGNITO_CLIENT_ID", "client")
+    monkeypatch.setenv("SQLALCHEMY_DATABASE_URI", "sqlite://")
+
+
+def test_zero_budget_is_accepted(environment, monkeypatch):
+    monkeypatch.setenv("RENDER_CACHE_MAX_BYTES", "0")
+    assert Settings.from_environment().render_cache_max_bytes == 0
+
+
+def test_negative_budget_is_rejected(environment, monkeypatch):
+    monkeypatch.setenv("RENDER_CACHE_MAX_BYTES", "-1")
+    with pytest.raises(ValueError):
+        Settings.from_environment()
+
+
+def test_zero_budget_disables_the_cache(environment, monkeypatch):
+    monkeypatch.setenv("RENDER_CACHE_MAX_BYTES", "0")
+    settings = Settings.from_environment()
+    rendered = {}
+
+    def unexpected(*args, **kwargs):
+        raise AssertionError("The render cache is disabled")
+
+    def render_project(source_key, annotations, output_key, **kwargs):
+        rendered["output_key"] = output_key
+        return SimpleNamespace(to_dict=dict)
+
+    monkeypatch.setattr(worker, "get_settings", lambda: settings)
+    monkeypatch.setattr(worker, "_project_annotations", lambda project: [])
+    monkeypatch.setattr(worker, "db", SimpleNamespace(session=SimpleNamespace(close=dict)))
+    monkeypatch.setattr(worker, "ProgressReporter", lambda job_id, claim: None)
+    monkeypatch.setattr(worker, "render_project", render_project)
+    for name in ("render_cache_key", "lookup_render", "record_render", "assign_output_key"):
+        monkeypatch.setattr(worker, name, unexpected)
+
+    job = SimpleNamespace(
+        id=1, claim_id="claim", output_key="renders/1.mp4", state_key="renders/1.mp4", options={}
+    )
+    result = worker._run_render(job, SimpleNamespace(file_path="source"))
+
+    assert rendered["output_key"] == "renders/1.mp4"
+    assert result == {"cached": False, "cache_key": None}
@@ -0,0 +1,46 @@
+"""Tests of the schema upgrade of databases created by earlier versions."""
+
+import pytest
+from flask import Flask
+from sqlalchemy import inspect, text
+
+from backend.models import Annotation, Video, create_db_models
+from backend.models.database import db
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'app.db'}"
+    db.init_app(app)
+    with app.app_context():
+        yield app
+
+
+def test_existing_tables_gain_the_new_columns(app):
+    with db.engine.begin() as connection:
+        connection.execute(text("CREATE TABLE project (id VARCHAR(36) PRIMARY KEY)"))
+        connection.execute(
+            text(
+                "CREATE TABLE video (id VARCHAR(36) PRIMARY KEY, project_id INTEGER NOT NULL, "
+                "filename VARCHAR(255) NOT NULL UNIQUE)"
+            )
+        )
+        connection.execute(
+            text(
+                "CREATE TABLE annotation (id VARCHAR(36) PRIMARY KEY, "
+                "project_id INTEGER NOT NULL, timestamp FLOAT, points JSON, "
+                "image_url VARCHAR(2048))"
+            )
+        )
+        connection.execute(text("INSERT INTO annotation (id, project_id) VALUES ('a', 1)"))
+
+    create_db_models()
+    create_db_models()
+
+    columns = {column["name"] for column in inspect(db.engine).get_columns("video")}
+    assert {"width", "height", "fps", "frame_count", "duration", "codec"} <= columns
+    assert Video.query.count() == 0
+    assert Annotation.query.filter_by(is_derived=False).count() == 1
+    indexes = {index["name"] for index in inspect(db.engine).get_indexes("annotation")}
+    assert "ix_annotation_is_derived" in indexes
@@ -0,0 +1,57 @@
+"""Tests of the background session refresher against both session stores."""
+
+import time
+
+import pytest
+from flask import Flask
+
+from backend.models.database import db
+from backend.sessions.refresher import SessionRefresher
+from backend.sessions.store import InMemorySessionStore, SessionRecord, SQLAlchemySessionStore
+
+
+@pytest.fixture(params=["memory", "sqlalchemy"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        yield InMemorySessionStore()
+        return
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'app.db'}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield SQLAlchemySessionStore()
+
+
+def expiring_record() -> SessionRecord:
+    return SessionRecord(
+        session_id="session",
+        sub="user",
+        id_token="id",
+        access_token="access",
+        refresh_token="refresh",
+        id_claims={"sub": "user"},
+        access_claims={},
+        expires_at=time.time() + 10,
+    )
+
+
+def test_refresh_replaces_the_tokens(store):
+    store.save(expiring_record())
+    refresher = SessionRefresher(
+        None, store, lambda record: record.updated(id_token="new", expires_at=time.time() + 3600)
+    )
+    assert refresher.refresh_expiring() == 1
+    assert store.get("session").id_token == "new"
+
+
+def test_logout_during_refresh_is_not_undone(store):
+    store.save(expiring_record())
+
+    def refresh(record):
+        # The user logs out while Cognito answers
+        store.delete(record.session_id)
+        return record.updated(id_token="new", expires_at=time.time() + 3600)
+
+    assert SessionRefresher(None, store, refresh).refresh_expiring() == 0
+    assert store.get("session") is None
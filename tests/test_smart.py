@@ -0,0 +1,47 @@
+"""Tests of the checks and FFmpeg commands of smart rendering."""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from backend.render import smart
+from backend.render.probe import KeyframeIndex
+
+INDEX = KeyframeIndex(
+    width=640,
+    height=360,
+    fps=25.0,
+    frame_count=100,
+    duration=4.0,
+    codec="h264",
+    frames=np.array([0, 50], dtype=np.uint32),
+    pts=np.array([1.4, 3.4]),
+    offsets=np.array([-1, -1], dtype=np.int64),
+)
+
+
+@pytest.mark.parametrize(
+    "pixel_format, supported",
+    [("yuv420p", True), ("yuv420p10le", False), ("yuv422p", False), ("yuvj420p", False)],
+)
+def test_only_8_bit_420_sources_are_smart_rendered(monkeypatch, pixel_format, supported):
+    monkeypatch.setattr(smart, "ffmpeg_available", lambda: True)
+    monkeypatch.setattr(smart, "probe_pixel_format", lambda path: pixel_format)
+    assert smart.smart_supported(INDEX, "input.mp4") is supported
+
+
+def test_copy_seeks_to_the_absolute_keyframe_timestamp(monkeypatch):
+    commands = []
+
+    def run(command, **kwargs):
+        commands.append(command)
+        return SimpleNamespace(returncode=0, stderr="")
+
+    monkeypatch.setattr(smart.subprocess, "run", run)
+    smart.copy_range("input.ts", "output.ts", INDEX, 50, 100)
+
+    command = commands[0]
+    assert command[command.index("-seek_timestamp") + 1] == "1"
+    assert command.index("-seek_timestamp") < command.index("-i")
+    assert float(command[command.index("-ss") + 1]) == pytest.approx(3.4, abs=0.001)